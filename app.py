@@ -32,9 +32,10 @@ from models import (
     ImportJob,
     DocumentFile,
     SicknessCase,
-    AdvisorEscalation,
 )
 
+from pip_app.services.access_log import init_access_log
+from pip_app.services.advisor_queue_counts import empty_queue_counts, get_advisor_queue_counts
 from pip_app.services.auth_utils import superuser_required
 from pip_app.services.dashboard_utils import counts_by_field, open_pips_scoped_query
 from pip_app.services.document_utils import (
@@ -60,8 +61,16 @@ from pip_app.services.import_utils import (
     read_xlsx_bytes,
     try_parse_date,
 )
-from pip_app.services.module_settings import DEFAULT_MODULE_KEYS, get_enabled_modules
+from pip_app.services.module_settings import (
+    DEFAULT_MODULE_KEYS,
+    bootstrap_all_organisations,
+    get_enabled_modules,
+)
+from pip_app.services.request_metrics import init_request_metrics
+from pip_app.services.request_profiling import init_request_profiling
+from pip_app.services.search_index import init_search_index, rebuild_search_index
 from pip_app.services.sickness_metrics import compute_sickness_trigger_metrics
+from pip_app.services.sickness_summaries import roll_sickness_summaries_forward
 from pip_app.services.storage_utils import next_version_for, save_file
 from pip_app.services.time_utils import LONDON_TZ, auto_review_date, now_local, now_utc, today_local
 from pip_app.services.timeline_utils import log_timeline_event
@@ -86,7 +95,10 @@ app.jinja_env.globals["today_local"] = today_local
 # Railway production should provide DATABASE_URL for PostgreSQL.
 database_url = os.environ.get("DATABASE_URL")
 
-if database_url:
+if database_url and database_url.startswith("sqlite"):
+    # An explicit SQLite database, e.g. the test suite's throwaway one.
+    app.config["SQLALCHEMY_DATABASE_URI"] = database_url
+elif database_url:
     # Railway/Heroku-style URLs sometimes use postgres://, but SQLAlchemy
     # expects postgresql://.
     if database_url.startswith("postgres://"):
@@ -132,6 +144,13 @@ csrf = CSRFProtect(app)
 db.init_app(app)
 migrate = Migrate(app, db)
 
+# Registered before any other request hooks so the per-request SQL counter
+# also covers user loading and context processors.
+init_request_metrics(app)
+init_request_profiling(app)
+init_access_log(app)
+init_search_index(app)
+
 from pip_app.blueprints.auth import auth_bp
 from pip_app.blueprints.main import main_bp
 from pip_app.blueprints.taxonomy import taxonomy_bp
@@ -143,6 +162,7 @@ from pip_app.blueprints.pip import pip_bp, get_active_draft_for_user
 from pip_app.blueprints.employee_relations import employee_relations_bp
 from pip_app.blueprints.manage_employee import manage_employee_bp
 from pip_app.blueprints.ai_consent import ai_consent_bp
+from pip_app.blueprints.ai_jobs import ai_jobs_bp
 from pip_app.blueprints.supervision import supervision_bp
 
 login_manager = LoginManager()
@@ -164,6 +184,7 @@ app.register_blueprint(pip_bp)
 app.register_blueprint(employee_relations_bp)
 app.register_blueprint(manage_employee_bp)
 app.register_blueprint(ai_consent_bp)
+app.register_blueprint(ai_jobs_bp)
 app.register_blueprint(supervision_bp)
 
 csrf.exempt(app.view_functions['employees.quick_add_employee'])
@@ -177,6 +198,27 @@ def load_user(user_id):
     return db.session.get(User, int(user_id))
 
 
+@app.cli.command("bootstrap-organisations")
+def bootstrap_organisations_command():
+    """Create missing organisation defaults and module setting rows."""
+    organisations = bootstrap_all_organisations()
+    print(f"Bootstrapped {len(organisations)} organisation(s).")
+
+
+@app.cli.command("roll-sickness-summaries")
+def roll_sickness_summaries_command():
+    """Roll per-employee sickness summaries forward to today (run nightly)."""
+    count = roll_sickness_summaries_forward(today=today_local())
+    print(f"Rolled sickness summaries for {count} employee(s).")
+
+
+@app.cli.command("rebuild-search-index")
+def rebuild_search_index_command():
+    """Rebuild the cross-module full-text search index from scratch."""
+    count = rebuild_search_index()
+    print(f"Indexed {count} record(s) for search.")
+
+
 @app.context_processor
 def inject_module():
     return dict(active_module=session.get('active_module'))
@@ -196,29 +238,18 @@ def inject_enabled_modules():
 def inject_advisor_queue_counts():
     try:
         if not getattr(current_user, "is_authenticated", False):
-            return dict(advisor_queue_counts={"open": 0, "unassigned": 0})
+            return dict(advisor_queue_counts=empty_queue_counts())
 
         if not current_user.is_admin():
-            return dict(advisor_queue_counts={"open": 0, "unassigned": 0})
-
-        query = AdvisorEscalation.query.filter(
-            AdvisorEscalation.status.in_(["submitted", "acknowledged", "in_review"])
-        )
-
-        if getattr(current_user, "organisation_id", None):
-            query = query.filter(AdvisorEscalation.organisation_id == current_user.organisation_id)
-
-        open_count = query.count()
-        unassigned_count = query.filter(AdvisorEscalation.assigned_to_user_id.is_(None)).count()
+            return dict(advisor_queue_counts=empty_queue_counts())
 
         return dict(
-            advisor_queue_counts={
-                "open": open_count,
-                "unassigned": unassigned_count,
-            }
+            advisor_queue_counts=get_advisor_queue_counts(
+                getattr(current_user, "organisation_id", None)
+            )
         )
     except Exception:
-        return dict(advisor_queue_counts={"open": 0, "unassigned": 0})
+        return dict(advisor_queue_counts=empty_queue_counts())
 
 
 @app.context_processor
@@ -337,22 +368,6 @@ def compat_url_for(endpoint, **values):
 app.jinja_env.globals["url_for"] = compat_url_for
 
 
-@app.before_request
-def log_request_start():
-    app.logger.warning("REQUEST START: %s %s", request.method, request.path)
-
-
-@app.after_request
-def log_request_end(response):
-    app.logger.warning(
-        "REQUEST END: %s %s -> %s",
-        request.method,
-        request.path,
-        response.status_code,
-    )
-    return response
-
-
 @app.before_request
 def set_active_module():
     path = (request.path or "").lower()
@@ -0,0 +1,359 @@
+# benchmark_dashboard_indexes.py
+"""Compare dashboard query plans before and after the composite indexes.
+
+Seeds a scratch database with synthetic data, builds the schema at the
+current head, downgrades past the dashboard index migration
+(b6e4d2a9c817) and captures each dashboard query's plan and timing, then
+upgrades again and captures them with the indexes in place.
+
+    python benchmark_dashboard_indexes.py                    # temporary SQLite file
+    python benchmark_dashboard_indexes.py --scale 0.2        # quicker run
+    python benchmark_dashboard_indexes.py \\
+        --database-url postgresql://localhost/pip_bench --drop-existing
+
+PostgreSQL plans come from EXPLAIN (ANALYZE, BUFFERS); SQLite plans from
+EXPLAIN QUERY PLAN. Every table in the target database is dropped, so
+never point --database-url at a real database.
+"""
+
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+from alembic import command
+from alembic.config import Config
+from flask import Flask
+from sqlalchemy import and_, func, insert, select, text
+
+from models import (
+    Employee,
+    EmployeeRelationsCase,
+    Organisation,
+    PIPRecord,
+    SicknessCase,
+    SicknessMeeting,
+    SupervisionAction,
+    SupervisionRecord,
+    TimelineEvent,
+    db,
+)
+
+BASE_DIR = os.path.abspath(os.path.dirname(__file__))
+MIGRATIONS_DIR = os.path.join(BASE_DIR, "migrations")
+
+INDEX_REVISION = "b6e4d2a9c817"
+PRE_INDEX_REVISION = "a3d9e2c7f514"
+
+# Row counts at --scale 1.
+BASE_COUNTS = {
+    "organisations": 5,
+    "teams_per_org": 40,
+    "employees": 20_000,
+    "pips": 40_000,
+    "timeline_per_pip": 5,
+    "sickness_cases": 60_000,
+    "sickness_meetings": 30_000,
+    "er_cases": 10_000,
+    "supervisions": 20_000,
+    "actions_per_supervision": 3,
+}
+UNSCALED_COUNTS = {"organisations", "teams_per_org", "timeline_per_pip", "actions_per_supervision"}
+
+BATCH_SIZE = 5_000
+TODAY = date.today()
+
+ER_STATUSES = [
+    "Draft",
+    "Open",
+    "Under Investigation",
+    "Hearing Scheduled",
+    "Outcome Issued",
+    "Appeal Pending",
+    "Closed",
+    "Archived",
+]
+
+
+# ---- Seeding ----
+
+def _insert(model, rows):
+    for start in range(0, len(rows), BATCH_SIZE):
+        db.session.execute(insert(model), rows[start:start + BATCH_SIZE])
+
+
+def _random_day(rng, back, forward=0):
+    return TODAY + timedelta(days=rng.randint(-back, forward))
+
+
+def seed(scale, rng):
+    counts = {
+        key: value if key in UNSCALED_COUNTS else max(1, int(value * scale))
+        for key, value in BASE_COUNTS.items()
+    }
+
+    _insert(Organisation, [
+        {"id": i, "name": f"Bench Org {i}", "slug": f"bench-org-{i}"}
+        for i in range(1, counts["organisations"] + 1)
+    ])
+
+    _insert(Employee, [
+        {
+            "id": i,
+            "organisation_id": rng.randint(1, counts["organisations"]),
+            "team_id": rng.randint(1, counts["teams_per_org"]),
+            "first_name": f"First{i}",
+            "last_name": f"Last{i}",
+            "is_leaver": rng.random() < 0.15,
+        }
+        for i in range(1, counts["employees"] + 1)
+    ])
+
+    employee_ids = range(1, counts["employees"] + 1)
+
+    _insert(PIPRecord, [
+        {
+            "id": i,
+            "employee_id": rng.choice(employee_ids),
+            "concerns": "Synthetic benchmark concern",
+            "start_date": _random_day(rng, 720),
+            "review_date": _random_day(rng, 360, 90),
+            "status": rng.choices(["Open", "Closed", "Completed"], weights=[2, 6, 2])[0],
+        }
+        for i in range(1, counts["pips"] + 1)
+    ])
+
+    _insert(TimelineEvent, [
+        {
+            "pip_record_id": pip_id,
+            "timestamp": datetime.combine(_random_day(rng, 720), datetime.min.time()),
+            "event_type": "Note",
+        }
+        for pip_id in range(1, counts["pips"] + 1)
+        for _ in range(counts["timeline_per_pip"])
+    ])
+
+    _insert(SicknessCase, [
+        {
+            "id": i,
+            "employee_id": rng.choice(employee_ids),
+            "start_date": _random_day(rng, 1095),
+            "status": "Open" if rng.random() < 0.1 else "Closed",
+        }
+        for i in range(1, counts["sickness_cases"] + 1)
+    ])
+
+    _insert(SicknessMeeting, [
+        {
+            "sickness_case_id": rng.randint(1, counts["sickness_cases"]),
+            "meeting_date": _random_day(rng, 1095, 60),
+            "meeting_type": "Return to Work",
+        }
+        for _ in range(counts["sickness_meetings"])
+    ])
+
+    _insert(EmployeeRelationsCase, [
+        {
+            "employee_id": rng.choice(employee_ids),
+            "case_type": "Disciplinary",
+            "title": f"Benchmark case {i}",
+            "allegation_or_grievance": "Synthetic benchmark allegation",
+            "date_raised": _random_day(rng, 720),
+            "status": rng.choices(ER_STATUSES, weights=[1, 2, 1, 1, 1, 1, 10, 5])[0],
+            "next_action_date": _random_day(rng, 180, 60) if rng.random() < 0.7 else None,
+        }
+        for i in range(1, counts["er_cases"] + 1)
+    ])
+
+    supervisions = []
+    actions = []
+    for i in range(1, counts["supervisions"] + 1):
+        employee_id = rng.choice(employee_ids)
+        supervisions.append({
+            "id": i,
+            "employee_id": employee_id,
+            "meeting_date": _random_day(rng, 720, 30),
+            "status": rng.choice(["Completed", "Completed", "Scheduled"]),
+        })
+        for _ in range(counts["actions_per_supervision"]):
+            actions.append({
+                "supervision_id": i,
+                "employee_id": employee_id,
+                "description": "Synthetic action",
+                "due_date": _random_day(rng, 360, 90) if rng.random() < 0.9 else None,
+                "status": rng.choices(["Open", "Completed", "Carried Forward"], weights=[25, 70, 5])[0],
+            })
+    _insert(SupervisionRecord, supervisions)
+    _insert(SupervisionAction, actions)
+
+    db.session.commit()
+    return counts
+
+
+# ---- Dashboard queries ----
+
+def dashboard_queries(org_id, team_id, pip_id):
+    """Name -> SELECT mirroring the filters used by the dashboards."""
+    open_er = EmployeeRelationsCase.status.notin_(["Closed", "Archived"])
+    open_actions = SupervisionAction.status.in_(["Open", "Carried Forward"])
+    return {
+        "PIP overdue (home)": select(func.count(PIPRecord.id)).where(
+            PIPRecord.status == "Open", PIPRecord.review_date < TODAY
+        ),
+        "PIP due in 7 days": select(func.count(PIPRecord.id)).where(
+            PIPRecord.status == "Open",
+            PIPRecord.review_date.between(TODAY, TODAY + timedelta(days=7)),
+        ),
+        "Open PIPs for a team": select(PIPRecord.id, PIPRecord.review_date)
+        .join(Employee, Employee.id == PIPRecord.employee_id)
+        .where(PIPRecord.status == "Open", Employee.organisation_id == org_id, Employee.team_id == team_id),
+        "Active employees in a team": select(Employee.id).where(
+            Employee.organisation_id == org_id,
+            Employee.team_id == team_id,
+            Employee.is_leaver.is_(False),
+        ),
+        "Open sickness cases, last 90 days": select(SicknessCase.id)
+        .where(SicknessCase.status == "Open", SicknessCase.start_date >= TODAY - timedelta(days=90))
+        .order_by(SicknessCase.start_date.desc())
+        .limit(50),
+        "Upcoming sickness meetings": select(SicknessMeeting.id)
+        .where(SicknessMeeting.meeting_date.between(TODAY, TODAY + timedelta(days=14)))
+        .order_by(SicknessMeeting.meeting_date.asc())
+        .limit(50),
+        "ER overdue next actions": select(EmployeeRelationsCase.id)
+        .where(
+            open_er,
+            EmployeeRelationsCase.next_action_date.isnot(None),
+            EmployeeRelationsCase.next_action_date < TODAY,
+        )
+        .order_by(EmployeeRelationsCase.next_action_date.asc()),
+        "Overdue supervision actions": select(SupervisionAction.id)
+        .where(open_actions, and_(SupervisionAction.due_date.isnot(None), SupervisionAction.due_date < TODAY))
+        .order_by(SupervisionAction.due_date.asc())
+        .limit(50),
+        "PIP timeline": select(TimelineEvent.id)
+        .where(TimelineEvent.pip_record_id == pip_id)
+        .order_by(TimelineEvent.timestamp.desc())
+        .limit(20),
+    }
+
+
+def _compile(stmt, dialect):
+    return str(stmt.compile(dialect=dialect, compile_kwargs={"literal_binds": True}))
+
+
+def explain(conn, sql):
+    if conn.dialect.name == "postgresql":
+        rows = conn.execute(text(f"EXPLAIN (ANALYZE, BUFFERS) {sql}")).fetchall()
+        return [row[0] for row in rows]
+    if conn.dialect.name == "sqlite":
+        rows = conn.execute(text(f"EXPLAIN QUERY PLAN {sql}")).fetchall()
+        return [row[-1] for row in rows]
+    return ["(no EXPLAIN support for this dialect)"]
+
+
+def time_query(conn, sql, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        conn.execute(text(sql)).fetchall()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+def measure(engine, queries, repeat):
+    results = {}
+    with engine.connect() as conn:
+        conn.execute(text("ANALYZE"))
+        for name, stmt in queries.items():
+            sql = _compile(stmt, engine.dialect)
+            time_query(conn, sql, 1)  # warm the cache
+            results[name] = {"plan": explain(conn, sql), "ms": time_query(conn, sql, repeat)}
+        conn.commit()
+    return results
+
+
+# ---- Driver ----
+
+def _alembic_config(url):
+    config = Config(os.path.join(MIGRATIONS_DIR, "alembic.ini"))
+    config.set_main_option("script_location", MIGRATIONS_DIR)
+    # migrations/env.py reads the URL from here, not from the Flask config.
+    config.set_main_option("sqlalchemy.url", url.replace("%", "%%"))
+    return config
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--database-url", help="Scratch database URL (default: a temporary SQLite file)")
+    parser.add_argument("--drop-existing", action="store_true", help="Required with --database-url; drops all tables")
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiplier for the synthetic row counts")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per query (median reported)")
+    parser.add_argument("--seed", type=int, default=20260101)
+    args = parser.parse_args()
+
+    tmp_path = None
+    if args.database_url:
+        if not args.drop_existing:
+            parser.error("--database-url drops every table; pass --drop-existing to confirm")
+        url = args.database_url.replace("postgres://", "postgresql://", 1)
+    else:
+        fd, tmp_path = tempfile.mkstemp(prefix="pip_bench_", suffix=".db")
+        os.close(fd)
+        url = "sqlite:///" + tmp_path
+
+    bench_app = Flask(__name__)
+    bench_app.config["SQLALCHEMY_DATABASE_URI"] = url
+    db.init_app(bench_app)
+
+    try:
+        with bench_app.app_context():
+            engine = db.engine
+            print(f"Database: {engine.url.render_as_string(hide_password=True)}")
+
+            db.drop_all()
+            db.create_all()
+            alembic_config = _alembic_config(url)
+            command.stamp(alembic_config, "head")
+
+            started = time.perf_counter()
+            counts = seed(args.scale, random.Random(args.seed))
+            print(f"Seeded in {time.perf_counter() - started:.1f}s: {counts}")
+
+            org_id, team_id = db.session.execute(
+                select(Employee.organisation_id, Employee.team_id)
+                .group_by(Employee.organisation_id, Employee.team_id)
+                .order_by(func.count().desc())
+                .limit(1)
+            ).one()
+            pip_id = db.session.execute(select(func.max(TimelineEvent.pip_record_id))).scalar()
+            db.session.remove()
+            queries = dashboard_queries(org_id, team_id, pip_id)
+
+            command.downgrade(alembic_config, PRE_INDEX_REVISION)
+            before = measure(engine, queries, args.repeat)
+
+            command.upgrade(alembic_config, INDEX_REVISION)
+            after = measure(engine, queries, args.repeat)
+
+        for name in queries:
+            print(f"\n=== {name}")
+            print(f"--- before ({before[name]['ms']:.2f} ms)")
+            print("\n".join(f"    {line}" for line in before[name]["plan"]))
+            print(f"--- after ({after[name]['ms']:.2f} ms)")
+            print("\n".join(f"    {line}" for line in after[name]["plan"]))
+
+        print(f"\n{'Query':<36} {'Before ms':>10} {'After ms':>10} {'Speedup':>8}")
+        for name in queries:
+            b, a = before[name]["ms"], after[name]["ms"]
+            print(f"{name:<36} {b:>10.2f} {a:>10.2f} {b / a if a else float('inf'):>7.1f}x")
+    finally:
+        if tmp_path:
+            os.remove(tmp_path)
+
+
+if __name__ == "__main__":
+    main()
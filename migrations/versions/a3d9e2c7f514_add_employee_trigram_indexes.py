@@ -0,0 +1,42 @@
+"""add employee trigram indexes for typeahead
+
+Revision ID: a3d9e2c7f514
+Revises: f5c1a8e7b392
+Create Date: 2026-10-18
+"""
+
+from alembic import op
+
+
+revision = "a3d9e2c7f514"
+down_revision = "f5c1a8e7b392"
+branch_labels = None
+depends_on = None
+
+
+# Expressions must match pip_app.services.employee_typeahead so the planner
+# can use these indexes for the typeahead's LIKE '%term%' filters.
+TRIGRAM_INDEXES = {
+    "ix_employee_name_trgm": "lower(coalesce(first_name, '') || ' ' || coalesce(last_name, ''))",
+    "ix_employee_email_trgm": "lower(email)",
+    "ix_employee_job_title_trgm": "lower(job_title)",
+}
+
+
+def upgrade():
+    # pg_trgm is PostgreSQL-only; SQLite dev databases are small enough to
+    # scan.
+    if op.get_bind().dialect.name != "postgresql":
+        return
+
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    for name, expression in TRIGRAM_INDEXES.items():
+        op.execute(f"CREATE INDEX IF NOT EXISTS {name} ON employee USING gin (({expression}) gin_trgm_ops)")
+
+
+def downgrade():
+    if op.get_bind().dialect.name != "postgresql":
+        return
+
+    for name in TRIGRAM_INDEXES:
+        op.execute(f"DROP INDEX IF EXISTS {name}")
@@ -0,0 +1,55 @@
+"""add composite indexes for dashboard filters
+
+Revision ID: b6e4d2a9c817
+Revises: a3d9e2c7f514
+Create Date: 2026-10-18
+"""
+
+from alembic import op
+
+
+revision = "b6e4d2a9c817"
+down_revision = "a3d9e2c7f514"
+branch_labels = None
+depends_on = None
+
+
+# Equality column first, then the range/sort column, so each dashboard
+# predicate is answered from one index range scan.
+DASHBOARD_INDEXES = (
+    ("ix_pip_record_status_review_date", "pip_record", ["status", "review_date"]),
+    ("ix_pip_record_employee_id", "pip_record", ["employee_id"]),
+    ("ix_sickness_cases_status_start_date", "sickness_cases", ["status", "start_date"]),
+    ("ix_sickness_meetings_meeting_date", "sickness_meetings", ["meeting_date"]),
+    (
+        "ix_employee_relations_cases_status_next_action",
+        "employee_relations_cases",
+        ["status", "next_action_date"],
+    ),
+    ("ix_supervision_actions_status_due_date", "supervision_actions", ["status", "due_date"]),
+    ("ix_employee_org_team_leaver", "employee", ["organisation_id", "team_id", "is_leaver"]),
+    ("ix_timeline_event_pip_timestamp", "timeline_event", ["pip_record_id", "timestamp"]),
+)
+
+# Single-column indexes that are now a leading prefix of a composite above.
+SUPERSEDED_INDEXES = (
+    ("ix_employee_relations_cases_status", "employee_relations_cases", ["status"]),
+    ("ix_supervision_actions_status", "supervision_actions", ["status"]),
+    ("ix_employee_organisation_id", "employee", ["organisation_id"]),
+)
+
+
+def upgrade():
+    for name, table, columns in DASHBOARD_INDEXES:
+        op.create_index(name, table, columns, unique=False)
+
+    for name, table, _columns in SUPERSEDED_INDEXES:
+        op.drop_index(name, table_name=table)
+
+
+def downgrade():
+    for name, table, columns in SUPERSEDED_INDEXES:
+        op.create_index(name, table, columns, unique=False)
+
+    for name, table, _columns in reversed(DASHBOARD_INDEXES):
+        op.drop_index(name, table_name=table)
@@ -0,0 +1,29 @@
+"""add supervision employee/meeting_date composite index
+
+Revision ID: c41e7a2d9b10
+Revises: b8f3c2a1d9e7
+Create Date: 2026-10-18
+"""
+
+from alembic import op
+
+
+revision = "c41e7a2d9b10"
+down_revision = "b8f3c2a1d9e7"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index(
+        "ix_supervision_records_employee_meeting_date",
+        "supervision_records",
+        ["employee_id", "meeting_date"],
+    )
+
+
+def downgrade():
+    op.drop_index(
+        "ix_supervision_records_employee_meeting_date",
+        table_name="supervision_records",
+    )
@@ -0,0 +1,47 @@
+"""add ai_jobs
+
+Revision ID: c8f1e4b7a236
+Revises: b6e4d2a9c817
+Create Date: 2026-10-18
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "c8f1e4b7a236"
+down_revision = "b6e4d2a9c817"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "ai_jobs",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("kind", sa.String(length=50), nullable=False),
+        sa.Column("record_id", sa.Integer(), nullable=True),
+        sa.Column("user_id", sa.Integer(), nullable=True),
+        sa.Column("organisation_id", sa.Integer(), nullable=True),
+        sa.Column("created_by", sa.String(length=120), nullable=True),
+        sa.Column("status", sa.String(length=20), nullable=False),
+        sa.Column("request_json", sa.Text(), nullable=False),
+        sa.Column("result_json", sa.Text(), nullable=True),
+        sa.Column("error", sa.Text(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("started_at", sa.DateTime(), nullable=True),
+        sa.Column("completed_at", sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(["user_id"], ["user.id"]),
+        sa.ForeignKeyConstraint(["organisation_id"], ["organisations.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_ai_jobs_status", "ai_jobs", ["status"])
+    op.create_index("ix_ai_jobs_user_id", "ai_jobs", ["user_id"])
+    op.create_index("ix_ai_jobs_kind_record_status", "ai_jobs", ["kind", "record_id", "status"])
+
+
+def downgrade():
+    op.drop_index("ix_ai_jobs_kind_record_status", table_name="ai_jobs")
+    op.drop_index("ix_ai_jobs_user_id", table_name="ai_jobs")
+    op.drop_index("ix_ai_jobs_status", table_name="ai_jobs")
+    op.drop_table("ai_jobs")
@@ -0,0 +1,37 @@
+"""add llm_response_cache
+
+Revision ID: d2a7c5e9f148
+Revises: c8f1e4b7a236
+Create Date: 2026-10-18
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "d2a7c5e9f148"
+down_revision = "c8f1e4b7a236"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "llm_response_cache",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("model", sa.String(length=100), nullable=False),
+        sa.Column("temperature", sa.Float(), nullable=False),
+        sa.Column("prompt_hash", sa.String(length=64), nullable=False),
+        sa.Column("response_text", sa.Text(), nullable=False),
+        sa.Column("hit_count", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("last_used_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("model", "temperature", "prompt_hash", name="uq_llm_response_cache_key"),
+    )
+    op.create_index("ix_llm_response_cache_last_used_at", "llm_response_cache", ["last_used_at"])
+
+
+def downgrade():
+    op.drop_index("ix_llm_response_cache_last_used_at", table_name="llm_response_cache")
+    op.drop_table("llm_response_cache")
@@ -0,0 +1,41 @@
+"""add export_jobs
+
+Revision ID: d7a3f9e15c42
+Revises: c41e7a2d9b10
+Create Date: 2026-10-18
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "d7a3f9e15c42"
+down_revision = "c41e7a2d9b10"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "export_jobs",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("created_by", sa.String(length=120), nullable=False),
+        sa.Column("status", sa.String(length=20), nullable=False),
+        sa.Column("tables_total", sa.Integer(), nullable=False),
+        sa.Column("tables_done", sa.Integer(), nullable=False),
+        sa.Column("rows_exported", sa.Integer(), nullable=False),
+        sa.Column("progress_json", sa.Text(), nullable=True),
+        sa.Column("file_path", sa.String(length=255), nullable=True),
+        sa.Column("file_size", sa.BigInteger(), nullable=True),
+        sa.Column("error", sa.Text(), nullable=True),
+        sa.Column("started_at", sa.DateTime(), nullable=True),
+        sa.Column("completed_at", sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_export_jobs_status", "export_jobs", ["status"])
+
+
+def downgrade():
+    op.drop_index("ix_export_jobs_status", table_name="export_jobs")
+    op.drop_table("export_jobs")
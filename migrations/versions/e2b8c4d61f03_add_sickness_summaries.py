@@ -0,0 +1,125 @@
+"""add sickness_summaries
+
+Revision ID: e2b8c4d61f03
+Revises: d7a3f9e15c42
+Create Date: 2026-10-18
+"""
+
+from datetime import date, datetime, timedelta
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "e2b8c4d61f03"
+down_revision = "d7a3f9e15c42"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "sickness_summaries",
+        sa.Column("employee_id", sa.Integer(), nullable=False),
+        sa.Column("window_end", sa.Date(), nullable=False),
+        sa.Column("episodes", sa.Integer(), nullable=False),
+        sa.Column("total_days", sa.Integer(), nullable=False),
+        sa.Column("bradford", sa.Integer(), nullable=False),
+        sa.Column("bradford_band", sa.String(length=16), nullable=False),
+        sa.Column("longest_spell_days", sa.Integer(), nullable=False),
+        sa.Column("has_long_term", sa.Boolean(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(["employee_id"], ["employee.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("employee_id"),
+    )
+    op.create_index("ix_sickness_summaries_window_end", "sickness_summaries", ["window_end"])
+    op.create_index("ix_sickness_summaries_bradford", "sickness_summaries", ["bradford"])
+    op.create_index("ix_sickness_summaries_bradford_band", "sickness_summaries", ["bradford_band"])
+
+    _backfill_sickness_summaries()
+
+
+# Mirrors pip_app/services/sickness_summaries.py at the time of this
+# revision, so the summaries are current straight after upgrading.
+# "flask roll-sickness-summaries" rebuilds them from the current code.
+WINDOW_DAYS = 365
+LONG_TERM_DAYS = 28
+BRADFORD_MEDIUM = 200
+BRADFORD_HIGH = 400
+BACKFILL_BATCH = 1000
+
+
+def _bradford_band(bradford):
+    if bradford >= BRADFORD_HIGH:
+        return "high"
+    if bradford >= BRADFORD_MEDIUM:
+        return "medium"
+    return "low"
+
+
+def _backfill_sickness_summaries():
+    bind = op.get_bind()
+    cases = sa.table(
+        "sickness_cases",
+        sa.column("employee_id", sa.Integer),
+        sa.column("start_date", sa.Date),
+        sa.column("end_date", sa.Date),
+    )
+    summaries = sa.table(
+        "sickness_summaries",
+        sa.column("employee_id", sa.Integer),
+        sa.column("window_end", sa.Date),
+        sa.column("episodes", sa.Integer),
+        sa.column("total_days", sa.Integer),
+        sa.column("bradford", sa.Integer),
+        sa.column("bradford_band", sa.String),
+        sa.column("longest_spell_days", sa.Integer),
+        sa.column("has_long_term", sa.Boolean),
+        sa.column("updated_at", sa.DateTime),
+    )
+
+    window_end = date.today()
+    window_start = window_end - timedelta(days=WINDOW_DAYS)
+    rows = bind.execute(
+        sa.select(cases.c.employee_id, cases.c.start_date, cases.c.end_date).where(
+            cases.c.start_date.isnot(None),
+            cases.c.start_date <= window_end,
+        )
+    )
+
+    # employee_id -> list of clamped spell lengths inside the window
+    spells = {}
+    for employee_id, start_date, end_date in rows:
+        clamped_end = min(end_date or window_end, window_end)
+        days = (clamped_end - max(start_date, window_start)).days + 1
+        if days > 0:
+            spells.setdefault(employee_id, []).append(days)
+
+    now = datetime.utcnow()
+    values = []
+    for employee_id in sorted(spells):
+        days = spells[employee_id]
+        episodes = len(days)
+        total_days = sum(days)
+        bradford = episodes * episodes * total_days
+        values.append({
+            "employee_id": employee_id,
+            "window_end": window_end,
+            "episodes": episodes,
+            "total_days": total_days,
+            "bradford": bradford,
+            "bradford_band": _bradford_band(bradford),
+            "longest_spell_days": max(days),
+            "has_long_term": max(days) >= LONG_TERM_DAYS,
+            "updated_at": now,
+        })
+
+    for i in range(0, len(values), BACKFILL_BATCH):
+        op.bulk_insert(summaries, values[i:i + BACKFILL_BATCH])
+
+
+def downgrade():
+    op.drop_index("ix_sickness_summaries_bradford_band", table_name="sickness_summaries")
+    op.drop_index("ix_sickness_summaries_bradford", table_name="sickness_summaries")
+    op.drop_index("ix_sickness_summaries_window_end", table_name="sickness_summaries")
+    op.drop_table("sickness_summaries")
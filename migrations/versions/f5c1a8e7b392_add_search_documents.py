@@ -0,0 +1,196 @@
+"""add search_documents full-text index
+
+Revision ID: f5c1a8e7b392
+Revises: e2b8c4d61f03
+Create Date: 2026-10-18
+"""
+
+from datetime import datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "f5c1a8e7b392"
+down_revision = "e2b8c4d61f03"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "search_documents",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("record_type", sa.String(length=30), nullable=False),
+        sa.Column("record_id", sa.Integer(), nullable=False),
+        sa.Column("employee_id", sa.Integer(), nullable=False),
+        sa.Column("title", sa.String(length=255), nullable=False),
+        sa.Column("body", sa.Text(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(["employee_id"], ["employee.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("record_type", "record_id", name="uq_search_documents_record"),
+    )
+    op.create_index("ix_search_documents_employee_id", "search_documents", ["employee_id"])
+
+    dialect = op.get_bind().dialect.name
+
+    if dialect == "postgresql":
+        op.execute(
+            """
+            ALTER TABLE search_documents ADD COLUMN search_vector tsvector
+            GENERATED ALWAYS AS (
+                setweight(to_tsvector('english', coalesce(title, '')), 'A')
+                || setweight(to_tsvector('english', coalesce(body, '')), 'B')
+            ) STORED
+            """
+        )
+        op.execute(
+            "CREATE INDEX ix_search_documents_search_vector "
+            "ON search_documents USING gin (search_vector)"
+        )
+
+    elif dialect == "sqlite":
+        op.execute(
+            """
+            CREATE VIRTUAL TABLE search_documents_fts USING fts5(
+                title, body,
+                content='search_documents', content_rowid='id',
+                tokenize='porter unicode61'
+            )
+            """
+        )
+        op.execute(
+            """
+            CREATE TRIGGER search_documents_ai AFTER INSERT ON search_documents BEGIN
+                INSERT INTO search_documents_fts(rowid, title, body)
+                VALUES (new.id, new.title, new.body);
+            END
+            """
+        )
+        op.execute(
+            """
+            CREATE TRIGGER search_documents_ad AFTER DELETE ON search_documents BEGIN
+                INSERT INTO search_documents_fts(search_documents_fts, rowid, title, body)
+                VALUES ('delete', old.id, old.title, old.body);
+            END
+            """
+        )
+        op.execute(
+            """
+            CREATE TRIGGER search_documents_au AFTER UPDATE ON search_documents BEGIN
+                INSERT INTO search_documents_fts(search_documents_fts, rowid, title, body)
+                VALUES ('delete', old.id, old.title, old.body);
+                INSERT INTO search_documents_fts(rowid, title, body)
+                VALUES (new.id, new.title, new.body);
+            END
+            """
+        )
+
+    _backfill_search_documents()
+
+
+# Mirrors the document builders in pip_app/services/search_index.py at the
+# time of this revision, so search works straight after upgrading.
+# "flask rebuild-search-index" rebuilds from the current code at any time.
+BODY_MAX_CHARS = 50_000
+BACKFILL_BATCH = 500
+
+BACKFILL_SOURCES = (
+    (
+        "pip",
+        "pip_record",
+        ("concern_category", "concerns", "meeting_notes", "tags", "outcome_notes"),
+        lambda r, who: f"{who} — {r['concern_category'] or 'Performance Improvement Plan'}",
+        ("concerns", "meeting_notes", "tags", "outcome_notes"),
+    ),
+    (
+        "employee_relations",
+        "employee_relations_cases",
+        ("title", "case_type", "allegation_or_grievance", "summary", "investigation_findings", "outcome_status"),
+        lambda r, who: f"{r['title']} — {who}",
+        ("case_type", "allegation_or_grievance", "summary", "investigation_findings", "outcome_status"),
+    ),
+    (
+        "sickness",
+        "sickness_cases",
+        ("reason", "notes"),
+        lambda r, who: f"{who} — {r['reason'] or 'Sickness absence'}",
+        ("reason", "notes"),
+    ),
+    (
+        "supervision",
+        "supervision_records",
+        (
+            "meeting_title", "meeting_type", "overall_summary", "concerns_summary",
+            "wellbeing_summary", "performance_summary", "conduct_summary", "agreed_support",
+        ),
+        lambda r, who: f"{r['meeting_title'] or r['meeting_type'] or 'Supervision'} — {who}",
+        (
+            "overall_summary", "concerns_summary", "wellbeing_summary",
+            "performance_summary", "conduct_summary", "agreed_support",
+        ),
+    ),
+)
+
+
+def _join_text(*parts):
+    value = "\n".join(str(p).strip() for p in parts if p and str(p).strip())
+    return value[:BODY_MAX_CHARS]
+
+
+def _employee_label(row):
+    name = f"{row['first_name'] or ''} {row['last_name'] or ''}".strip()
+    return f"{name} ({row['job_title']})" if row["job_title"] else name
+
+
+def _backfill_search_documents():
+    bind = op.get_bind()
+    documents = sa.table(
+        "search_documents",
+        sa.column("record_type", sa.String),
+        sa.column("record_id", sa.Integer),
+        sa.column("employee_id", sa.Integer),
+        sa.column("title", sa.String),
+        sa.column("body", sa.Text),
+        sa.column("updated_at", sa.DateTime),
+    )
+    now = datetime.utcnow()
+
+    for record_type, table_name, columns, build_title, body_columns in BACKFILL_SOURCES:
+        select_columns = ", ".join(f"r.{column}" for column in columns)
+        rows = bind.execute(sa.text(
+            f"SELECT r.id, r.employee_id, e.first_name, e.last_name, e.job_title, {select_columns} "
+            f"FROM {table_name} r JOIN employee e ON e.id = r.employee_id ORDER BY r.id"
+        )).mappings()
+
+        batch = []
+        for row in rows:
+            batch.append({
+                "record_type": record_type,
+                "record_id": row["id"],
+                "employee_id": row["employee_id"],
+                "title": build_title(row, _employee_label(row))[:255],
+                "body": _join_text(*(row[column] for column in body_columns)),
+                "updated_at": now,
+            })
+            if len(batch) >= BACKFILL_BATCH:
+                op.bulk_insert(documents, batch)
+                batch = []
+        if batch:
+            op.bulk_insert(documents, batch)
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+
+    if dialect == "postgresql":
+        op.execute("DROP INDEX IF EXISTS ix_search_documents_search_vector")
+    elif dialect == "sqlite":
+        op.execute("DROP TRIGGER IF EXISTS search_documents_au")
+        op.execute("DROP TRIGGER IF EXISTS search_documents_ad")
+        op.execute("DROP TRIGGER IF EXISTS search_documents_ai")
+        op.execute("DROP TABLE IF EXISTS search_documents_fts")
+
+    op.drop_index("ix_search_documents_employee_id", table_name="search_documents")
+    op.drop_table("search_documents")
@@ -11,9 +11,13 @@ from pip_app.models import (
     DraftPIP,
     DraftProbation,
     ImportJob,
+    ExportJob,
+    AIJob,
+    LLMResponseCacheEntry,
     DocumentFile,
     SicknessCase,
     SicknessMeeting,
+    SicknessSummary,
     EmployeeRelationsCase,
     EmployeeRelationsTimelineEvent,
     EmployeeRelationsMeeting,
@@ -32,6 +36,7 @@ from pip_app.models import (
     SupervisionTemplate,
     SupervisionTemplateQuestion,
     SupervisionTimelineEvent,
+    SearchDocument,
 )
 
 __all__ = [
@@ -47,9 +52,13 @@ __all__ = [
     "DraftPIP",
     "DraftProbation",
     "ImportJob",
+    "ExportJob",
+    "AIJob",
+    "LLMResponseCacheEntry",
     "DocumentFile",
     "SicknessCase",
     "SicknessMeeting",
+    "SicknessSummary",
     "EmployeeRelationsCase",
     "EmployeeRelationsTimelineEvent",
     "EmployeeRelationsMeeting",
@@ -68,4 +77,5 @@ __all__ = [
     "SupervisionTemplate",
     "SupervisionTemplateQuestion",
     "SupervisionTimelineEvent",
+    "SearchDocument",
 ]
\ No newline at end of file
@@ -1,13 +1,19 @@
 from __future__ import annotations
 
-import csv
 import os
-import tempfile
-import zipfile
 from datetime import datetime
-from io import BytesIO
 
-from flask import Blueprint, flash, redirect, render_template, request, send_file, url_for
+from flask import (
+    Blueprint,
+    current_app,
+    flash,
+    jsonify,
+    redirect,
+    render_template,
+    request,
+    send_file,
+    url_for,
+)
 from flask_login import current_user, login_required
 from werkzeug.security import generate_password_hash
 
@@ -15,25 +21,46 @@ from forms import OrganisationForm, UserForm
 from models import (
     db,
     AdvisorEscalation,
-    Employee,
     EmployeeRelationsCase,
     EmployeeRelationsTimelineEvent,
+    ExportJob,
     Organisation,
     OrganisationModuleSetting,
     PIPRecord,
-    ProbationPlan,
-    ProbationRecord,
-    ProbationReview,
-    TimelineEvent,
     User,
 )
 from pip_app.decorators import superuser_required
 from pip_app.security import log_security_event
+from pip_app.services.advisor_queue_counts import escalation_queue_state, record_escalation_change
+from pip_app.services.export_jobs import (
+    EXPORT_RETENTION_HOURS,
+    export_job_file_available,
+    export_job_status,
+    get_active_export_job,
+    mark_export_job_if_interrupted,
+    start_export_job,
+)
+from pip_app.services.ai_client import ai_client_metrics
+from pip_app.services.llm_cache import llm_cache_stats
+from pip_app.services.prompt_budget import prompt_budget_stats
+from pip_app.services.request_profiling import (
+    endpoint_performance_summary,
+    performance_buffer_size,
+    recent_slow_queries,
+)
+from pip_app.services.sickness_simulator import (
+    MAX_SIMULATION_CONFIGS,
+    normalise_threshold_config,
+    simulate_trigger_thresholds,
+)
 from pip_app.services.module_settings import (
     DEFAULT_MODULE_LABELS,
     DEFAULT_MODULE_SETTINGS,
+    bootstrap_organisation_defaults,
     get_module_settings_for_org,
+    invalidate_module_controls_cache,
 )
+from pip_app.services.time_utils import today_local
 from pip_app.services.timeline_utils import log_timeline_event
 
 admin_bp = Blueprint("admin", __name__)
@@ -349,6 +376,7 @@ def manage_organisations():
         org = Organisation(name=name)
         db.session.add(org)
         db.session.commit()
+        bootstrap_organisation_defaults(org)
 
         flash("Organisation created successfully.", "success")
         return redirect(url_for("admin.manage_organisations"))
@@ -449,6 +477,7 @@ def admin_module_settings():
                 setting.escalation_enabled = should_enable_escalation
 
         db.session.commit()
+        invalidate_module_controls_cache(org.id)
         flash("Module settings updated successfully.", "success")
         return redirect(url_for("admin.admin_module_settings", organisation_id=org.id))
 
@@ -630,10 +659,13 @@ def assign_advisor_escalation(escalation_id):
         flash("Escalation assignment is unchanged.", "info")
         return redirect(url_for("admin.advisor_escalation_detail", escalation_id=escalation.id))
 
+    before_state = escalation_queue_state(escalation)
     escalation.assigned_to_user_id = new_user_id
+    after_state = escalation_queue_state(escalation)
     _log_escalation_assignment_change(escalation, old_user, new_user)
 
     db.session.commit()
+    record_escalation_change(before_state, after_state)
     flash("Escalation assignment updated successfully.", "success")
     return redirect(url_for("admin.advisor_escalation_detail", escalation_id=escalation.id))
 
@@ -668,13 +700,16 @@ def update_advisor_escalation(escalation_id):
         flash("That escalation status change is not allowed from the current state.", "danger")
         return redirect(url_for("admin.advisor_escalation_detail", escalation_id=escalation.id))
 
+    before_state = escalation_queue_state(escalation)
     _apply_escalation_status_change(
         escalation,
         new_status=new_status,
         advisor_notes=advisor_notes,
     )
+    after_state = escalation_queue_state(escalation)
 
     db.session.commit()
+    record_escalation_change(before_state, after_state)
     flash("Escalation updated successfully.", "success")
     return redirect(url_for("admin.advisor_escalation_detail", escalation_id=escalation.id))
 
@@ -683,181 +718,145 @@ def update_advisor_escalation(escalation_id):
 @login_required
 @superuser_required
 def export_data():
-    zip_buffer = BytesIO()
-
-    with tempfile.TemporaryDirectory() as tmpdir:
-        def write_csv(filename, fieldnames, rows, export_zip_obj):
-            filepath = os.path.join(tmpdir, filename)
-            with open(filepath, "w", newline="", encoding="utf-8") as file_obj:
-                writer = csv.DictWriter(file_obj, fieldnames=fieldnames)
-                writer.writeheader()
-                writer.writerows(rows)
-            export_zip_obj.write(filepath, arcname=filename)
-
-        with zipfile.ZipFile(zip_buffer, "w", zipfile.ZIP_DEFLATED) as export_zip:
-            employees = Employee.query.all()
-            write_csv(
-                "employees.csv",
-                [
-                    "id",
-                    "first_name",
-                    "last_name",
-                    "job_title",
-                    "line_manager",
-                    "service",
-                    "start_date",
-                    "team_id",
-                    "email",
-                ],
-                [
-                    {
-                        "id": employee.id,
-                        "first_name": getattr(employee, "first_name", ""),
-                        "last_name": getattr(employee, "last_name", ""),
-                        "job_title": employee.job_title,
-                        "line_manager": employee.line_manager,
-                        "service": employee.service,
-                        "start_date": employee.start_date.strftime("%Y-%m-%d") if employee.start_date else "",
-                        "team_id": employee.team_id,
-                        "email": employee.email,
-                    }
-                    for employee in employees
-                ],
-                export_zip,
-            )
+    active_job = get_active_export_job()
+    if active_job is not None:
+        mark_export_job_if_interrupted(active_job)
 
-            pips = PIPRecord.query.all()
-            write_csv(
-                "pip_records.csv",
-                [
-                    "id",
-                    "employee_id",
-                    "concerns",
-                    "concern_category",
-                    "severity",
-                    "frequency",
-                    "tags",
-                    "start_date",
-                    "review_date",
-                    "status",
-                    "created_by",
-                ],
-                [
-                    {
-                        "id": pip_record.id,
-                        "employee_id": pip_record.employee_id,
-                        "concerns": pip_record.concerns,
-                        "concern_category": getattr(pip_record, "concern_category", ""),
-                        "severity": getattr(pip_record, "severity", ""),
-                        "frequency": getattr(pip_record, "frequency", ""),
-                        "tags": getattr(pip_record, "tags", ""),
-                        "start_date": pip_record.start_date.strftime("%Y-%m-%d") if pip_record.start_date else "",
-                        "review_date": pip_record.review_date.strftime("%Y-%m-%d") if pip_record.review_date else "",
-                        "status": pip_record.status,
-                        "created_by": getattr(pip_record, "created_by", ""),
-                    }
-                    for pip_record in pips
-                ],
-                export_zip,
-            )
+    jobs = ExportJob.query.order_by(ExportJob.id.desc()).limit(10).all()
+    return render_template(
+        "admin_export.html",
+        jobs=jobs,
+        job_statuses={job.id: export_job_status(job) for job in jobs},
+        downloadable={job.id for job in jobs if export_job_file_available(job)},
+        retention_hours=EXPORT_RETENTION_HOURS,
+    )
 
-            events = TimelineEvent.query.all()
-            write_csv(
-                "timeline_events.csv",
-                ["id", "pip_record_id", "employee_id", "event_type", "notes", "updated_by", "timestamp"],
-                [
-                    {
-                        "id": event.id,
-                        "pip_record_id": event.pip_record_id if event.pip_record_id else "",
-                        "employee_id": event.pip_record.employee_id if event.pip_record else "",
-                        "event_type": getattr(event, "event_type", ""),
-                        "notes": getattr(event, "notes", ""),
-                        "updated_by": getattr(event, "updated_by", ""),
-                        "timestamp": event.timestamp.strftime("%Y-%m-%d %H:%M:%S") if event.timestamp else "",
-                    }
-                    for event in events
-                ],
-                export_zip,
-            )
 
-            users = User.query.all()
-            write_csv(
-                "users.csv",
-                ["id", "username", "email", "admin_level", "team_id", "organisation_id"],
-                [
-                    {
-                        "id": user.id,
-                        "username": user.username,
-                        "email": user.email,
-                        "admin_level": user.admin_level,
-                        "team_id": user.team_id,
-                        "organisation_id": user.organisation_id,
-                    }
-                    for user in users
-                ],
-                export_zip,
-            )
+@admin_bp.route("/admin/export/jobs", methods=["POST"])
+@login_required
+@superuser_required
+def start_export():
+    job = start_export_job(current_user.username)
 
-            probations = ProbationRecord.query.all()
-            write_csv(
-                "probation_records.csv",
-                ["id", "employee_id", "status", "start_date", "expected_end_date", "notes"],
-                [
-                    {
-                        "id": probation.id,
-                        "employee_id": probation.employee_id,
-                        "status": probation.status,
-                        "start_date": probation.start_date.strftime("%Y-%m-%d") if probation.start_date else "",
-                        "expected_end_date": probation.expected_end_date.strftime("%Y-%m-%d") if probation.expected_end_date else "",
-                        "notes": probation.notes,
-                    }
-                    for probation in probations
-                ],
-                export_zip,
-            )
+    if request.accept_mimetypes.best == "application/json":
+        return jsonify(export_job_status(job)), 202
 
-            reviews = ProbationReview.query.all()
-            write_csv(
-                "probation_reviews.csv",
-                ["id", "probation_id", "review_date", "reviewer", "summary", "concerns_flag"],
-                [
-                    {
-                        "id": review.id,
-                        "probation_id": review.probation_id,
-                        "review_date": review.review_date.strftime("%Y-%m-%d") if review.review_date else "",
-                        "reviewer": review.reviewer,
-                        "summary": review.summary,
-                        "concerns_flag": review.concerns_flag,
-                    }
-                    for review in reviews
-                ],
-                export_zip,
-            )
+    flash(f"Export #{job.id} is being prepared. You can leave this page and come back.", "info")
+    return redirect(url_for("admin.export_data"))
 
-            plans = ProbationPlan.query.all()
-            write_csv(
-                "probation_plans.csv",
-                ["id", "probation_id", "objectives", "outcome", "deadline"],
-                [
-                    {
-                        "id": plan.id,
-                        "probation_id": plan.probation_id,
-                        "objectives": getattr(plan, "objectives", ""),
-                        "outcome": getattr(plan, "outcome", ""),
-                        "deadline": plan.deadline.strftime("%Y-%m-%d") if getattr(plan, "deadline", None) else "",
-                    }
-                    for plan in plans
-                ],
-                export_zip,
-            )
 
-    zip_buffer.seek(0)
-    timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M")
+@admin_bp.route("/admin/export/jobs/<int:job_id>")
+@login_required
+@superuser_required
+def export_job_progress(job_id):
+    job = ExportJob.query.get_or_404(job_id)
+    mark_export_job_if_interrupted(job)
+
+    status = export_job_status(job)
+    status["download_url"] = (
+        url_for("admin.download_export", job_id=job.id)
+        if export_job_file_available(job)
+        else None
+    )
+    return jsonify(status)
+
+
+@admin_bp.route("/admin/export/jobs/<int:job_id>/download")
+@login_required
+@superuser_required
+def download_export(job_id):
+    job = ExportJob.query.get_or_404(job_id)
+    if not export_job_file_available(job):
+        flash("That export is not available for download.", "warning")
+        return redirect(url_for("admin.export_data"))
+
+    # conditional=True lets Werkzeug answer Range/If-Range requests with
+    # 206 partial content, so interrupted downloads can resume.
     return send_file(
-        zip_buffer,
+        job.file_path,
         mimetype="application/zip",
         as_attachment=True,
-        download_name=f"export_{timestamp}.zip",
+        download_name=os.path.basename(job.file_path),
+        conditional=True,
+        max_age=0,
+    )
+
+
+@admin_bp.route("/admin/sickness/threshold-simulator", methods=["GET", "POST"])
+@login_required
+@superuser_required
+def sickness_threshold_simulator():
+    """Count employees per trigger band for candidate threshold sets.
+
+    GET evaluates one configuration from the query string. POST takes JSON
+    ``{"configs": [{...}, ...], "organisation_id": n}``; missing thresholds
+    fall back to the dashboard defaults.
+    """
+    if request.method == "POST":
+        payload = request.get_json(silent=True) or {}
+        raw_configs = payload.get("configs") or [{}]
+        organisation_id_raw = payload.get("organisation_id")
+    else:
+        raw_configs = [{key: value for key, value in request.args.items() if key != "organisation_id"}]
+        organisation_id_raw = request.args.get("organisation_id")
+
+    if not isinstance(raw_configs, list) or len(raw_configs) > MAX_SIMULATION_CONFIGS:
+        return jsonify({
+            "success": False,
+            "error": f"configs must be a list of at most {MAX_SIMULATION_CONFIGS} objects",
+        }), 400
+
+    try:
+        configs = [normalise_threshold_config(raw) for raw in raw_configs]
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+
+    organisation_id = getattr(current_user, "organisation_id", None)
+    if not organisation_id and organisation_id_raw:
+        try:
+            organisation_id = int(organisation_id_raw) or None
+        except (TypeError, ValueError):
+            return jsonify({"success": False, "error": "organisation_id must be a number"}), 400
+
+    result = simulate_trigger_thresholds(
+        configs,
+        organisation_id=organisation_id,
+        today=today_local(),
+    )
+    return jsonify({"success": True, "organisation_id": organisation_id, **result})
+
+
+@admin_bp.route("/admin/perf")
+@login_required
+@superuser_required
+def performance_overview():
+    """Per-endpoint latency percentiles from this worker's recent requests."""
+    endpoints = endpoint_performance_summary()
+    slow_queries = recent_slow_queries()
+    cache_stats = llm_cache_stats()
+    ai_metrics = ai_client_metrics()
+    prompt_stats = prompt_budget_stats()
+
+    if request.accept_mimetypes.best == "application/json":
+        return jsonify({
+            "success": True,
+            "sample_count": performance_buffer_size(),
+            "endpoints": endpoints,
+            "slow_queries": slow_queries,
+            "llm_cache": cache_stats,
+            "ai_calls": ai_metrics,
+            "prompts": prompt_stats,
+        })
+
+    return render_template(
+        "admin_perf.html",
+        endpoints=endpoints,
+        slow_queries=slow_queries,
+        cache_stats=cache_stats,
+        ai_metrics=ai_metrics,
+        prompt_stats=prompt_stats,
+        sample_count=performance_buffer_size(),
+        slow_query_ms=current_app.config["SLOW_QUERY_MS"],
     )
 
 
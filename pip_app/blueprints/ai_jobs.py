@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+import json
+import time
+
+from flask import Blueprint, Response, abort, jsonify, request, stream_with_context
+from flask_login import current_user, login_required
+
+from pip_app.extensions import db
+from models import AIJob
+from pip_app.services.ai_jobs import (
+    AI_STREAM_KEEPALIVE_SECONDS,
+    AI_STREAM_MAX_SECONDS,
+    acquire_ai_stream_slot,
+    ai_job_status,
+    ai_job_status_url,
+    ai_job_visible_to,
+    mark_ai_job_if_interrupted,
+    release_ai_stream_slot,
+    wait_for_ai_job_output,
+)
+
+ai_jobs_bp = Blueprint("ai_jobs", __name__)
+
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+
+def _get_visible_job_or_404(job_id):
+    job = db.session.get(AIJob, job_id)
+    if job is None or not ai_job_visible_to(job, current_user):
+        abort(404)
+    return job
+
+
+def _sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@ai_jobs_bp.route("/ai/jobs/<int:job_id>")
+@login_required
+def job_status(job_id):
+    job = _get_visible_job_or_404(job_id)
+    mark_ai_job_if_interrupted(job)
+    return jsonify(ai_job_status(job))
+
+
+@ai_jobs_bp.route("/ai/jobs/<int:job_id>/stream", methods=["GET"])
+@login_required
+def job_stream(job_id):
+    """Server-Sent Events: ``token`` events as the model writes, then ``done``.
+
+    ``done`` carries the same snapshot as the status endpoint, with the
+    validated and saved result. When every stream slot is taken the client
+    gets a 503 and should poll the status endpoint instead.
+    """
+    job = _get_visible_job_or_404(job_id)
+    status_url = ai_job_status_url(job)
+
+    # Werkzeug also routes HEAD here; it never reads the body, so it must
+    # not hold a stream slot.
+    if request.method != "GET":
+        return Response(mimetype="text/event-stream", headers=SSE_HEADERS)
+
+    if not acquire_ai_stream_slot():
+        return jsonify({
+            "success": False,
+            "error": "Too many live AI streams; poll the status URL instead.",
+            "status_url": status_url,
+        }), 503
+
+    # Release the connection before the potentially long wait.
+    db.session.remove()
+
+    def events():
+        try:
+            # Sends the headers now rather than with the first token.
+            yield ": stream open\n\n"
+            offset = 0
+            deadline = time.monotonic() + AI_STREAM_MAX_SECONDS
+            while time.monotonic() < deadline:
+                chunks, finished = wait_for_ai_job_output(job_id, offset, AI_STREAM_KEEPALIVE_SECONDS)
+                if chunks:
+                    offset += len(chunks)
+                    yield _sse("token", "".join(chunks))
+                elif finished:
+                    break
+                else:
+                    yield ": keep-alive\n\n"
+
+            finished_job = db.session.get(AIJob, job_id)
+            mark_ai_job_if_interrupted(finished_job)
+            yield _sse("done", ai_job_status(finished_job))
+        finally:
+            db.session.remove()
+
+    response = Response(
+        stream_with_context(events()),
+        mimetype="text/event-stream",
+        headers=SSE_HEADERS,
+    )
+    # The server closes the response whether or not the body was ever
+    # iterated (client gone, error before the first chunk), so the slot is
+    # released there rather than in the generator.
+    response.call_on_close(release_ai_stream_slot)
+    return response
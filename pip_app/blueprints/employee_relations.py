@@ -16,7 +16,7 @@ from flask import (
 )
 from flask_login import current_user, login_required
 from werkzeug.utils import secure_filename
-from sqlalchemy import or_
+from sqlalchemy import inspect, or_
 
 from pip_app.extensions import db
 from pip_app.models import (
@@ -31,8 +31,18 @@ from pip_app.models import (
     EmployeeRelationsPolicyText,
     EmployeeRelationsAIAdvice,
 )
+from pip_app.services.advisor_queue_counts import escalation_queue_state, record_escalation_change
+from pip_app.services.ai_jobs import (
+    ai_job_response,
+    force_regenerate_requested,
+    pending_ai_job,
+    register_ai_job_handler,
+    submit_ai_job,
+)
 from pip_app.services.ai_utils import (
-    generate_employee_relations_advice,
+    AI_ADVICE_EVENT_TYPE,
+    employee_relations_completion_args,
+    parse_employee_relations_advice,
     render_employee_relations_advice_for_timeline,
 )
 from pip_app.services.document_utils import (
@@ -53,7 +63,9 @@ from pip_app.services.employee_relations_constants import (
     MEETING_TYPES,
     PRIORITY_LEVELS,
 )
-from pip_app.services.module_settings import DEFAULT_MODULE_SETTINGS, get_module_settings_for_org
+from pip_app.services.employee_typeahead import selected_employee_options
+from pip_app.services.loader_profiles import with_loader_profile
+from pip_app.services.module_settings import is_module_ai_enabled, is_module_escalation_enabled
 
 employee_relations_bp = Blueprint(
     "employee_relations",
@@ -109,12 +121,13 @@ def _active_employee_query(include_employee_id=None):
     return q.order_by(Employee.first_name.asc(), Employee.last_name.asc())
 
 
-def _log_case_event(case_id, event_type, notes=None):
+
+def _log_case_event(case_id, event_type, notes=None, updated_by=None):
     event = EmployeeRelationsTimelineEvent(
         case_id=case_id,
         event_type=event_type,
         notes=notes,
-        updated_by=getattr(current_user, "username", None),
+        updated_by=updated_by or getattr(current_user, "username", None),
     )
     db.session.add(event)
 
@@ -182,6 +195,10 @@ def _get_active_policy_text(er_case):
 
 
 def _latest_er_ai_advice(er_case):
+    # Reuse the newest-first collection when a loader profile fetched it.
+    if "ai_advice_records" not in inspect(er_case).unloaded:
+        records = er_case.ai_advice_records
+        return records[0] if records else None
     return (
         EmployeeRelationsAIAdvice.query.filter_by(case_id=er_case.id)
         .order_by(EmployeeRelationsAIAdvice.created_at.desc())
@@ -190,35 +207,17 @@ def _latest_er_ai_advice(er_case):
 
 
 def _is_employee_relations_ai_enabled():
-    _org, settings = get_module_settings_for_org(user=current_user)
-    setting = settings.get("employee_relations")
-    defaults = DEFAULT_MODULE_SETTINGS.get("employee_relations", {"ai_enabled": True})
-
-    if setting is None:
-        return bool(defaults.get("ai_enabled", True))
-
-    return bool(getattr(setting, "ai_enabled", defaults.get("ai_enabled", True)))
+    return is_module_ai_enabled("employee_relations", user=current_user)
 
 
 def _is_employee_relations_escalation_enabled():
-    _org, settings = get_module_settings_for_org(user=current_user)
-    setting = settings.get("employee_relations")
-    defaults = DEFAULT_MODULE_SETTINGS.get(
-        "employee_relations",
-        {"escalation_enabled": True},
-    )
-
-    if setting is None:
-        return bool(defaults.get("escalation_enabled", True))
-
-    return bool(
-        getattr(setting, "escalation_enabled", defaults.get("escalation_enabled", True))
-    )
+    return is_module_escalation_enabled("employee_relations", user=current_user)
 
 
 def _get_er_escalations(case_id):
     return (
-        AdvisorEscalation.query.filter_by(
+        with_loader_profile(AdvisorEscalation.query, AdvisorEscalation)
+        .filter_by(
             module_key="employee_relations",
             source_record_type="employee_relations",
             source_record_id=case_id,
@@ -845,8 +844,6 @@ def case_list():
 
 @employee_relations_bp.route("/cases/create", methods=["GET", "POST"])
 def create_case():
-    employees = _active_employee_query().all()
-
     if request.method == "POST":
         employee_id = request.form.get("employee_id", type=int)
         case_type = request.form.get("case_type", "").strip()
@@ -904,7 +901,7 @@ def create_case():
 
             return render_template(
                 "employee_relations/create.html",
-                employees=employees,
+                employees=selected_employee_options(_scoped_employee_query(), employee_id),
                 case_types=CASE_TYPES,
                 case_statuses=CASE_STATUSES,
                 case_stages=CASE_STAGES,
@@ -953,7 +950,7 @@ def create_case():
 
     return render_template(
         "employee_relations/create.html",
-        employees=employees,
+        employees=[],
         case_types=CASE_TYPES,
         case_statuses=CASE_STATUSES,
         case_stages=CASE_STAGES,
@@ -965,7 +962,11 @@ def create_case():
 
 @employee_relations_bp.route("/cases/<int:case_id>")
 def view_case(case_id):
-    er_case = EmployeeRelationsCase.query.get_or_404(case_id)
+    er_case = (
+        with_loader_profile(EmployeeRelationsCase.query, EmployeeRelationsCase)
+        .filter(EmployeeRelationsCase.id == case_id)
+        .first_or_404()
+    )
     latest_ai = _latest_er_ai_advice(er_case)
     er_ai_enabled = _is_employee_relations_ai_enabled()
 
@@ -974,19 +975,8 @@ def view_case(case_id):
     latest_escalation = escalations[0] if escalations else None
     can_submit_escalation = escalation_enabled and not _er_escalation_is_active(latest_escalation)
 
-    available_escalation_documents = (
-        EmployeeRelationsDocument.query
-        .filter_by(case_id=er_case.id)
-        .order_by(EmployeeRelationsDocument.updated_at.desc())
-        .all()
-    )
-
-    available_escalation_attachments = (
-        EmployeeRelationsAttachment.query
-        .filter_by(case_id=er_case.id)
-        .order_by(EmployeeRelationsAttachment.uploaded_at.desc())
-        .all()
-    )
+    available_escalation_documents = er_case.documents
+    available_escalation_attachments = er_case.attachments
 
     return render_template(
         "employee_relations/detail.html",
@@ -1006,6 +996,7 @@ def view_case(case_id):
         can_submit_escalation=can_submit_escalation,
         available_escalation_documents=available_escalation_documents,
         available_escalation_attachments=available_escalation_attachments,
+        ai_advice_job=pending_ai_job("er_advice", er_case.id),
     )
 
 
@@ -1039,6 +1030,7 @@ def submit_escalation(case_id):
 
     db.session.add(escalation)
     db.session.flush()
+    escalation_state = escalation_queue_state(escalation)
 
     attached_count = _attach_selected_er_evidence_to_escalation(escalation, er_case)
 
@@ -1053,6 +1045,7 @@ def submit_escalation(case_id):
     )
 
     db.session.commit()
+    record_escalation_change(None, escalation_state)
     flash("Case submitted for advisor escalation.", "success")
     return redirect(url_for("employee_relations.view_case", case_id=case_id))
 
@@ -1060,7 +1053,7 @@ def submit_escalation(case_id):
 @employee_relations_bp.route("/cases/<int:case_id>/edit", methods=["GET", "POST"])
 def edit_case(case_id):
     er_case = EmployeeRelationsCase.query.get_or_404(case_id)
-    employees = _active_employee_query(include_employee_id=er_case.employee_id).all()
+    employees = selected_employee_options(_scoped_employee_query(), er_case.employee_id)
 
     if request.method == "POST":
         old_status = er_case.status
@@ -1395,14 +1388,51 @@ def generate_ai_advice(case_id):
 
     active_policy, active_policy_text = _get_active_policy_text(er_case)
 
-    try:
-        advice_data = generate_employee_relations_advice(
-            er_case=er_case,
-            active_policy_text=active_policy_text,
+    job = submit_ai_job(
+        "er_advice",
+        employee_relations_completion_args(er_case, active_policy_text),
+        user=current_user,
+        record_id=er_case.id,
+        context={"policy_text_id": active_policy.id if active_policy else None},
+        force=force_regenerate_requested(),
+    )
+
+    if request.accept_mimetypes.best == "application/json":
+        return ai_job_response(job)
+
+    if job.status == "completed" and (job.result() or {}).get("reused"):
+        flash("Nothing has changed since the last AI advice, so it has been kept.", "info")
+    elif job.status == "completed":
+        flash("AI advice generated and saved.", "success")
+    else:
+        flash("AI advice is being generated. This page will update when it is ready.", "info")
+    return redirect(url_for("employee_relations.view_case", case_id=case_id))
+
+
+def _save_er_ai_advice(job, content, context):
+    er_case = db.session.get(EmployeeRelationsCase, job.record_id)
+    if er_case is None:
+        raise LookupError(f"ER case #{job.record_id} no longer exists")
+
+    if context.get("cached"):
+        latest = (
+            EmployeeRelationsAIAdvice.query.filter_by(case_id=er_case.id)
+            .order_by(EmployeeRelationsAIAdvice.created_at.desc(), EmployeeRelationsAIAdvice.id.desc())
+            .first()
         )
-    except Exception as exc:
-        flash(_friendly_ai_error_message(exc), "danger")
-        return redirect(url_for("employee_relations.view_case", case_id=case_id))
+        # Nothing changed since that advice was saved: don't add a duplicate.
+        if (
+            latest is not None
+            and (latest.raw_response or "").strip() == content.strip()
+            and latest.policy_text_id == context.get("policy_text_id")
+        ):
+            return {"advice_id": latest.id, "reused": True}
+
+    advice_data = parse_employee_relations_advice(content, model_name=job.request_payload().get("model"))
+
+    active_policy = None
+    if context.get("policy_text_id"):
+        active_policy = db.session.get(EmployeeRelationsPolicyText, context["policy_text_id"])
 
     advice_record = EmployeeRelationsAIAdvice(
         case_id=er_case.id,
@@ -1417,23 +1447,27 @@ def generate_ai_advice(case_id):
         missing_information=advice_data.get("missing_information"),
         raw_response=advice_data.get("raw_response"),
         model_name=advice_data.get("model_name"),
-        created_by=getattr(current_user, "username", None),
+        created_by=job.created_by,
     )
     db.session.add(advice_record)
+    db.session.flush()
 
     timeline_notes = render_employee_relations_advice_for_timeline(advice_data)
     if active_policy:
         timeline_notes = f"{timeline_notes}\n\n[Policy Source: {active_policy.title}]"
+    if context.get("cached"):
+        timeline_notes = f"{timeline_notes}\n\n[Reused from an identical earlier request]"
 
     _log_case_event(
         er_case.id,
-        "AI Advice Generated",
+        AI_ADVICE_EVENT_TYPE,
         timeline_notes,
+        updated_by=job.created_by,
     )
+    return {"advice_id": advice_record.id}
 
-    db.session.commit()
-    flash("AI advice generated and saved.", "success")
-    return redirect(url_for("employee_relations.view_case", case_id=case_id))
+
+register_ai_job_handler("er_advice", _save_er_ai_advice, _friendly_ai_error_message)
 
 
 @employee_relations_bp.route("/attachments/<int:attachment_id>/download")
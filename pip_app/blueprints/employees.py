@@ -1,7 +1,8 @@
 from __future__ import annotations
 
-import os
+import shutil
 import tempfile
+from itertools import islice
 
 from flask import Blueprint, abort, flash, jsonify, redirect, render_template, request, session, url_for
 from flask_login import current_user, login_required
@@ -16,17 +17,33 @@ from pip_app.security import (
     scoped_employee_query,
 )
 from pip_app.services.auth_utils import superuser_required
+from pip_app.services.employee_import import bulk_import_employees, validate_import_rows
+from pip_app.services.employee_typeahead import (
+    TYPEAHEAD_DEFAULT_LIMIT,
+    TYPEAHEAD_MAX_LIMIT,
+    employee_typeahead_payload,
+    search_employees,
+)
+from pip_app.services.import_staging import (
+    IMPORT_TEMP_PREFIX,
+    build_import_staging,
+    cleanup_expired_imports,
+    discard_import,
+    is_valid_temp_id,
+    open_staged_import,
+)
 from pip_app.services.import_utils import (
     ALLOWED_EXTS,
-    EMPLOYEE_FIELDS,
-    REQUIRED_FIELDS,
     XLSX_ENABLED,
+    apply_date_format_choices,
+    blocking_date_columns,
     normalize_header,
-    read_csv_bytes,
-    read_xlsx_bytes,
-    try_parse_date,
+    open_import_file,
+)
+from pip_app.services.sickness_summaries import (
+    employee_sickness_trigger,
+    refresh_stale_employee_sickness_summary,
 )
-from pip_app.services.sickness_metrics import compute_sickness_trigger_metrics
 from pip_app.services.time_utils import today_local
 
 employees_bp = Blueprint("employees", __name__)
@@ -73,22 +90,15 @@ def employee_detail(employee_id):
 
     require_employee_access(employee)
 
-    today = today_local()
-    q_cases = SicknessCase.query.join(Employee).filter(SicknessCase.employee_id == employee.id)
-
-    triggers = compute_sickness_trigger_metrics(
-        q_cases,
-        today=today,
-        window_days=365,
+    refresh_stale_employee_sickness_summary(employee.id, today=today_local())
+    sickness_trigger = employee_sickness_trigger(
+        employee,
         bradford_medium=200,
         bradford_high=400,
         episodes_threshold=3,
         total_days_threshold=14,
-        long_term_days=28,
     )
 
-    sickness_trigger = triggers[0] if triggers else None
-
     return render_template(
         'employee_detail.html',
         employee=employee,
@@ -207,6 +217,24 @@ def quick_add_employee():
     return jsonify({"success": True, "id": emp.id, "display_name": f"{emp.first_name} {emp.last_name}"})
 
 
+@employees_bp.route('/employee/typeahead')
+@login_required
+def employee_typeahead():
+    """Top matching employees (by name, email or job title) for selectors."""
+    term = (request.args.get('q') or '').strip()
+    include_leavers = request.args.get('include_leavers') == '1'
+    limit = request.args.get('limit', TYPEAHEAD_DEFAULT_LIMIT, type=int) or TYPEAHEAD_DEFAULT_LIMIT
+    limit = max(1, min(limit, TYPEAHEAD_MAX_LIMIT))
+
+    employees = search_employees(
+        scoped_employee_query(Employee.query, Employee),
+        term,
+        limit=limit,
+        include_leavers=include_leavers,
+    )
+    return jsonify({"results": [employee_typeahead_payload(employee) for employee in employees]})
+
+
 @employees_bp.route('/employee/list')
 @login_required
 def employee_list():
@@ -236,22 +264,20 @@ def employee_import():
     if ext not in ALLOWED_EXTS:
         abort(400, f"Unsupported file type: .{ext}")
 
-    file_bytes = file.read()
+    cleanup_expired_imports()
 
-    if ext == "csv":
-        headers, rows = read_csv_bytes(file_bytes)
-    else:
-        headers, rows = read_xlsx_bytes(file_bytes)
+    tmp = tempfile.NamedTemporaryFile(prefix=IMPORT_TEMP_PREFIX, suffix=f".{ext}", delete=False)
+    with tmp:
+        shutil.copyfileobj(file.stream, tmp)
+    temp_id = tmp.name
 
-    normalised_headers = [{"raw": h, "norm": normalize_header(h)} for h in (headers or [])]
+    with open_import_file(temp_id) as (headers, rows):
+        build_import_staging(temp_id, headers, rows)
 
-    tmp = tempfile.NamedTemporaryFile(prefix="emp_import_", suffix=f".{ext}", delete=False)
-    tmp.write(file_bytes)
-    tmp.flush()
-    temp_id = tmp.name
-    tmp.close()
+    with open_staged_import(temp_id) as (headers, rows, _date_formats):
+        preview = list(islice(rows, 10))
 
-    preview = rows[:10] if rows else []
+    normalised_headers = [{"raw": h, "norm": normalize_header(h)} for h in (headers or [])]
 
     return jsonify({
         "temp_id": temp_id,
@@ -281,89 +307,19 @@ def employee_import_validate():
 
     if not temp_id:
         abort(400, "Missing temp_id")
-    try:
-        with open(temp_id, "rb") as f:
-            file_bytes = f.read()
-    except Exception:
+    if not is_valid_temp_id(temp_id):
         abort(400, "Invalid temp_id or temporary file expired")
 
-    ext = temp_id.rsplit(".", 1)[-1].lower()
-    headers, rows = (read_csv_bytes(file_bytes) if ext == "csv" else read_xlsx_bytes(file_bytes))
+    with open_staged_import(temp_id) as (headers, rows, date_formats):
+        report = validate_import_rows(
+            headers,
+            rows,
+            mapping,
+            unique_key=unique_key,
+            organisation_id=getattr(current_user, "organisation_id", None),
+            date_formats=apply_date_format_choices(date_formats, data.get("date_format_choices")),
+        )
 
-    mapped_rows = []
-    unmapped_headers = []
-    for h in headers or []:
-        if not mapping.get(h):
-            unmapped_headers.append(h)
-
-    for r in rows:
-        out = {}
-        for h, v in r.items():
-            field = mapping.get(h)
-            if not field:
-                continue
-            if field == "start_date":
-                out[field] = try_parse_date(v)
-            else:
-                out[field] = (str(v).strip() if v is not None else None)
-        mapped_rows.append(out)
-
-    missing_required = []
-    for idx, r in enumerate(mapped_rows, start=1):
-        missing = [f for f in REQUIRED_FIELDS if not r.get(f)]
-        if missing:
-            missing_required.append({"row": idx, "missing": missing})
-
-    duplicates_in_file = []
-    if unique_key:
-        keys = unique_key.split(",")
-        seen = set()
-        for idx, r in enumerate(mapped_rows, start=1):
-            key_tuple = tuple((r.get(k.strip()) or "").lower() for k in keys)
-            if all(key_tuple):
-                if key_tuple in seen:
-                    duplicates_in_file.append({"row": idx, "key": key_tuple})
-                else:
-                    seen.add(key_tuple)
-
-    duplicates_in_db = []
-    try:
-        if unique_key == "email" and any(r.get("email") for r in mapped_rows):
-            emails = list({r.get("email") for r in mapped_rows if r.get("email")})
-            existing = set(
-                e[0].lower()
-                for e in db.session.query(Employee.email).filter(Employee.email.in_(emails)).all()
-            )
-            for idx, r in enumerate(mapped_rows, start=1):
-                em = (r.get("email") or "").lower()
-                if em and em in existing:
-                    duplicates_in_db.append({"row": idx, "email": r.get("email")})
-        elif unique_key == "first_name,last_name":
-            pairs = {
-                ((r.get("first_name") or "").lower(), (r.get("last_name") or "").lower())
-                for r in mapped_rows if r.get("first_name") and r.get("last_name")
-            }
-            if pairs:
-                q = db.session.query(Employee.first_name, Employee.last_name).all()
-                existing_pairs = {(fn.lower(), ln.lower()) for fn, ln in q}
-                for idx, r in enumerate(mapped_rows, start=1):
-                    t = ((r.get("first_name") or "").lower(), (r.get("last_name") or "").lower())
-                    if all(t) and t in existing_pairs:
-                        duplicates_in_db.append({
-                            "row": idx,
-                            "name": f"{r.get('first_name')} {r.get('last_name')}"
-                        })
-    except Exception as e:
-        duplicates_in_db = [{"error": f"DB duplicate check skipped: {e}"}]
-
-    report = {
-        "unmapped_headers": unmapped_headers,
-        "missing_required": missing_required,
-        "duplicates_in_file": duplicates_in_file,
-        "duplicates_in_db": duplicates_in_db,
-        "rows_ready": len(mapped_rows) - len(missing_required) - len(duplicates_in_file) - len(duplicates_in_db),
-        "total_rows": len(mapped_rows)
-    }
     return jsonify({"temp_id": temp_id, "report": report}), 200
 
 
@@ -384,75 +340,36 @@ def employee_import_commit():
     if not (temp_id and confirm and mapping):
         abort(400, "Missing temp_id, mapping, or confirm flag")
 
-    try:
-        with open(temp_id, "rb") as f:
-            file_bytes = f.read()
-    except Exception:
+    if not is_valid_temp_id(temp_id):
         abort(400, "Invalid temp_id or temporary file expired")
 
-    ext = temp_id.rsplit(".", 1)[-1].lower()
-    headers, rows = (read_csv_bytes(file_bytes) if ext == "csv" else read_xlsx_bytes(file_bytes))
-
-    created, skipped, errors = 0, 0, []
-
-    for idx, src in enumerate(rows, start=1):
-        payload = {}
-        for h, v in src.items():
-            field = mapping.get(h)
-            if not field:
-                continue
-            if field == "start_date":
-                payload[field] = try_parse_date(v)
-            else:
-                payload[field] = (str(v).strip() if v is not None else None)
-
-        if any(not payload.get(f) for f in REQUIRED_FIELDS):
-            skipped += 1
-            continue
-
-        try:
-            exists = False
-            if unique_key == "email" and payload.get("email"):
-                exists = db.session.query(Employee.id).filter_by(email=payload["email"]).first() is not None
-            elif unique_key == "first_name,last_name" and payload.get("first_name") and payload.get("last_name"):
-                exists = db.session.query(Employee.id).filter_by(
-                    first_name=payload["first_name"],
-                    last_name=payload["last_name"]
-                ).first() is not None
-            if exists:
-                skipped += 1
-                continue
-        except Exception as e:
-            errors.append({"row": idx, "error": f"Duplicate check failed: {e}"})
-            skipped += 1
-            continue
-
-        try:
-            emp = Employee(
-                organisation_id=getattr(current_user, "organisation_id", None),
-                **{k: v for k, v in payload.items() if k in EMPLOYEE_FIELDS}
-            )
-            db.session.add(emp)
-            created += 1
-        except Exception as e:
-            errors.append({"row": idx, "error": str(e)})
-            skipped += 1
+    with open_staged_import(temp_id) as (_headers, rows, date_formats):
+        date_formats = apply_date_format_choices(date_formats, data.get("date_format_choices"))
+        date_errors = blocking_date_columns(mapping, date_formats)
+        if date_errors:
+            return jsonify({"error": "Choose a date format for each flagged column.", "date_errors": date_errors}), 400
 
+        result = bulk_import_employees(
+            rows,
+            mapping,
+            unique_key=unique_key,
+            organisation_id=getattr(current_user, "organisation_id", None),
+            date_formats=date_formats,
+        )
     db.session.commit()
 
     try:
         username = getattr(current_user, "username", "system")
-        notes = f"Employee Import: created={created}, skipped={skipped}, errors={len(errors)}"
+        notes = (
+            f"Employee Import: created={result['created']}, skipped={result['skipped']}, "
+            f"errors={len(result['errors'])}, rows_per_second={result['rows_per_second']}"
+        )
         evt = TimelineEvent(event_type="Import", notes=notes, updated_by=username)
         db.session.add(evt)
         db.session.commit()
     except Exception:
         pass
 
-    try:
-        if temp_id and os.path.exists(temp_id):
-            os.remove(temp_id)
-    except Exception:
-        pass
+    discard_import(temp_id)
 
-    return jsonify({"created": created, "skipped": skipped, "errors": errors}), 200
+    return jsonify(result), 200
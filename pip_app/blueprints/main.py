@@ -1,6 +1,7 @@
+import time
 from datetime import date, timedelta
 
-from flask import Blueprint, render_template
+from flask import Blueprint, jsonify, render_template, request, url_for
 from flask_login import current_user, login_required
 from sqlalchemy import or_
 
@@ -13,7 +14,10 @@ from models import (
     SupervisionAction,
     SupervisionRecord,
 )
+from pip_app.services.dashboard_aggregates import compute_workspace_counters
 from pip_app.services.module_settings import get_enabled_modules
+from pip_app.services.search_index import SEARCH_RECORD_TYPES, search_records
+from pip_app.services.supervision_coverage import count_employees_missing_supervision
 
 main_bp = Blueprint("main", __name__)
 
@@ -24,7 +28,6 @@ def home():
     enabled_modules = get_enabled_modules(user=current_user)
 
     today = date.today()
-    next_14_days = today + timedelta(days=14)
     missing_supervision_cutoff = today - timedelta(days=60)
 
     active_employees_query = Employee.query.filter(Employee.is_leaver.is_(False))
@@ -48,11 +51,8 @@ def home():
             active_employees_query = active_employees_query.filter(False)
             leavers_query = leavers_query.filter(False)
 
-    active_employees = active_employees_query.count()
-    leavers = leavers_query.count()
+    counters = compute_workspace_counters(current_user, enabled_modules, today=today)
 
-    open_pips = 0
-    pip_reviews_due = 0
     recent_pips = []
 
     if enabled_modules.get("pip", True):
@@ -67,17 +67,12 @@ def home():
             else:
                 pip_query = pip_query.filter(False)
 
-        open_pips = pip_query.filter(PIPRecord.status != "Closed").count()
-        pip_reviews_due = pip_query.filter(PIPRecord.status != "Closed").count()
-
         recent_pips = (
             pip_query.order_by(PIPRecord.last_updated.desc().nullslast())
             .limit(5)
             .all()
         )
 
-    active_probations = 0
-    probation_reviews_due = 0
     recent_probations = []
 
     if enabled_modules.get("probation", True):
@@ -94,22 +89,12 @@ def home():
             else:
                 probation_query = probation_query.filter(False)
 
-        active_probations = probation_query.filter(
-            ProbationRecord.status.in_(["Active", "Extended"])
-        ).count()
-
-        probation_reviews_due = probation_query.filter(
-            ProbationRecord.status.in_(["Active", "Extended"])
-        ).count()
-
         recent_probations = (
             probation_query.order_by(ProbationRecord.last_updated.desc().nullslast())
             .limit(5)
             .all()
         )
 
-    open_sickness_cases = 0
-    sickness_follow_up_needed = 0
     recent_sickness_cases = []
 
     if enabled_modules.get("sickness", True):
@@ -126,21 +111,12 @@ def home():
             else:
                 sickness_query = sickness_query.filter(False)
 
-        open_sickness_cases = sickness_query.filter(
-            SicknessCase.status.in_(["Open", "Monitoring"])
-        ).count()
-
-        sickness_follow_up_needed = sickness_query.filter(
-            SicknessCase.status.in_(["Open", "Monitoring"])
-        ).count()
-
         recent_sickness_cases = (
             sickness_query.order_by(SicknessCase.updated_at.desc().nullslast())
             .limit(5)
             .all()
         )
 
-    open_er_cases = 0
     recent_er_cases = []
 
     if current_user.is_superuser() and enabled_modules.get("employee_relations", True):
@@ -149,18 +125,12 @@ def home():
         if getattr(current_user, "organisation_id", None):
             er_query = er_query.filter(Employee.organisation_id == current_user.organisation_id)
 
-        open_er_cases = er_query.filter(EmployeeRelationsCase.status != "Closed").count()
-
         recent_er_cases = (
             er_query.order_by(EmployeeRelationsCase.updated_at.desc().nullslast())
             .limit(5)
             .all()
         )
 
-    scheduled_supervisions = 0
-    overdue_supervisions_count = 0
-    open_supervision_actions_count = 0
-    actions_due_soon_count = 0
     employees_missing_supervision_count = 0
     recent_supervisions = []
     overdue_supervisions = []
@@ -180,21 +150,6 @@ def home():
             else:
                 supervision_query = supervision_query.filter(False)
 
-        scheduled_supervisions = supervision_query.filter(
-            SupervisionRecord.status == "Scheduled",
-            SupervisionRecord.meeting_date >= today,
-        ).count()
-
-        overdue_supervisions_count = supervision_query.filter(
-            or_(
-                SupervisionRecord.status == "Overdue",
-                (
-                    (SupervisionRecord.status == "Scheduled")
-                    & (SupervisionRecord.meeting_date < today)
-                ),
-            )
-        ).count()
-
         recent_supervisions = (
             supervision_query.order_by(
                 SupervisionRecord.meeting_date.desc(),
@@ -232,16 +187,6 @@ def home():
             else:
                 action_query = action_query.filter(False)
 
-        open_supervision_actions_count = action_query.filter(
-            SupervisionAction.status.in_(["Open", "Carried Forward"])
-        ).count()
-
-        actions_due_soon_count = action_query.filter(
-            SupervisionAction.status.in_(["Open", "Carried Forward"]),
-            SupervisionAction.due_date.isnot(None),
-            SupervisionAction.due_date <= next_14_days,
-        ).count()
-
         open_supervision_actions = (
             action_query.filter(SupervisionAction.status.in_(["Open", "Carried Forward"]))
             .order_by(SupervisionAction.due_date.asc().nullslast())
@@ -249,77 +194,19 @@ def home():
             .all()
         )
 
-        employees_for_missing_check = active_employees_query.all()
-        missing_count = 0
-
-        for employee in employees_for_missing_check:
-            latest = (
-                supervision_query.filter(SupervisionRecord.employee_id == employee.id)
-                .order_by(SupervisionRecord.meeting_date.desc())
-                .first()
-            )
-
-            if latest is None or latest.meeting_date < missing_supervision_cutoff:
-                missing_count += 1
-
-        employees_missing_supervision_count = missing_count
-
-    employee_records_missing_email_query = Employee.query.filter(
-        Employee.is_leaver.is_(False),
-        or_(Employee.email.is_(None), Employee.email == ""),
-    )
-
-    if getattr(current_user, "organisation_id", None):
-        employee_records_missing_email_query = employee_records_missing_email_query.filter(
-            Employee.organisation_id == current_user.organisation_id
+        employees_missing_supervision_count = count_employees_missing_supervision(
+            active_employees_query,
+            cutoff=missing_supervision_cutoff,
         )
 
-    if current_user.admin_level == 0:
-        if current_user.team_id:
-            employee_records_missing_email_query = employee_records_missing_email_query.filter(
-                Employee.team_id == current_user.team_id
-            )
-        else:
-            employee_records_missing_email_query = employee_records_missing_email_query.filter(False)
-
-    employee_records_missing_email = employee_records_missing_email_query.count()
-
     recent_leavers = (
         leavers_query.order_by(Employee.leaving_date.desc().nullslast(), Employee.last_name.asc())
         .limit(5)
         .all()
     )
 
-    module_count = 0
-    if enabled_modules.get("pip", True):
-        module_count += 1
-    if enabled_modules.get("probation", True):
-        module_count += 1
-    if enabled_modules.get("sickness", True):
-        module_count += 1
-    if enabled_modules.get("supervision", True):
-        module_count += 1
-    if current_user.is_superuser() and enabled_modules.get("employee_relations", True):
-        module_count += 1
-
-    workspace_stats = {
-        "active_employees": active_employees,
-        "leavers": leavers,
-        "open_pips": open_pips,
-        "active_probations": active_probations,
-        "open_sickness_cases": open_sickness_cases,
-        "open_er_cases": open_er_cases,
-        "module_count": module_count,
-        "probation_reviews_due": probation_reviews_due,
-        "pip_reviews_due": pip_reviews_due,
-        "sickness_follow_up_needed": sickness_follow_up_needed,
-        "employee_records_missing_email": employee_records_missing_email,
-        "scheduled_supervisions": scheduled_supervisions,
-        "overdue_supervisions": overdue_supervisions_count,
-        "open_supervision_actions": open_supervision_actions_count,
-        "supervision_actions_due_soon": actions_due_soon_count,
-        "employees_missing_supervision": employees_missing_supervision_count,
-    }
+    workspace_stats = dict(counters)
+    workspace_stats["employees_missing_supervision"] = employees_missing_supervision_count
 
     return render_template(
         "select_module.html",
@@ -334,4 +221,63 @@ def home():
         recent_supervisions=recent_supervisions,
         overdue_supervisions=overdue_supervisions,
         open_supervision_actions=open_supervision_actions,
-    )
\ No newline at end of file
+    )
+
+SEARCH_RESULT_ENDPOINTS = {
+    "pip": ("pip.pip_detail", "id"),
+    "employee_relations": ("employee_relations.view_case", "case_id"),
+    "sickness": ("sickness.view_sickness_case", "case_id"),
+    "supervision": ("supervision.detail", "id"),
+}
+
+
+def _searchable_record_types():
+    enabled_modules = get_enabled_modules(user=current_user)
+    record_types = [key for key in SEARCH_RECORD_TYPES if enabled_modules.get(key, True)]
+
+    # Employee Relations is superuser-only everywhere else in the app.
+    if not current_user.is_superuser():
+        record_types = [key for key in record_types if key != "employee_relations"]
+
+    return record_types
+
+
+@main_bp.route("/search")
+@login_required
+def search():
+    query_text = (request.args.get("q") or "").strip()
+    record_type = (request.args.get("type") or "").strip()
+
+    record_types = _searchable_record_types()
+    searched_types = [record_type] if record_type in record_types else record_types
+
+    started = time.perf_counter()
+    results = search_records(query_text, record_types=searched_types) if query_text else []
+    elapsed_ms = round((time.perf_counter() - started) * 1000, 1)
+
+    for result in results:
+        endpoint, arg = SEARCH_RESULT_ENDPOINTS[result["record_type"]]
+        result["url"] = url_for(endpoint, **{arg: result["record_id"]})
+
+    if request.accept_mimetypes.best == "application/json":
+        return jsonify({
+            "query": query_text,
+            "elapsed_ms": elapsed_ms,
+            "results": [
+                {
+                    **result,
+                    "snippet_html": str(result["snippet_html"]),
+                    "updated_at": result["updated_at"].isoformat() if result["updated_at"] else None,
+                }
+                for result in results
+            ],
+        })
+
+    return render_template(
+        "search.html",
+        query=query_text,
+        record_type=record_type if record_type in record_types else "",
+        record_type_options=[(key, SEARCH_RECORD_TYPES[key]) for key in record_types],
+        results=results,
+        elapsed_ms=elapsed_ms,
+    )
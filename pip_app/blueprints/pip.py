@@ -2,6 +2,7 @@ from __future__ import annotations
 
 import os
 import json
+import re
 from datetime import datetime, timezone
 
 from flask import (
@@ -18,7 +19,8 @@ from flask import (
     url_for,
 )
 from flask_login import current_user, login_required
-from sqlalchemy import or_
+from sqlalchemy import func, or_
+from sqlalchemy.orm import contains_eager
 
 from forms import PIPForm
 from models import (
@@ -39,7 +41,14 @@ from pip_app.security import (
     require_pip_access,
     scoped_employee_query,
 )
-from pip_app.services.ai_utils import get_openai_client
+from pip_app.services.advisor_queue_counts import escalation_queue_state, record_escalation_change
+from pip_app.services.ai_jobs import (
+    ai_job_response,
+    force_regenerate_requested,
+    pending_ai_job,
+    register_ai_job_handler,
+    submit_ai_job,
+)
 from pip_app.services.document_utils import (
     BASE_DIR,
     build_doc_rel_dir,
@@ -49,7 +58,19 @@ from pip_app.services.document_utils import (
     html_to_docx_bytes,
     sanitize_html,
 )
-from pip_app.services.module_settings import DEFAULT_MODULE_SETTINGS, get_module_settings_for_org
+from pip_app.services.employee_typeahead import selected_employee_options
+from pip_app.services.loader_profiles import with_loader_profile
+from pip_app.services.module_settings import is_module_ai_enabled, is_module_escalation_enabled
+from pip_app.services.pip_listing import (
+    PIP_LIST_MAX_PAGE_SIZE,
+    PIP_LIST_PAGE_SIZE,
+    apply_pip_keyset,
+    decode_pip_cursor,
+    encode_pip_cursor,
+    invalidate_pip_filter_options,
+    pip_filter_options,
+    pip_list_order,
+)
 from pip_app.services.storage_utils import next_version_for, save_file
 from pip_app.services.taxonomy import pick_actions_from_templates as _pick_actions_from_templates
 from pip_app.services.time_utils import auto_review_date
@@ -130,6 +151,7 @@ def _active_employee_query(include_employee_id=None):
     return q.order_by(Employee.last_name.asc(), Employee.first_name.asc())
 
 
+
 def _scoped_pip_query():
     q = PIPRecord.query.join(Employee)
 
@@ -164,30 +186,17 @@ def _has_recent_ai_consent(context_name: str, minutes: int = 120) -> bool:
 
 
 def _is_pip_ai_enabled():
-    _org, settings = get_module_settings_for_org(user=current_user)
-    setting = settings.get("pip")
-    defaults = DEFAULT_MODULE_SETTINGS.get("pip", {"ai_enabled": True})
-
-    if setting is None:
-        return bool(defaults.get("ai_enabled", True))
-
-    return bool(getattr(setting, "ai_enabled", defaults.get("ai_enabled", True)))
+    return is_module_ai_enabled("pip", user=current_user)
 
 
 def _is_pip_escalation_enabled():
-    _org, settings = get_module_settings_for_org(user=current_user)
-    setting = settings.get("pip")
-    defaults = DEFAULT_MODULE_SETTINGS.get("pip", {"escalation_enabled": True})
-
-    if setting is None:
-        return bool(defaults.get("escalation_enabled", True))
-
-    return bool(getattr(setting, "escalation_enabled", defaults.get("escalation_enabled", True)))
+    return is_module_escalation_enabled("pip", user=current_user)
 
 
 def _get_pip_escalations(pip_id):
     return (
-        AdvisorEscalation.query.filter_by(
+        with_loader_profile(AdvisorEscalation.query, AdvisorEscalation)
+        .filter_by(
             module_key="pip",
             source_record_type="pip",
             source_record_id=pip_id,
@@ -304,7 +313,7 @@ def _attach_selected_pip_documents_to_escalation(escalation, pip):
 @pip_bp.route('/pip/<int:id>')
 @login_required
 def pip_detail(id):
-    pip = _scoped_pip_query().filter(PIPRecord.id == id).first_or_404()
+    pip = with_loader_profile(_scoped_pip_query(), PIPRecord).filter(PIPRecord.id == id).first_or_404()
     require_pip_access(pip)
     employee = pip.employee
 
@@ -329,6 +338,7 @@ def pip_detail(id):
         latest_escalation=latest_escalation,
         can_submit_escalation=can_submit_escalation,
         available_escalation_documents=available_escalation_documents,
+        ai_advice_job=pending_ai_job("pip_advice", pip.id),
     )
 
 @pip_bp.route('/pip/<int:id>/escalate', methods=['POST'])
@@ -364,6 +374,7 @@ def submit_pip_escalation(id):
 
     db.session.add(escalation)
     db.session.flush()
+    escalation_state = escalation_queue_state(escalation)
 
     attached_count = _attach_selected_pip_documents_to_escalation(escalation, pip)
 
@@ -388,6 +399,7 @@ def submit_pip_escalation(id):
         pass
 
     db.session.commit()
+    record_escalation_change(None, escalation_state)
 
     flash("PIP submitted for advisor escalation.", "success")
     return redirect(url_for('pip.pip_detail', id=pip.id))
@@ -607,7 +619,7 @@ def edit_pip(id):
             form.actions.entries[idx].form.description.data = ai.description
             form.actions.entries[idx].form.status.data = ai.status
 
-    advice_text = None
+    advice_job = None
 
     if request.method == 'POST' and 'generate_advice' in request.form:
         if not _is_pip_ai_enabled():
@@ -632,29 +644,23 @@ def edit_pip(id):
         prompt += f"Meeting Notes: {form.meeting_notes.data or '[none]'}\n"
         prompt += "Provide 3 bulleted actionable tips for the manager to support this employee."
 
-        try:
-            client = get_openai_client()
-            resp = client.chat.completions.create(
-                model="gpt-4",
-                messages=[{"role": "user", "content": prompt}],
-                temperature=0.7,
-            )
-            advice_text = resp.choices[0].message.content.strip()
-        except Exception as exc:
-            flash(_friendly_ai_error_message(exc), "error")
-            return redirect(url_for('pip.edit_pip', id=pip.id))
-
-        try:
-            log_security_event(
-                event_type="PIP AI Advice Preview Generated",
-                notes=f"Inline AI advice generated for PIP #{pip.id}",
-                pip_record_id=pip.id,
-                updated_by=current_user.username,
-            )
-        except Exception:
-            pass
+        # The preview is of unsaved form data, so it is not tied to the
+        # record and is never deduplicated against another request.
+        job = submit_ai_job(
+            "pip_advice_preview",
+            {
+                "model": "gpt-4",
+                "messages": [{"role": "user", "content": prompt}],
+                "temperature": 0.7,
+            },
+            user=current_user,
+            context={"pip_id": pip.id},
+            force=force_regenerate_requested(),
+        )
+        if request.accept_mimetypes.best == "application/json":
+            return ai_job_response(job)
 
-        return render_template('edit_pip.html', form=form, pip=pip, employee=employee, advice_text=advice_text)
+        return render_template('edit_pip.html', form=form, pip=pip, employee=employee, advice_job=job)
 
     if form.validate_on_submit():
         pip.concerns = form.concerns.data
@@ -676,6 +682,7 @@ def edit_pip(id):
             )
 
         db.session.commit()
+        invalidate_pip_filter_options()
 
         try:
             log_security_event(
@@ -690,7 +697,7 @@ def edit_pip(id):
         flash('PIP updated successfully.', 'success')
         return redirect(url_for('pip.pip_detail', id=pip.id))
 
-    return render_template('edit_pip.html', form=form, pip=pip, employee=employee, advice_text=advice_text)
+    return render_template('edit_pip.html', form=form, pip=pip, employee=employee, advice_job=advice_job)
 
 
 @pip_bp.route('/pip/<int:id>/generate/advice', methods=['POST'])
@@ -722,55 +729,99 @@ def generate_ai_advice(id):
     prompt += f"Meeting Notes: {pip.meeting_notes or '[none]'}\n\n"
     prompt += "Provide your advice as a bullet-pointed list."
 
-    try:
-        client = get_openai_client()
-        resp = client.chat.completions.create(
-            model="gpt-4",
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.7,
-        )
+    job = submit_ai_job(
+        "pip_advice",
+        {
+            "model": "gpt-4",
+            "messages": [{"role": "user", "content": prompt}],
+            "temperature": 0.7,
+        },
+        user=current_user,
+        record_id=pip.id,
+        context={
+            "request_ip": request.remote_addr,
+            "user_agent": request.headers.get("User-Agent"),
+        },
+        force=force_regenerate_requested(),
+    )
 
-        pip.ai_advice = resp.choices[0].message.content.strip()
-        pip.ai_advice_generated_at = datetime.now(timezone.utc)
+    if request.accept_mimetypes.best == "application/json":
+        return ai_job_response(job)
 
-        event = TimelineEvent(
-            pip_record_id=pip.id,
-            event_type="AI Advice Generated",
-            notes="Advice generated using OpenAI",
-            updated_by=current_user.username
-        )
-        db.session.add(event)
+    if job.status == "completed" and (job.result() or {}).get("reused"):
+        flash('Nothing has changed since the last AI advice, so it has been kept.', 'info')
+    elif job.status == "completed":
+        flash('AI advice generated.', 'success')
+    else:
+        flash('AI advice is being generated. This page will update when it is ready.', 'info')
+    return redirect(url_for('pip.pip_detail', id=pip.id))
 
-        consent = AIConsentLog(
-            user_id=current_user.id,
+
+def _save_pip_ai_advice(job, content, context):
+    pip = db.session.get(PIPRecord, job.record_id)
+    if pip is None:
+        raise LookupError(f"PIP #{job.record_id} no longer exists")
+
+    cached = bool(context.get("cached"))
+    # Nothing changed since that advice was saved: keep it as it is.
+    if cached and (pip.ai_advice or "").strip() == content.strip():
+        return {"advice": pip.ai_advice, "reused": True}
+
+    pip.ai_advice = content
+    pip.ai_advice_generated_at = datetime.now(timezone.utc)
+
+    db.session.add(TimelineEvent(
+        pip_record_id=pip.id,
+        event_type="AI Advice Generated",
+        notes=(
+            "Advice reused from an identical earlier request"
+            if cached
+            else "Advice generated using OpenAI"
+        ),
+        updated_by=job.created_by,
+    ))
+    # Consent is logged against calls that actually sent data to OpenAI.
+    if not cached:
+        db.session.add(AIConsentLog(
+            user_id=job.user_id,
             context="pip_advice",
             accepted=True,
             accepted_at=datetime.now(timezone.utc),
-            request_ip=request.remote_addr,
-            user_agent=request.headers.get("User-Agent")
-        )
-        db.session.add(consent)
-
-        db.session.commit()
-
-    except Exception as e:
-        db.session.rollback()
-        print(f"[AI ERROR] Failed to generate AI advice for PIP #{pip.id}: {e}")
-        flash(_friendly_ai_error_message(e), "error")
-        return redirect(url_for('pip.pip_detail', id=pip.id))
+            request_ip=context.get("request_ip"),
+            user_agent=context.get("user_agent"),
+        ))
+    log_security_event(
+        event_type="PIP AI Advice Generated",
+        notes=(
+            f"Cached AI advice reused for PIP #{pip.id}"
+            if cached
+            else f"AI advice generated for PIP #{pip.id}"
+        ),
+        pip_record_id=pip.id,
+        updated_by=job.created_by,
+        commit=False,
+    )
+    return {"advice": content}
+
+
+def _save_pip_advice_preview(job, content, context):
+    pip_id = context.get("pip_id")
+    log_security_event(
+        event_type="PIP AI Advice Preview Generated",
+        notes=(
+            f"Cached inline AI advice reused for PIP #{pip_id}"
+            if context.get("cached")
+            else f"Inline AI advice generated for PIP #{pip_id}"
+        ),
+        pip_record_id=pip_id,
+        updated_by=job.created_by,
+        commit=False,
+    )
+    return {"advice": content}
 
-    try:
-        log_security_event(
-            event_type="PIP AI Advice Generated",
-            notes=f"AI advice generated for PIP #{pip.id}",
-            pip_record_id=pip.id,
-            updated_by=current_user.username,
-        )
-    except Exception:
-        pass
 
-    flash('AI advice generated.', 'success')
-    return redirect(url_for('pip.pip_detail', id=pip.id))
+register_ai_job_handler("pip_advice", _save_pip_ai_advice, _friendly_ai_error_message)
+register_ai_job_handler("pip_advice_preview", _save_pip_advice_preview, _friendly_ai_error_message)
 
 
 @pip_bp.route('/pip/create/<int:employee_id>', methods=['GET', 'POST'])
@@ -811,6 +862,7 @@ def create_pip(employee_id):
             db.session.add(item)
 
         db.session.commit()
+        invalidate_pip_filter_options()
 
         try:
             log_security_event(
@@ -828,19 +880,21 @@ def create_pip(employee_id):
     return render_template('create_pip.html', form=form, employee=employee)
 
 
-@pip_bp.route('/pip/list')
-@login_required
-def pip_list():
-    query = _scoped_pip_query()
+def _pip_list_filters():
+    return {
+        "search": (request.args.get('search') or '').strip(),
+        "status": (request.args.get('status') or '').strip(),
+        "category": (request.args.get('category') or '').strip(),
+        "severity": (request.args.get('severity') or '').strip(),
+        "overdue_only": (request.args.get('overdue_only') or '').strip(),
+    }
+
 
-    search = (request.args.get('search') or '').strip()
-    status = (request.args.get('status') or '').strip()
-    category = (request.args.get('category') or '').strip()
-    severity = (request.args.get('severity') or '').strip()
-    overdue_only = (request.args.get('overdue_only') or '').strip()
+def _filtered_pip_query(filters):
+    query = _scoped_pip_query()
 
-    if search:
-        like = f"%{search}%"
+    if filters["search"]:
+        like = f"%{filters['search']}%"
         query = query.filter(
             or_(
                 Employee.first_name.ilike(like),
@@ -851,16 +905,16 @@ def pip_list():
             )
         )
 
-    if status:
-        query = query.filter(PIPRecord.status == status)
+    if filters["status"]:
+        query = query.filter(PIPRecord.status == filters["status"])
 
-    if category:
-        query = query.filter(PIPRecord.concern_category == category)
+    if filters["category"]:
+        query = query.filter(PIPRecord.concern_category == filters["category"])
 
-    if severity:
-        query = query.filter(PIPRecord.severity == severity)
+    if filters["severity"]:
+        query = query.filter(PIPRecord.severity == filters["severity"])
 
-    if overdue_only == "1":
+    if filters["overdue_only"] == "1":
         today = datetime.utcnow().date()
         query = query.filter(
             PIPRecord.status != "Closed",
@@ -868,69 +922,119 @@ def pip_list():
             PIPRecord.review_date < today,
         )
 
-    pips = query.order_by(
-        PIPRecord.review_date.asc().nullslast(),
-        PIPRecord.start_date.desc().nullslast()
-    ).all()
-
-    status_options = [
-        row[0] for row in (
-            _scoped_pip_query()
-            .with_entities(PIPRecord.status)
-            .distinct()
-            .order_by(PIPRecord.status.asc())
-            .all()
-        ) if row[0]
-    ]
+    return query
 
-    category_options = [
-        row[0] for row in (
-            _scoped_pip_query()
-            .with_entities(PIPRecord.concern_category)
-            .distinct()
-            .order_by(PIPRecord.concern_category.asc())
-            .all()
-        ) if row[0]
-    ]
 
-    severity_options = [
-        row[0] for row in (
-            _scoped_pip_query()
-            .with_entities(PIPRecord.severity)
-            .distinct()
-            .order_by(PIPRecord.severity.asc())
-            .all()
-        ) if row[0]
-    ]
+def _pip_list_page_size():
+    try:
+        per_page = int(request.args.get('per_page') or PIP_LIST_PAGE_SIZE)
+    except (TypeError, ValueError):
+        per_page = PIP_LIST_PAGE_SIZE
+    return max(1, min(per_page, PIP_LIST_MAX_PAGE_SIZE))
 
-    filters = {
-        "search": search,
-        "status": status,
-        "category": category,
-        "severity": severity,
-        "overdue_only": overdue_only,
-    }
+
+def _pip_list_page(filters, cursor, per_page):
+    """Return ``(pips, total, next_cursor)`` for one keyset page."""
+    query = _filtered_pip_query(filters)
+    total = query.order_by(None).with_entities(func.count(PIPRecord.id)).scalar() or 0
+
+    page_query = query.options(contains_eager(PIPRecord.employee)).order_by(*pip_list_order())
+    if cursor is not None:
+        page_query = apply_pip_keyset(page_query, cursor)
+
+    rows = page_query.limit(per_page + 1).all()
+    pips = rows[:per_page]
+    next_cursor = encode_pip_cursor(pips[-1]) if len(rows) > per_page else None
+    return pips, total, next_cursor
+
+
+def _pip_list_scope_key():
+    team_id = current_user.team_id if current_user.admin_level == 0 else None
+    return (getattr(current_user, "organisation_id", None), current_user.admin_level == 0, team_id)
+
+
+def _pip_list_url(endpoint, filters, per_page, cursor=None):
+    args = {key: value for key, value in filters.items() if value}
+    if per_page != PIP_LIST_PAGE_SIZE:
+        args["per_page"] = per_page
+    if cursor:
+        args["cursor"] = cursor
+    return url_for(endpoint, **args)
+
+
+@pip_bp.route('/pip/list')
+@login_required
+def pip_list():
+    filters = _pip_list_filters()
+    per_page = _pip_list_page_size()
+    cursor = decode_pip_cursor(request.args.get('cursor'))
+
+    pips, total, next_cursor = _pip_list_page(filters, cursor, per_page)
+    options = pip_filter_options(_scoped_pip_query(), _pip_list_scope_key())
 
     return render_template(
         'pip_list.html',
         pips=pips,
+        total=total,
+        is_first_page=cursor is None,
+        first_page_url=_pip_list_url('pip.pip_list', filters, per_page),
+        next_page_url=_pip_list_url('pip.pip_list', filters, per_page, next_cursor) if next_cursor else None,
         filters=filters,
-        status_options=status_options,
-        category_options=category_options,
-        severity_options=severity_options,
+        status_options=options["status"],
+        category_options=options["category"],
+        severity_options=options["severity"],
     )
 
 
+@pip_bp.route('/pip/list.json')
+@login_required
+def pip_list_json():
+    filters = _pip_list_filters()
+    per_page = _pip_list_page_size()
+    raw_cursor = request.args.get('cursor')
+    cursor = decode_pip_cursor(raw_cursor)
+    if raw_cursor and cursor is None:
+        return jsonify({"success": False, "error": "Invalid cursor"}), 400
+
+    pips, total, next_cursor = _pip_list_page(filters, cursor, per_page)
+
+    return jsonify({
+        "success": True,
+        "total": total,
+        "next_cursor": next_cursor,
+        "next_url": _pip_list_url('pip.pip_list_json', filters, per_page, next_cursor) if next_cursor else None,
+        "items": [
+            {
+                "id": pip.id,
+                "employee": {
+                    "id": pip.employee.id,
+                    "first_name": pip.employee.first_name,
+                    "last_name": pip.employee.last_name,
+                    "job_title": pip.employee.job_title,
+                },
+                "concern_category": pip.concern_category,
+                "severity": pip.severity,
+                "status": pip.status,
+                "start_date": pip.start_date.isoformat() if pip.start_date else None,
+                "review_date": pip.review_date.isoformat() if pip.review_date else None,
+                "url": url_for('pip.pip_detail', id=pip.id),
+            }
+            for pip in pips
+        ],
+    })
+
+
 @pip_bp.route('/pip/select-employee', methods=['GET', 'POST'])
 @login_required
 def select_employee_for_pip():
-    employees = _active_employee_query().all()
-
     if request.method == 'POST':
-        employee_id = request.form.get('employee_id')
+        employee_id = request.form.get('employee_id', type=int)
+        if not employee_id:
+            flash('Please select an employee.', 'warning')
+            return redirect(url_for('pip.select_employee_for_pip'))
         return redirect(url_for('pip.create_pip', employee_id=employee_id))
 
-    return render_template('pip_select_employee.html', employees=employees)
+    return render_template('pip_select_employee.html', employees=[])
 
 
 @pip_bp.route('/pip/create-wizard', methods=['GET', 'POST'])
@@ -1099,6 +1203,7 @@ def create_pip_wizard():
 
                 db.session.add(pip)
                 db.session.commit()
+                invalidate_pip_filter_options()
 
                 for item_text in items:
                     action = PIPActionItem(pip_record_id=pip.id, description=item_text)
@@ -1146,7 +1251,7 @@ def create_pip_wizard():
     except (TypeError, ValueError):
         selected_employee_id = None
 
-    employees = _active_employee_query(include_employee_id=selected_employee_id).all() if step == 1 else []
+    employees = selected_employee_options(_scoped_employee_query(), selected_employee_id) if step == 1 else []
     max_allowed = _max_wizard_step(data)
     draft = get_active_draft_for_user(current_user.id)
 
@@ -1249,20 +1354,6 @@ def suggest_actions_ai():
     except Exception:
         prior_actions = []
 
-    def _dedupe_clean(items, cap=None):
-        out, seen = [], set()
-        for x in (items or []):
-            s = (x or "").strip()
-            if not s:
-                continue
-            k = s.lower()
-            if k not in seen:
-                out.append(s)
-                seen.add(k)
-            if cap and len(out) >= cap:
-                break
-        return out
-
     sys_msg = (
         "You are an HR advisor in the UK.\n"
         "Return ONLY valid JSON with two arrays:\n"
@@ -1273,8 +1364,7 @@ def suggest_actions_ai():
 
     prior_block = ""
     if prior_actions:
-        import json as _json
-        prior_block = "Seed actions (consider and adapt as appropriate): " + _json.dumps(
+        prior_block = "Seed actions (consider and adapt as appropriate): " + json.dumps(
             prior_actions, ensure_ascii=False
         )
 
@@ -1294,55 +1384,53 @@ Rules:
 - JSON ONLY.
 """
 
-    actions_llm, next_up_llm, raw = [], [], ""
-
-    def _extract_text_from_choice(choice):
-        content = getattr(choice.message, "content", "")
-        if isinstance(content, str):
-            return content
-        if isinstance(content, list):
-            parts = []
-            for part in content:
-                if isinstance(part, dict):
-                    text = part.get("text")
-                    if isinstance(text, dict):
-                        parts.append(str(text.get("value", "")))
-                    elif text is not None:
-                        parts.append(str(text))
-                else:
-                    parts.append(str(part))
-            return "".join(parts)
-        return str(content or "")
-
-    try:
-        client = get_openai_client()
-        resp = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
+    job = submit_ai_job(
+        "pip_action_suggestions",
+        {
+            "model": "gpt-4o-mini",
+            "messages": [
                 {"role": "system", "content": sys_msg},
                 {"role": "user", "content": user_msg},
             ],
-            temperature=0.5,
-            max_tokens=300,
-        )
+            "temperature": 0.5,
+            "max_tokens": 300,
+        },
+        user=current_user,
+        context={
+            "prior_actions": prior_actions,
+            "tags": tags,
+            "category": category,
+            "severity": severity,
+            "frequency": frequency,
+        },
+        force=force_regenerate_requested(),
+    )
+    return ai_job_response(job)
 
-        raw = _extract_text_from_choice(resp.choices[0]).strip()
 
-        import json as _json, re as _re
-        m = _re.search(r"\{[\s\S]*\}", raw)
-        json_str = m.group(0) if m else raw
-        payload = _json.loads(json_str)
+def _dedupe_clean(items, cap=None):
+    out, seen = [], set()
+    for x in (items or []):
+        s = (x or "").strip()
+        if not s:
+            continue
+        k = s.lower()
+        if k not in seen:
+            out.append(s)
+            seen.add(k)
+        if cap and len(out) >= cap:
+            break
+    return out
 
-        actions_llm = payload.get("actions", []) or []
-        next_up_llm = payload.get("next_up", []) or []
-    except Exception as exc:
-        message = _friendly_ai_error_message(exc)
-        return jsonify({
-            "success": False,
-            "message": message,
-            "actions": [],
-            "next_up": [],
-        }), 500
+
+def _save_action_suggestions(job, content, context):
+    m = re.search(r"\{[\s\S]*\}", content)
+    payload = json.loads(m.group(0) if m else content)
+
+    actions_llm = payload.get("actions", []) or []
+    next_up_llm = payload.get("next_up", []) or []
+    prior_actions = context.get("prior_actions") or []
+    tags = context.get("tags") or ""
 
     merged_actions = _dedupe_clean(actions_llm, cap=None)
     if prior_actions:
@@ -1351,9 +1439,9 @@ Rules:
     next_up = _dedupe_clean(next_up_llm, cap=None)
 
     tag_list = [t.strip().lower() for t in tags.split(",")] if tags else []
-    cat = (category or "").lower()
-    sev = (severity or "").lower()
-    freq = (frequency or "").lower()
+    cat = (context.get("category") or "").lower()
+    sev = (context.get("severity") or "").lower()
+    freq = (context.get("frequency") or "").lower()
 
     enrich = []
     if 'lateness' in tag_list or 'timekeeping' in cat:
@@ -1366,7 +1454,7 @@ Rules:
             "Reference conduct policy; document conversations",
             "Book values/behaviour refresher",
         ]
-    if 'performance' in cat or ('missed deadlines' in (tags or '').lower()):
+    if 'performance' in cat or ('missed deadlines' in tags.lower()):
         enrich += [
             "Weekly milestones with due dates",
             "Stand-up updates Mon/Wed/Fri",
@@ -1381,16 +1469,21 @@ Rules:
     merged_actions = merged_actions[:8] if merged_actions else []
     next_up = next_up[:8] if next_up else []
 
-    try:
-        log_security_event(
-            event_type="PIP AI Suggestions Generated",
-            notes="Action suggestions generated in PIP wizard",
-            updated_by=current_user.username,
-        )
-    except Exception:
-        pass
+    log_security_event(
+        event_type="PIP AI Suggestions Generated",
+        notes=(
+            "Cached action suggestions reused in PIP wizard"
+            if context.get("cached")
+            else "Action suggestions generated in PIP wizard"
+        ),
+        updated_by=job.created_by,
+        commit=False,
+    )
+
+    return {"actions": merged_actions, "next_up": next_up}
+
 
-    return jsonify({"success": True, "actions": merged_actions, "next_up": next_up}), 200
+register_ai_job_handler("pip_action_suggestions", _save_action_suggestions, _friendly_ai_error_message)
 
 
 @pip_bp.route('/dismiss_draft', methods=['POST'])
@@ -11,6 +11,7 @@ from pip_app.security import (
     require_probation_access,
     scoped_employee_query,
 )
+from pip_app.services.employee_typeahead import selected_employee_options
 from pip_app.services.time_utils import today_local
 
 probation_bp = Blueprint("probation", __name__)
@@ -55,6 +56,7 @@ def _active_employee_query(include_employee_id=None):
     return q.order_by(Employee.last_name.asc(), Employee.first_name.asc())
 
 
+
 @probation_bp.route("/probation/create-wizard", methods=["GET"])
 @login_required
 def probation_create_wizard():
@@ -70,7 +72,7 @@ def probation_create_wizard():
     except (TypeError, ValueError):
         selected_employee_id = None
 
-    employees = _active_employee_query(include_employee_id=selected_employee_id).all()
+    employees = selected_employee_options(_scoped_employee_query(), selected_employee_id)
 
     return render_template(
         "probation_create_wizard.html",
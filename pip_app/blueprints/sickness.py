@@ -9,8 +9,13 @@ from wtforms import DateField, SelectField, SubmitField, TextAreaField
 from wtforms.validators import DataRequired
 
 from forms import SicknessMeetingForm
-from models import db, Employee, SicknessCase, SicknessMeeting, TimelineEvent
-from pip_app.services.sickness_metrics import compute_sickness_trigger_metrics
+from models import db, Employee, SicknessCase, SicknessMeeting, SicknessSummary, TimelineEvent
+from pip_app.services.loader_profiles import with_loader_profile
+from pip_app.services.sickness_summaries import (
+    refresh_employee_sickness_summary,
+    sickness_triggers_from_summaries,
+    warn_if_sickness_summaries_stale,
+)
 from pip_app.services.time_utils import today_local
 
 sickness_bp = Blueprint("sickness", __name__)
@@ -95,15 +100,21 @@ def sickness_dashboard():
         ).count()
     )
 
-    potential_triggers = compute_sickness_trigger_metrics(
-        q_cases,
-        today=today,
-        window_days=365,
+    warn_if_sickness_summaries_stale(today=today)
+
+    q_summaries = SicknessSummary.query.join(Employee)
+    if current_user.admin_level == 0:
+        q_summaries = q_summaries.filter(Employee.team_id == current_user.team_id)
+    if service_filter:
+        q_summaries = q_summaries.filter(Employee.service == service_filter)
+
+    potential_triggers = sickness_triggers_from_summaries(
+        q_summaries,
+        band=severity_filter if severity_filter in {"high", "medium"} else None,
         bradford_medium=200,
         bradford_high=400,
         episodes_threshold=3,
         total_days_threshold=14,
-        long_term_days=28,
     )
 
     if severity_filter in {"high", "medium", "low"}:
@@ -229,6 +240,8 @@ def sickness_create_for_employee(employee_id):
             status=form.status.data,
         )
         db.session.add(case)
+        db.session.flush()
+        refresh_employee_sickness_summary(employee.id, today=today_local())
         db.session.commit()
         flash("Sickness case created.", "success")
         return redirect(url_for("sickness.sickness_dashboard"))
@@ -297,6 +310,7 @@ def create_sickness_case(employee_id):
         )
         db.session.add(case)
         db.session.flush()
+        refresh_employee_sickness_summary(employee.id, today=today_local())
 
         event = TimelineEvent(
             pip_record_id=None,
@@ -327,13 +341,13 @@ def view_sickness_case(case_id):
 
     from app import today_local  # safe during hybrid phase
 
-    case = SicknessCase.query.get_or_404(case_id)
-    employee = case.employee
-    meetings = (
-        SicknessMeeting.query.filter_by(sickness_case_id=case.id)
-        .order_by(SicknessMeeting.meeting_date.asc())
-        .all()
+    case = (
+        with_loader_profile(SicknessCase.query, SicknessCase)
+        .filter(SicknessCase.id == case_id)
+        .first_or_404()
     )
+    employee = case.employee
+    meetings = sorted(case.meetings, key=lambda m: (m.meeting_date, m.id))
 
     today = today_local()
 
@@ -403,6 +417,8 @@ def update_sickness_status(case_id, new_status):
 
     case.status = new_status
     db.session.add(case)
+    db.session.flush()
+    refresh_employee_sickness_summary(case.employee_id, today=today_local())
 
     event = TimelineEvent(
         pip_record_id=None,
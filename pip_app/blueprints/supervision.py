@@ -17,7 +17,12 @@ from models import (
     db,
 )
 from pip_app.security import require_employee_access, scoped_employee_query
+from pip_app.services.loader_profiles import with_loader_profile
 from pip_app.services.module_settings import get_enabled_modules
+from pip_app.services.supervision_coverage import (
+    count_employees_missing_supervision,
+    list_employees_missing_supervision,
+)
 from pip_app.services.time_utils import today_local
 
 
@@ -135,13 +140,7 @@ def _scoped_action_query():
 
 def _get_supervision_or_404(supervision_id):
     supervision = (
-        _scoped_supervision_query()
-        .options(
-            joinedload(SupervisionRecord.employee),
-            joinedload(SupervisionRecord.manager),
-            joinedload(SupervisionRecord.actions),
-            joinedload(SupervisionRecord.timeline_events),
-        )
+        with_loader_profile(_scoped_supervision_query(), SupervisionRecord)
         .filter(SupervisionRecord.id == supervision_id)
         .first_or_404()
     )
@@ -387,25 +386,15 @@ def dashboard():
         .count()
     )
 
-    active_employees = _active_employee_query().all()
-    missing_supervision = []
-
-    for employee in active_employees:
-        latest = (
-            _scoped_supervision_query()
-            .filter(SupervisionRecord.employee_id == employee.id)
-            .order_by(SupervisionRecord.meeting_date.desc())
-            .first()
-        )
-        if latest is None or latest.meeting_date < missing_cutoff:
-            missing_supervision.append(
-                {
-                    "employee": employee,
-                    "latest": latest,
-                }
-            )
-
-    missing_supervision = missing_supervision[:10]
+    missing_supervision_count = count_employees_missing_supervision(
+        _active_employee_query(),
+        cutoff=missing_cutoff,
+    )
+    missing_supervision = list_employees_missing_supervision(
+        _active_employee_query(),
+        cutoff=missing_cutoff,
+        limit=10,
+    )
 
     stats = {
         "scheduled": scheduled_count,
@@ -415,7 +404,7 @@ def dashboard():
             SupervisionAction.status.in_(["Open", "Carried Forward"])
         ).count(),
         "actions_due_soon": actions_due_soon_count,
-        "missing_supervision": len(missing_supervision),
+        "missing_supervision": missing_supervision_count,
     }
 
     return render_template(
@@ -1,6 +1,7 @@
 from pip_app.extensions import db
 from flask_login import UserMixin
 from datetime import datetime
+from sqlalchemy import DDL, event
 from sqlalchemy.dialects.sqlite import JSON
 from sqlalchemy.sql import func
 import json  # needed for ImportJob.errors()
@@ -48,7 +49,6 @@ class Employee(db.Model):
         db.Integer,
         db.ForeignKey("organisations.id"),
         nullable=True,
-        index=True,
     )
 
     first_name = db.Column(db.String(100))
@@ -83,6 +83,11 @@ class Employee(db.Model):
 
     pips = db.relationship("PIPRecord", back_populates="employee", lazy=True)
 
+    __table_args__ = (
+        # Leading organisation_id also serves org-only lookups.
+        db.Index("ix_employee_org_team_leaver", "organisation_id", "team_id", "is_leaver"),
+    )
+
     @property
     def full_name(self):
         return f"{self.first_name or ''} {self.last_name or ''}".strip()
@@ -163,6 +168,11 @@ class PIPRecord(db.Model):
         order_by="desc(AdvisorEscalation.created_at)",
     )
 
+    __table_args__ = (
+        db.Index("ix_pip_record_status_review_date", "status", "review_date"),
+        db.Index("ix_pip_record_employee_id", "employee_id"),
+    )
+
 
 class PIPActionItem(db.Model):
     __tablename__ = "pip_action_item"
@@ -193,6 +203,10 @@ class TimelineEvent(db.Model):
 
     pip_record = db.relationship("PIPRecord", back_populates="timeline_events")
 
+    __table_args__ = (
+        db.Index("ix_timeline_event_pip_timestamp", "pip_record_id", "timestamp"),
+    )
+
 
 class ProbationRecord(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -311,6 +325,100 @@ class ImportJob(db.Model):
             return []
 
 
+class ExportJob(db.Model):
+    __tablename__ = "export_jobs"
+    id = db.Column(db.Integer, primary_key=True)
+    created_at = db.Column(
+        db.DateTime, nullable=False, default=datetime.utcnow
+    )
+    created_by = db.Column(db.String(120), nullable=False)
+    status = db.Column(db.String(20), nullable=False, default="queued", index=True)
+    tables_total = db.Column(db.Integer, nullable=False, default=0)
+    tables_done = db.Column(db.Integer, nullable=False, default=0)
+    rows_exported = db.Column(db.Integer, nullable=False, default=0)
+    progress_json = db.Column(db.Text, nullable=True)
+    file_path = db.Column(db.String(255), nullable=True)
+    file_size = db.Column(db.BigInteger, nullable=True)
+    error = db.Column(db.Text, nullable=True)
+    started_at = db.Column(db.DateTime, nullable=True)
+    completed_at = db.Column(db.DateTime, nullable=True)
+
+    def progress(self):
+        try:
+            return json.loads(self.progress_json or "{}")
+        except Exception:
+            return {}
+
+
+class AIJob(db.Model):
+    """An LLM call queued from a request and completed by the AI worker pool.
+
+    ``request_json`` holds the chat completion arguments plus a ``context``
+    dict for the kind's result handler; once the job finishes only the
+    ``model`` and ``context`` are kept. ``record_id`` is the PIP or ER case
+    the result is written back to, when there is one.
+    """
+
+    __tablename__ = "ai_jobs"
+    __table_args__ = (
+        db.Index("ix_ai_jobs_kind_record_status", "kind", "record_id", "status"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(50), nullable=False)
+    record_id = db.Column(db.Integer, nullable=True)
+    user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=True, index=True)
+    organisation_id = db.Column(db.Integer, db.ForeignKey("organisations.id"), nullable=True)
+    created_by = db.Column(db.String(120), nullable=True)
+    status = db.Column(db.String(20), nullable=False, default="queued", index=True)
+    request_json = db.Column(db.Text, nullable=False)
+    result_json = db.Column(db.Text, nullable=True)
+    error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime, nullable=True)
+    completed_at = db.Column(db.DateTime, nullable=True)
+
+    def request_payload(self):
+        try:
+            return json.loads(self.request_json or "{}")
+        except Exception:
+            return {}
+
+    def result(self):
+        try:
+            return json.loads(self.result_json or "null")
+        except Exception:
+            return None
+
+    def __repr__(self):
+        return f"<AIJob {self.id} kind={self.kind} record={self.record_id} status={self.status}>"
+
+
+class LLMResponseCacheEntry(db.Model):
+    """A stored model answer, reused when the same prompt is sent again.
+
+    Keyed by model, temperature and ``prompt_hash``, the sha256 of the
+    messages plus any other arguments that change the answer.
+    """
+
+    __tablename__ = "llm_response_cache"
+    __table_args__ = (
+        db.UniqueConstraint("model", "temperature", "prompt_hash", name="uq_llm_response_cache_key"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    model = db.Column(db.String(100), nullable=False)
+    temperature = db.Column(db.Float, nullable=False)
+    prompt_hash = db.Column(db.String(64), nullable=False)
+    response_text = db.Column(db.Text, nullable=False)
+    hit_count = db.Column(db.Integer, nullable=False, default=0)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    last_used_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
+
+    def __repr__(self):
+        return f"<LLMResponseCacheEntry {self.id} model={self.model} hash={self.prompt_hash[:12]} hits={self.hit_count}>"
+
+
 class DocumentFile(db.Model):
     __tablename__ = "document_files"
 
@@ -392,6 +500,10 @@ class SicknessCase(db.Model):
         lazy=True,
     )
 
+    __table_args__ = (
+        db.Index("ix_sickness_cases_status_start_date", "status", "start_date"),
+    )
+
     def __repr__(self):
         return f"<SicknessCase {self.id} emp={self.employee_id} status={self.status}>"
 
@@ -407,7 +519,7 @@ class SicknessMeeting(db.Model):
         index=True,
     )
 
-    meeting_date = db.Column(db.Date, nullable=False)
+    meeting_date = db.Column(db.Date, nullable=False, index=True)
     meeting_type = db.Column(
         db.String(50), nullable=False
     )
@@ -427,6 +539,42 @@ class SicknessMeeting(db.Model):
         return f"<SicknessMeeting {self.id} case={self.sickness_case_id} type={self.meeting_type}>"
 
 
+class SicknessSummary(db.Model):
+    """Rolling-window absence totals per employee, kept current on write.
+
+    ``window_end`` is the date the 365-day window was last rolled to; rows
+    are refreshed when that employee's cases change and rolled forward by
+    the nightly ``roll-sickness-summaries`` command.
+    """
+    __tablename__ = "sickness_summaries"
+
+    employee_id = db.Column(
+        db.Integer,
+        db.ForeignKey("employee.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    window_end = db.Column(db.Date, nullable=False, index=True)
+
+    episodes = db.Column(db.Integer, nullable=False, default=0)
+    total_days = db.Column(db.Integer, nullable=False, default=0)
+    bradford = db.Column(db.Integer, nullable=False, default=0, index=True)
+    bradford_band = db.Column(db.String(16), nullable=False, default="low", index=True)
+    longest_spell_days = db.Column(db.Integer, nullable=False, default=0)
+    has_long_term = db.Column(db.Boolean, nullable=False, default=False)
+
+    updated_at = db.Column(
+        db.DateTime,
+        default=datetime.utcnow,
+        onupdate=datetime.utcnow,
+        nullable=False,
+    )
+
+    employee = db.relationship("Employee")
+
+    def __repr__(self):
+        return f"<SicknessSummary employee={self.employee_id} bradford={self.bradford}>"
+
+
 class EmployeeRelationsCase(db.Model):
     __tablename__ = "employee_relations_cases"
 
@@ -444,7 +592,7 @@ class EmployeeRelationsCase(db.Model):
     date_raised = db.Column(db.Date, nullable=False)
     raised_by = db.Column(db.String(120), nullable=True)
 
-    status = db.Column(db.String(50), nullable=False, default="Draft", index=True)
+    status = db.Column(db.String(50), nullable=False, default="Draft")
     stage = db.Column(db.String(100), nullable=False, default="Allegation Logged")
     priority_level = db.Column(db.String(50), nullable=True)
 
@@ -575,6 +723,10 @@ class EmployeeRelationsCase(db.Model):
         order_by="desc(AdvisorEscalation.created_at)",
     )
 
+    __table_args__ = (
+        db.Index("ix_employee_relations_cases_status_next_action", "status", "next_action_date"),
+    )
+
     def __repr__(self):
         return f"<EmployeeRelationsCase {self.id} type={self.case_type} status={self.status}>"
 
@@ -1207,6 +1359,14 @@ class SupervisionRecord(db.Model):
         order_by="desc(SupervisionTimelineEvent.timestamp)",
     )
 
+    __table_args__ = (
+        db.Index(
+            "ix_supervision_records_employee_meeting_date",
+            "employee_id",
+            "meeting_date",
+        ),
+    )
+
     def is_open(self):
         return self.status in {"Draft", "Scheduled", "Overdue"}
 
@@ -1249,7 +1409,7 @@ class SupervisionAction(db.Model):
     owner_name = db.Column(db.String(120), nullable=True)
 
     due_date = db.Column(db.Date, nullable=True, index=True)
-    status = db.Column(db.String(50), nullable=False, default="Open", index=True)
+    status = db.Column(db.String(50), nullable=False, default="Open")
     completion_notes = db.Column(db.Text, nullable=True)
 
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
@@ -1276,6 +1436,10 @@ class SupervisionAction(db.Model):
         back_populates="actions",
     )
 
+    __table_args__ = (
+        db.Index("ix_supervision_actions_status_due_date", "status", "due_date"),
+    )
+
     def is_open(self):
         return self.status in {"Open", "Carried Forward"}
 
@@ -1391,4 +1555,95 @@ class SupervisionTimelineEvent(db.Model):
         return (
             f"<SupervisionTimelineEvent id={self.id} "
             f"supervision_id={self.supervision_id} type={self.event_type}>"
-        )
\ No newline at end of file
+        )
+
+class SearchDocument(db.Model):
+    """Denormalised search text for one PIP, ER, sickness or supervision record.
+
+    Rows are rebuilt on commit by ``pip_app.services.search_index``. The
+    full-text index lives outside the model: a generated ``search_vector``
+    tsvector column with a GIN index on PostgreSQL, and the
+    ``search_documents_fts`` FTS5 table (kept in sync by triggers) on SQLite.
+    """
+    __tablename__ = "search_documents"
+    __table_args__ = (
+        db.UniqueConstraint("record_type", "record_id", name="uq_search_documents_record"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    record_type = db.Column(db.String(30), nullable=False)
+    record_id = db.Column(db.Integer, nullable=False)
+
+    employee_id = db.Column(
+        db.Integer,
+        db.ForeignKey("employee.id", ondelete="CASCADE"),
+        nullable=False,
+        index=True,
+    )
+
+    title = db.Column(db.String(255), nullable=False)
+    body = db.Column(db.Text, nullable=True)
+
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    employee = db.relationship("Employee")
+
+    def __repr__(self):
+        return f"<SearchDocument {self.record_type}:{self.record_id}>"
+
+
+# The full-text index is created with the table, so databases built with
+# db.create_all() (seed_data.py, tests) match migration f5c1a8e7b392.
+SEARCH_INDEX_DDL = {
+    "postgresql": (
+        """
+        ALTER TABLE search_documents ADD COLUMN search_vector tsvector
+        GENERATED ALWAYS AS (
+            setweight(to_tsvector('english', coalesce(title, '')), 'A')
+            || setweight(to_tsvector('english', coalesce(body, '')), 'B')
+        ) STORED
+        """,
+        "CREATE INDEX ix_search_documents_search_vector "
+        "ON search_documents USING gin (search_vector)",
+    ),
+    "sqlite": (
+        """
+        CREATE VIRTUAL TABLE search_documents_fts USING fts5(
+            title, body,
+            content='search_documents', content_rowid='id',
+            tokenize='porter unicode61'
+        )
+        """,
+        """
+        CREATE TRIGGER search_documents_ai AFTER INSERT ON search_documents BEGIN
+            INSERT INTO search_documents_fts(rowid, title, body)
+            VALUES (new.id, new.title, new.body);
+        END
+        """,
+        """
+        CREATE TRIGGER search_documents_ad AFTER DELETE ON search_documents BEGIN
+            INSERT INTO search_documents_fts(search_documents_fts, rowid, title, body)
+            VALUES ('delete', old.id, old.title, old.body);
+        END
+        """,
+        """
+        CREATE TRIGGER search_documents_au AFTER UPDATE ON search_documents BEGIN
+            INSERT INTO search_documents_fts(search_documents_fts, rowid, title, body)
+            VALUES ('delete', old.id, old.title, old.body);
+            INSERT INTO search_documents_fts(rowid, title, body)
+            VALUES (new.id, new.title, new.body);
+        END
+        """,
+    ),
+}
+
+for _dialect, _statements in SEARCH_INDEX_DDL.items():
+    for _statement in _statements:
+        event.listen(SearchDocument.__table__, "after_create", DDL(_statement).execute_if(dialect=_dialect))
+
+# drop_all() drops search_documents; the FTS5 table and its triggers go with it.
+event.listen(
+    SearchDocument.__table__,
+    "before_drop",
+    DDL("DROP TABLE IF EXISTS search_documents_fts").execute_if(dialect="sqlite"),
+)
@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+import atexit
+import json
+import logging
+import os
+import queue
+import random
+import sys
+import time
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+from flask import g, request
+from flask_login import current_user
+
+from pip_app.services.request_metrics import get_request_query_count
+
+ACCESS_LOGGER_NAME = "pip_app.access"
+DEFAULT_HEALTH_PATHS = ("/health", "/db-health", "/ping")
+DEFAULT_HEALTH_SAMPLE_RATE = float(os.environ.get("ACCESS_LOG_HEALTH_SAMPLE_RATE", "0.01"))
+
+_listener = None
+
+
+class JsonAccessFormatter(logging.Formatter):
+    """Render the ``access`` dict attached to a record as one JSON line."""
+
+    def format(self, record):
+        payload = getattr(record, "access", None)
+        if payload is None:
+            payload = {"message": record.getMessage()}
+        return json.dumps(payload, default=str, separators=(",", ":"))
+
+
+def _start_listener(handler):
+    global _listener
+    if _listener is not None:
+        return _listener.queue
+
+    log_queue = queue.SimpleQueue()
+    _listener = QueueListener(log_queue, handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(stop_access_log)
+    return log_queue
+
+
+def stop_access_log():
+    """Flush queued access log lines and stop the writer thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def _should_log(app, path, status):
+    if path not in app.config["ACCESS_LOG_HEALTH_PATHS"] or status >= 500:
+        return True
+    return random.random() < app.config["ACCESS_LOG_HEALTH_SAMPLE_RATE"]
+
+
+def _current_identity():
+    if not current_user.is_authenticated:
+        return None, None
+    return current_user.id, getattr(current_user, "organisation_id", None)
+
+
+def init_access_log(app, handler=None):
+    """Write one JSON line per request from a background thread.
+
+    Request threads only put records on a queue; a ``QueueListener`` does the
+    I/O through ``handler`` (stderr by default). Health probe paths are
+    sampled at ``ACCESS_LOG_HEALTH_SAMPLE_RATE`` unless they fail.
+    """
+    app.config.setdefault("ACCESS_LOG_ENABLED", True)
+    app.config.setdefault("ACCESS_LOG_HEALTH_PATHS", DEFAULT_HEALTH_PATHS)
+    app.config.setdefault("ACCESS_LOG_HEALTH_SAMPLE_RATE", DEFAULT_HEALTH_SAMPLE_RATE)
+
+    if not app.config["ACCESS_LOG_ENABLED"]:
+        return
+
+    if handler is None:
+        handler = logging.StreamHandler(sys.stderr)
+    handler.setFormatter(JsonAccessFormatter())
+
+    access_logger = logging.getLogger(ACCESS_LOGGER_NAME)
+    access_logger.setLevel(logging.INFO)
+    access_logger.propagate = False
+    if not any(isinstance(h, QueueHandler) for h in access_logger.handlers):
+        access_logger.addHandler(QueueHandler(_start_listener(handler)))
+
+    @app.before_request
+    def start_access_log_timer():
+        g.access_log_started = time.perf_counter()
+
+    @app.after_request
+    def write_access_log(response):
+        started = g.get("access_log_started")
+        if started is None or not _should_log(app, request.path, response.status_code):
+            return response
+
+        user_id, organisation_id = _current_identity()
+        access_logger.info(
+            "access",
+            extra={
+                "access": {
+                    "ts": datetime.now(timezone.utc).isoformat(timespec="milliseconds"),
+                    "method": request.method,
+                    "path": request.path,
+                    "endpoint": request.endpoint,
+                    "status": response.status_code,
+                    "duration_ms": round((time.perf_counter() - started) * 1000, 1),
+                    "queries": get_request_query_count(),
+                    "user_id": user_id,
+                    "organisation_id": organisation_id,
+                    "remote_addr": request.remote_addr,
+                    # Asking a streamed response for its length would
+                    # buffer the whole stream first.
+                    "bytes": response.calculate_content_length() if response.is_sequence else None,
+                }
+            },
+        )
+        return response
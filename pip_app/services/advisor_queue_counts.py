@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+import threading
+import time
+
+from sqlalchemy import and_, case, func
+
+from models import AdvisorEscalation, db
+
+QUEUE_STATUSES = ("submitted", "acknowledged", "in_review")
+
+# Counts are adjusted in place when escalations change in this process and
+# fully recomputed from the database at most this often, which picks up
+# changes made by other workers.
+RECONCILE_INTERVAL_SECONDS = 300
+
+ALL_ORGANISATIONS = "__all__"
+
+_queue_counts = {}
+_queue_counts_lock = threading.Lock()
+
+
+def empty_queue_counts():
+    return {"open": 0, "unassigned": 0}
+
+
+def escalation_queue_state(escalation):
+    """Capture the fields that decide how an escalation counts in the queue."""
+    if escalation is None:
+        return None
+    return (
+        escalation.organisation_id,
+        escalation.status,
+        escalation.assigned_to_user_id,
+    )
+
+
+def _contribution(state):
+    if state is None:
+        return 0, 0
+
+    _organisation_id, status, assigned_to_user_id = state
+    if status not in QUEUE_STATUSES:
+        return 0, 0
+
+    return 1, 1 if assigned_to_user_id is None else 0
+
+
+def _cache_keys(state):
+    if state is None:
+        return set()
+    organisation_id = state[0]
+    return {ALL_ORGANISATIONS, organisation_id if organisation_id is not None else ALL_ORGANISATIONS}
+
+
+def _query_counts(organisation_id):
+    in_queue = AdvisorEscalation.status.in_(QUEUE_STATUSES)
+    query = db.session.query(
+        func.coalesce(func.sum(case((in_queue, 1), else_=0)), 0),
+        func.coalesce(
+            func.sum(
+                case(
+                    (and_(in_queue, AdvisorEscalation.assigned_to_user_id.is_(None)), 1),
+                    else_=0,
+                )
+            ),
+            0,
+        ),
+    )
+
+    if organisation_id != ALL_ORGANISATIONS:
+        query = query.filter(AdvisorEscalation.organisation_id == organisation_id)
+
+    open_count, unassigned_count = query.one()
+    return {"open": int(open_count or 0), "unassigned": int(unassigned_count or 0)}
+
+
+def reconcile_advisor_queue_counts(organisation_id=None):
+    key = organisation_id or ALL_ORGANISATIONS
+    counts = _query_counts(key)
+
+    with _queue_counts_lock:
+        _queue_counts[key] = {
+            "counts": counts,
+            "reconciled_at": time.monotonic(),
+        }
+
+    return dict(counts)
+
+
+def get_advisor_queue_counts(organisation_id=None):
+    """Return ``{"open": n, "unassigned": n}`` for an organisation's queue.
+
+    ``organisation_id=None`` covers escalations across all organisations,
+    matching the unscoped admin view.
+    """
+    key = organisation_id or ALL_ORGANISATIONS
+    entry = _queue_counts.get(key)
+
+    if entry is None or time.monotonic() - entry["reconciled_at"] > RECONCILE_INTERVAL_SECONDS:
+        return reconcile_advisor_queue_counts(organisation_id)
+
+    return dict(entry["counts"])
+
+
+def record_escalation_change(before_state, after_state):
+    """Apply the queue delta between two escalation states.
+
+    Call after the change has been committed. ``before_state`` is None for a
+    newly created escalation. Organisations that are not cached yet are left
+    alone; they are loaded fresh on first read.
+    """
+    before_open, before_unassigned = _contribution(before_state)
+    after_open, after_unassigned = _contribution(after_state)
+
+    with _queue_counts_lock:
+        for key in _cache_keys(before_state):
+            entry = _queue_counts.get(key)
+            if entry is not None:
+                entry["counts"]["open"] -= before_open
+                entry["counts"]["unassigned"] -= before_unassigned
+
+        for key in _cache_keys(after_state):
+            entry = _queue_counts.get(key)
+            if entry is not None:
+                entry["counts"]["open"] += after_open
+                entry["counts"]["unassigned"] += after_unassigned
@@ -0,0 +1,319 @@
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from types import SimpleNamespace
+
+import httpx
+from openai import DefaultHttpxClient, OpenAI
+
+logger = logging.getLogger(__name__)
+
+OPENAI_CONNECT_TIMEOUT = float(os.environ.get("OPENAI_CONNECT_TIMEOUT", "5"))
+OPENAI_READ_TIMEOUT = float(os.environ.get("OPENAI_READ_TIMEOUT", "60"))
+# Retries use the SDK's exponential backoff (0.5s doubling to 8s, with
+# jitter, honouring Retry-After) on connection errors, 408, 409, 429 and 5xx.
+OPENAI_MAX_RETRIES = int(os.environ.get("OPENAI_MAX_RETRIES", "3"))
+OPENAI_MAX_CONCURRENCY = int(os.environ.get("OPENAI_MAX_CONCURRENCY", "4"))
+OPENAI_QUEUE_TIMEOUT = float(os.environ.get("OPENAI_QUEUE_TIMEOUT", "30"))
+
+AI_LATENCY_SAMPLES_PER_MODEL = 500
+
+_clients = {}
+_clients_lock = threading.Lock()
+_client_override = None
+
+# Bounds in-flight calls from this process, whichever thread makes them.
+_call_slots = threading.BoundedSemaphore(OPENAI_MAX_CONCURRENCY)
+
+_metrics = {}
+_metrics_lock = threading.Lock()
+_in_flight = 0
+_upstream_statuses = {"rate_limited": 0, "server_errors": 0}
+
+
+class AICapacityError(RuntimeError):
+    """Raised when no AI call slot frees up within OPENAI_QUEUE_TIMEOUT."""
+
+
+def _count_upstream_status(response):
+    if response.status_code == 429:
+        key = "rate_limited"
+    elif response.status_code >= 500:
+        key = "server_errors"
+    else:
+        return
+    with _metrics_lock:
+        _upstream_statuses[key] += 1
+
+
+def _build_client(api_key, base_url):
+    http_client = DefaultHttpxClient(
+        limits=httpx.Limits(
+            max_connections=OPENAI_MAX_CONCURRENCY * 2,
+            max_keepalive_connections=OPENAI_MAX_CONCURRENCY,
+            keepalive_expiry=60,
+        ),
+        event_hooks={"response": [_count_upstream_status]},
+    )
+    return OpenAI(
+        api_key=api_key,
+        base_url=base_url,
+        timeout=httpx.Timeout(OPENAI_READ_TIMEOUT, connect=OPENAI_CONNECT_TIMEOUT),
+        max_retries=OPENAI_MAX_RETRIES,
+        http_client=http_client,
+    )
+
+
+def get_openai_client():
+    """Return the process-wide client, creating it on first use.
+
+    One client (and so one keep-alive connection pool) is kept per API key
+    and base URL. A client installed with ``set_ai_client_override`` wins.
+    """
+    if _client_override is not None:
+        return _client_override
+
+    api_key = os.environ.get("OPENAI_API_KEY", "").strip()
+    if not api_key:
+        raise RuntimeError(
+            "OPENAI_API_KEY is not configured. "
+            "Set a valid API key before using AI-powered features."
+        )
+    # OPENAI_BASE_URL points the client at any OpenAI-compatible server,
+    # e.g. stub_llm_server.py in development and tests.
+    base_url = os.environ.get("OPENAI_BASE_URL", "").strip() or None
+
+    key = (api_key, base_url)
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            client = _clients[key] = _build_client(api_key, base_url)
+    return client
+
+
+def set_ai_client_override(client):
+    """Use ``client`` for every AI call in this process (None to clear)."""
+    global _client_override
+    _client_override = client
+
+
+@contextmanager
+def ai_client_override(client):
+    previous = _client_override
+    set_ai_client_override(client)
+    try:
+        yield client
+    finally:
+        set_ai_client_override(previous)
+
+
+def close_ai_clients():
+    with _clients_lock:
+        clients = list(_clients.values())
+        _clients.clear()
+    for client in clients:
+        client.close()
+
+
+@contextmanager
+def _call_slot(model):
+    """Hold one of the OPENAI_MAX_CONCURRENCY slots; yields the wait in ms."""
+    global _in_flight
+
+    queued = time.perf_counter()
+    if not _call_slots.acquire(timeout=OPENAI_QUEUE_TIMEOUT):
+        _record_call(model, 0.0, (time.perf_counter() - queued) * 1000, None, failed=True)
+        raise AICapacityError("All AI call slots are busy; try again shortly.")
+
+    with _metrics_lock:
+        _in_flight += 1
+    try:
+        yield (time.perf_counter() - queued) * 1000
+    finally:
+        with _metrics_lock:
+            _in_flight -= 1
+        _call_slots.release()
+
+
+def stream_chat_completion(on_delta, **kwargs):
+    """Run a streaming chat completion through the shared client.
+
+    Waits up to OPENAI_QUEUE_TIMEOUT seconds for one of the
+    OPENAI_MAX_CONCURRENCY call slots, calls ``on_delta(text)`` for each
+    content fragment as it arrives and returns the assembled text. Latency,
+    time to first token and token usage are recorded for the model.
+    """
+    model = kwargs.get("model") or "-"
+    parts = []
+    usage = None
+    first_token_ms = None
+
+    with _call_slot(model) as wait_ms:
+        started = time.perf_counter()
+        try:
+            stream = get_openai_client().chat.completions.create(
+                stream=True,
+                stream_options={"include_usage": True},
+                **kwargs,
+            )
+            for chunk in stream:
+                if getattr(chunk, "usage", None):
+                    usage = chunk.usage
+                for choice in getattr(chunk, "choices", None) or []:
+                    text = getattr(choice.delta, "content", None)
+                    if not text:
+                        continue
+                    if first_token_ms is None:
+                        first_token_ms = (time.perf_counter() - started) * 1000
+                    parts.append(text)
+                    on_delta(text)
+        except Exception:
+            _record_call(model, (time.perf_counter() - started) * 1000, wait_ms, None, failed=True)
+            raise
+
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    _record_call(model, elapsed_ms, wait_ms, usage, first_token_ms=first_token_ms)
+    _log_call(model, elapsed_ms, wait_ms, usage, first_token_ms=first_token_ms)
+    return "".join(parts)
+
+
+def _log_call(model, elapsed_ms, wait_ms, usage, first_token_ms=None):
+    logger.info(
+        "ai call model=%s ms=%.1f ttft_ms=%s wait_ms=%.1f prompt_tokens=%s completion_tokens=%s",
+        model,
+        elapsed_ms,
+        f"{first_token_ms:.1f}" if first_token_ms is not None else "-",
+        wait_ms,
+        getattr(usage, "prompt_tokens", None),
+        getattr(usage, "completion_tokens", None),
+    )
+
+
+def _record_call(model, elapsed_ms, wait_ms, usage, failed=False, first_token_ms=None):
+    with _metrics_lock:
+        entry = _metrics.get(model)
+        if entry is None:
+            entry = _metrics[model] = {
+                "calls": 0,
+                "errors": 0,
+                "latencies": deque(maxlen=AI_LATENCY_SAMPLES_PER_MODEL),
+                "first_tokens": deque(maxlen=AI_LATENCY_SAMPLES_PER_MODEL),
+                "max_wait_ms": 0.0,
+                "prompt_tokens": 0,
+                "completion_tokens": 0,
+            }
+        entry["calls"] += 1
+        entry["max_wait_ms"] = max(entry["max_wait_ms"], wait_ms)
+        if failed:
+            entry["errors"] += 1
+            return
+        entry["latencies"].append(elapsed_ms)
+        if first_token_ms is not None:
+            entry["first_tokens"].append(first_token_ms)
+        entry["prompt_tokens"] += int(getattr(usage, "prompt_tokens", 0) or 0)
+        entry["completion_tokens"] += int(getattr(usage, "completion_tokens", 0) or 0)
+
+
+def _nearest_rank(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    rank = -(-pct * len(sorted_values) // 100)
+    return sorted_values[max(int(rank), 1) - 1]
+
+
+def ai_client_metrics():
+    """Latency percentiles and token totals per model for this process."""
+    with _metrics_lock:
+        snapshot = {
+            model: dict(
+                entry,
+                latencies=sorted(entry["latencies"]),
+                first_tokens=sorted(entry["first_tokens"]),
+            )
+            for model, entry in _metrics.items()
+        }
+        in_flight = _in_flight
+        upstream = dict(_upstream_statuses)
+
+    models = []
+    for model, entry in sorted(snapshot.items()):
+        latencies = entry["latencies"]
+        first_tokens = entry["first_tokens"]
+        models.append({
+            "model": model,
+            "calls": entry["calls"],
+            "errors": entry["errors"],
+            "p50_ms": round(_nearest_rank(latencies, 50), 1),
+            "p95_ms": round(_nearest_rank(latencies, 95), 1),
+            "ttft_p50_ms": round(_nearest_rank(first_tokens, 50), 1) if first_tokens else None,
+            "ttft_p95_ms": round(_nearest_rank(first_tokens, 95), 1) if first_tokens else None,
+            "max_wait_ms": round(entry["max_wait_ms"], 1),
+            "prompt_tokens": entry["prompt_tokens"],
+            "completion_tokens": entry["completion_tokens"],
+        })
+
+    return {
+        "in_flight": in_flight,
+        "max_concurrency": OPENAI_MAX_CONCURRENCY,
+        "upstream_rate_limited": upstream["rate_limited"],
+        "upstream_server_errors": upstream["server_errors"],
+        "models": models,
+    }
+
+
+class FakeAIClient:
+    """Stand-in for the OpenAI client in tests and offline development.
+
+    ``reply`` is either a fixed string or ``reply(**kwargs)`` returning one;
+    every call's arguments are kept in ``calls``. Install it with
+    ``ai_client_override(FakeAIClient(...))``.
+    """
+
+    def __init__(self, reply="", delay=0.0):
+        self.reply = reply
+        self.delay = delay
+        self.calls = []
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def _create(self, **kwargs):
+        self.calls.append(kwargs)
+        if self.delay:
+            time.sleep(self.delay)
+        stream = kwargs.pop("stream", False)
+        kwargs.pop("stream_options", None)
+        content = self.reply(**kwargs) if callable(self.reply) else self.reply
+        prompt_words = sum(len(str(m.get("content", "")).split()) for m in kwargs.get("messages") or [])
+        completion_words = len(content.split())
+        usage = SimpleNamespace(
+            prompt_tokens=prompt_words,
+            completion_tokens=completion_words,
+            total_tokens=prompt_words + completion_words,
+        )
+        if stream:
+            return self._stream(content, usage)
+        return SimpleNamespace(
+            model=kwargs.get("model"),
+            choices=[SimpleNamespace(
+                index=0,
+                message=SimpleNamespace(role="assistant", content=content),
+                finish_reason="stop",
+            )],
+            usage=usage,
+        )
+
+    @staticmethod
+    def _stream(content, usage):
+        for word in content.split(" "):
+            yield SimpleNamespace(
+                choices=[SimpleNamespace(index=0, delta=SimpleNamespace(content=word + " "), finish_reason=None)],
+                usage=None,
+            )
+        yield SimpleNamespace(choices=[], usage=usage)
+
+    def close(self):
+        pass
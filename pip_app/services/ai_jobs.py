@@ -0,0 +1,332 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from flask import current_app, jsonify, request, url_for
+
+from models import AIJob, db
+from pip_app.services.ai_client import stream_chat_completion
+from pip_app.services.llm_cache import get_cached_response, record_cache_bypass, store_cached_response
+
+ACTIVE_AI_JOB_STATUSES = ("queued", "running")
+
+# Chat completion arguments a job may pass through to the client.
+COMPLETION_ARGS = ("model", "messages", "temperature", "max_tokens", "response_format")
+
+# The prompt quotes employee records, so only the parts of a job's request
+# that the status endpoint and handlers read are kept once it has finished.
+RETAINED_REQUEST_KEYS = ("model", "context")
+
+DEFAULT_AI_JOB_ERROR = (
+    "AI guidance could not be generated at the moment. "
+    "Please try again later or check the AI configuration."
+)
+
+# LLM calls are slow network waits, not CPU work, so they get their own
+# threads: a request only enqueues a job and returns, and gunicorn's request
+# threads are never parked on the model provider.
+_executor = ThreadPoolExecutor(
+    max_workers=int(os.environ.get("AI_JOB_WORKERS", "4")),
+    thread_name_prefix="ai-job",
+)
+
+_running_job_ids = set()
+_running_lock = threading.Lock()
+
+# Each open /ai/jobs/<id>/stream response holds a gunicorn thread for as
+# long as the model is talking, so only a few may be open at once; the
+# rest of the clients poll the status endpoint instead.
+AI_STREAM_MAX_CLIENTS = int(os.environ.get("AI_STREAM_MAX_CLIENTS", "2"))
+AI_STREAM_MAX_SECONDS = 120
+AI_STREAM_KEEPALIVE_SECONDS = 15
+_stream_slots = threading.BoundedSemaphore(AI_STREAM_MAX_CLIENTS)
+
+# Text streamed so far by jobs this process is running, keyed by job id, so
+# /ai/jobs/<id>/stream can replay it and follow new tokens. Entries exist
+# from submit until the job finishes; the saved result is in the database.
+_live_output = {}
+_live_output_changed = threading.Condition()
+
+# kind -> (handler, error_message). The handler runs inside the worker's app
+# context as ``handler(job, content, context)``, writes the result back to
+# its record and returns a JSON-ready dict stored on the job. It must not
+# commit; the job is completed in the same transaction.
+AI_JOB_HANDLERS = {}
+
+
+def register_ai_job_handler(kind, handler, error_message=None):
+    """Register how a finished completion of ``kind`` is saved.
+
+    ``error_message(exc)`` turns a failure into the text shown to the user;
+    the raw exception is only logged.
+    """
+    AI_JOB_HANDLERS[kind] = (handler, error_message)
+
+
+def get_active_ai_job(kind, record_id):
+    return (
+        AIJob.query.filter(
+            AIJob.kind == kind,
+            AIJob.record_id == record_id,
+            AIJob.status.in_(ACTIVE_AI_JOB_STATUSES),
+        )
+        .order_by(AIJob.id.desc())
+        .first()
+    )
+
+
+def pending_ai_job(kind, record_id):
+    """Return the live job generating ``kind`` for a record, if any."""
+    job = get_active_ai_job(kind, record_id)
+    if job is None or mark_ai_job_if_interrupted(job):
+        return None
+    return job
+
+
+def force_regenerate_requested():
+    """True when the caller asked to bypass the LLM response cache."""
+    if request.is_json:
+        value = (request.get_json(silent=True) or {}).get("force")
+    else:
+        value = request.values.get("force")
+    return str(value).strip().lower() in ("1", "true", "yes", "on")
+
+
+def submit_ai_job(kind, completion, *, user, record_id=None, context=None, force=False):
+    """Queue a chat completion and return its AIJob.
+
+    ``completion`` holds the chat completion arguments (model, messages,
+    temperature, ...); ``context`` is passed to the kind's handler. For
+    jobs tied to a record, an already queued or running job for the same
+    kind and record is returned instead of starting a second one.
+
+    When the same completion has been answered before, the cached answer
+    is handed to the handler straight away with ``context["cached"]`` set,
+    and the job is returned already completed. Handlers should then return
+    the record's saved result unchanged if it already matches, rather than
+    writing it again. ``force`` skips the cache and always asks the model.
+    """
+    if kind not in AI_JOB_HANDLERS:
+        raise KeyError(f"No AI job handler registered for {kind!r}")
+
+    if record_id is not None:
+        active_job = pending_ai_job(kind, record_id)
+        if active_job is not None:
+            return active_job
+
+    payload = {key: completion[key] for key in COMPLETION_ARGS if key in completion}
+    payload["context"] = context or {}
+
+    job = AIJob(
+        kind=kind,
+        record_id=record_id,
+        user_id=getattr(user, "id", None),
+        organisation_id=getattr(user, "organisation_id", None),
+        created_by=getattr(user, "username", None),
+        status="queued",
+        request_json=json.dumps(payload, default=str),
+    )
+
+    if force:
+        record_cache_bypass()
+    else:
+        cached = get_cached_response(payload)
+        if cached is not None:
+            try:
+                cached_context = dict(payload["context"], cached=True)
+                job.request_json = json.dumps(dict(payload, context=cached_context), default=str)
+                job.started_at = datetime.utcnow()
+                db.session.add(job)
+                _finish_ai_job(job, cached, cached_context)
+                return job
+            except Exception:
+                db.session.rollback()
+                current_app.logger.exception("Cached answer for AI job kind %s could not be applied", kind)
+                return submit_ai_job(kind, completion, user=user, record_id=record_id, context=context, force=True)
+
+    db.session.add(job)
+    db.session.flush()
+    job_id = job.id
+
+    # Claim the job before it becomes visible, or another request could
+    # find it queued but unowned and mark it as interrupted.
+    with _running_lock:
+        _running_job_ids.add(job_id)
+    try:
+        db.session.commit()
+    except Exception:
+        with _running_lock:
+            _running_job_ids.discard(job_id)
+        raise
+
+    with _live_output_changed:
+        _live_output[job_id] = []
+
+    _executor.submit(_run_ai_job, current_app._get_current_object(), job_id)
+    return job
+
+
+def _run_ai_job(app, job_id):
+    with app.app_context():
+        try:
+            _complete_ai_job(job_id)
+        except Exception as exc:
+            db.session.rollback()
+            app.logger.exception("AI job %s failed", job_id)
+
+            job = db.session.get(AIJob, job_id)
+            if job is not None:
+                _handler, error_message = AI_JOB_HANDLERS.get(job.kind, (None, None))
+                job.status = "failed"
+                job.error = (error_message(exc) if error_message else DEFAULT_AI_JOB_ERROR)[:2000]
+                job.completed_at = datetime.utcnow()
+                _discard_ai_job_prompt(job)
+                db.session.commit()
+        finally:
+            with _running_lock:
+                _running_job_ids.discard(job_id)
+            with _live_output_changed:
+                _live_output.pop(job_id, None)
+                _live_output_changed.notify_all()
+            db.session.remove()
+
+
+def _complete_ai_job(job_id):
+    job = db.session.get(AIJob, job_id)
+    # Already failed as interrupted, or picked up by another worker.
+    if job is None or job.status != "queued":
+        return
+
+    payload = job.request_payload()
+
+    job.status = "running"
+    job.started_at = datetime.utcnow()
+    db.session.commit()
+
+    completion = {key: payload[key] for key in COMPLETION_ARGS if key in payload}
+    content = stream_chat_completion(lambda text: _append_live_output(job_id, text), **completion).strip()
+
+    _finish_ai_job(job, content, payload.get("context") or {})
+
+    # Only answers the handler accepted are worth replaying.
+    try:
+        store_cached_response(completion, content)
+    except Exception:
+        db.session.rollback()
+        current_app.logger.exception("Could not cache the answer for AI job %s", job_id)
+
+
+def _finish_ai_job(job, content, context):
+    handler, _error_message = AI_JOB_HANDLERS[job.kind]
+    result = handler(job, content, context)
+
+    job.status = "completed"
+    job.result_json = json.dumps(result, default=str)
+    job.completed_at = datetime.utcnow()
+    _discard_ai_job_prompt(job)
+    db.session.commit()
+
+
+def _discard_ai_job_prompt(job):
+    payload = job.request_payload()
+    retained = {key: payload[key] for key in RETAINED_REQUEST_KEYS if key in payload}
+    job.request_json = json.dumps(retained, default=str)
+
+
+def _append_live_output(job_id, text):
+    with _live_output_changed:
+        chunks = _live_output.get(job_id)
+        if chunks is not None:
+            chunks.append(text)
+            _live_output_changed.notify_all()
+
+
+def wait_for_ai_job_output(job_id, offset, timeout):
+    """Block until a job streams past ``offset`` chunks, finishes or times out.
+
+    Returns ``(new_chunks, finished)``. ``finished`` is True once no worker
+    in this process is producing output for the job any more.
+    """
+    with _live_output_changed:
+        _live_output_changed.wait_for(
+            lambda: job_id not in _live_output or len(_live_output[job_id]) > offset,
+            timeout=timeout,
+        )
+        chunks = _live_output.get(job_id)
+        if chunks is None:
+            return [], True
+        return chunks[offset:], False
+
+
+def acquire_ai_stream_slot():
+    return _stream_slots.acquire(blocking=False)
+
+
+def release_ai_stream_slot():
+    _stream_slots.release()
+
+
+def mark_ai_job_if_interrupted(job):
+    """Fail a queued/running job that no worker in this process owns.
+
+    As with exports, a job active in the database but unknown to this
+    single gunicorn worker was cut off by a restart. Returns True when the
+    job was marked as failed.
+    """
+    if job.status not in ACTIVE_AI_JOB_STATUSES:
+        return False
+
+    with _running_lock:
+        owned = job.id in _running_job_ids
+
+    if owned:
+        return False
+
+    job.status = "failed"
+    job.error = "AI generation was interrupted before it finished. Please try again."
+    job.completed_at = datetime.utcnow()
+    _discard_ai_job_prompt(job)
+    db.session.commit()
+    return True
+
+
+def ai_job_visible_to(job, user):
+    return job.user_id == user.id or user.is_superuser()
+
+
+def ai_job_status(job):
+    """Return a JSON-ready snapshot of an AI job."""
+    return {
+        "id": job.id,
+        "kind": job.kind,
+        "record_id": job.record_id,
+        "status": job.status,
+        "created_at": job.created_at.isoformat() if job.created_at else None,
+        "started_at": job.started_at.isoformat() if job.started_at else None,
+        "completed_at": job.completed_at.isoformat() if job.completed_at else None,
+        "cached": bool(job.request_payload().get("context", {}).get("cached")),
+        "result": job.result() if job.status == "completed" else None,
+        "error": job.error,
+    }
+
+
+def ai_job_status_url(job):
+    return url_for("ai_jobs.job_status", job_id=job.id)
+
+
+def ai_job_stream_url(job):
+    return url_for("ai_jobs.job_stream", job_id=job.id)
+
+
+def ai_job_response(job, status_code=202):
+    """JSON body returned by endpoints that enqueue an AI job."""
+    return jsonify({
+        "success": True,
+        "job": ai_job_status(job),
+        "status_url": ai_job_status_url(job),
+        "stream_url": ai_job_stream_url(job),
+    }), status_code
@@ -1,62 +1,37 @@
 import os
 import json
-from openai import OpenAI
 
-DEFAULT_OPENAI_MODEL = os.environ.get("OPENAI_MODEL", "gpt-4o-mini")
-
-
-def get_openai_client():
-    api_key = os.environ.get("OPENAI_API_KEY", "").strip()
-    if not api_key:
-        raise RuntimeError(
-            "OPENAI_API_KEY is not configured. "
-            "Set a valid API key before using AI-powered features."
-        )
-    return OpenAI(api_key=api_key)
-
-
-def _safe_text(value):
-    if value is None:
-        return "—"
-    text = str(value).strip()
-    return text if text else "—"
-
-
-def build_employee_relations_prompt(er_case, active_policy_text=None):
-    employee_name = f"{er_case.employee.first_name} {er_case.employee.last_name}".strip()
-
-    recent_meetings = []
-    for meeting in (er_case.meetings or [])[:5]:
-        recent_meetings.append(
-            "\n".join(
-                [
-                    f"Meeting Type: {_safe_text(meeting.meeting_type)}",
-                    f"Meeting Date/Time: {_safe_text(meeting.meeting_datetime)}",
-                    f"Location: {_safe_text(meeting.location)}",
-                    f"Attendees: {_safe_text(meeting.attendees)}",
-                    f"Notes: {_safe_text(meeting.notes)}",
-                    f"Adjournment Notes: {_safe_text(meeting.adjournment_notes)}",
-                    f"Outcome Summary: {_safe_text(meeting.outcome_summary)}",
-                ]
-            )
-        )
-
-    recent_timeline = []
-    for event in (er_case.timeline_events or [])[:10]:
-        recent_timeline.append(
-            "\n".join(
-                [
-                    f"Timestamp: {_safe_text(event.timestamp)}",
-                    f"Event Type: {_safe_text(event.event_type)}",
-                    f"Notes: {_safe_text(event.notes)}",
-                    f"Updated By: {_safe_text(event.updated_by)}",
-                ]
-            )
-        )
+from pip_app.services.prompt_budget import (
+    compact_fields,
+    estimate_tokens,
+    prompt_value,
+    record_prompt_build,
+    select_relevant_text,
+)
 
-    policy_text = _safe_text(active_policy_text)
+DEFAULT_OPENAI_MODEL = os.environ.get("OPENAI_MODEL", "gpt-4o-mini")
 
-    system_prompt = """
+AI_ADVICE_EVENT_TYPE = "AI Advice Generated"
+
+# Whole ER advice prompt (system + user), by the local token estimate.
+ER_PROMPT_TOKEN_BUDGET = int(os.environ.get("ER_PROMPT_TOKEN_BUDGET", "4000"))
+# Per-field caps for free-text case fields and for meeting/timeline notes.
+ER_CASE_TEXT_TOKENS = 600
+ER_NOTE_TOKENS = 150
+# Share of the budget left after the case details that is kept for policy
+# text before meetings and timeline events take the rest.
+ER_POLICY_SHARE = 0.4
+ER_MAX_MEETINGS = 5
+ER_MAX_TIMELINE_EVENTS = 10
+
+SECTION_JOIN = "\n\n"
+ER_MEETINGS_HEADING = "RECENT MEETINGS\n"
+ER_TIMELINE_HEADING = "RECENT TIMELINE\n"
+ER_POLICY_HEADING = "ACTIVE POLICY TEXT\n"
+ER_POLICY_OMITTED = "(Not included: the prompt token budget is used up.)"
+ER_EXCERPT_NOTE = "(Excerpt: {kept} of {total} passages, chosen for relevance to this case.)"
+
+ER_SYSTEM_PROMPT = """
 You are an expert UK HR Employee Relations advisor.
 
 You are supporting HR professionals and managers with practical internal guidance.
@@ -66,7 +41,9 @@ Rules:
 - Be balanced, fair, neutral, and policy-aware.
 - Do not assume guilt or wrongdoing.
 - Base the advice on the facts supplied.
+- Case fields that are not listed have not been recorded.
 - If policy text is supplied, treat it as the primary internal standard.
+- Policy text may be an excerpt of the passages most relevant to the case.
 - If key information is missing, state that clearly.
 - Avoid unnecessary repetition.
 - Do not invent policy wording.
@@ -92,110 +69,282 @@ Return exactly this JSON structure:
 Each field should contain concise but useful bullet-style plain text using hyphens.
 """.strip()
 
-    user_prompt = f"""
-CASE OVERVIEW
-Case ID: {_safe_text(er_case.id)}
-Case Type: {_safe_text(er_case.case_type)}
-Title: {_safe_text(er_case.title)}
-Status: {_safe_text(er_case.status)}
-Stage: {_safe_text(er_case.stage)}
-Priority: {_safe_text(er_case.priority_level)}
-Policy Type: {_safe_text(er_case.policy_type)}
-Date Raised: {_safe_text(er_case.date_raised)}
-Raised By: {_safe_text(er_case.raised_by)}
-
-EMPLOYEE
-Name: {_safe_text(employee_name)}
-Job Title: {_safe_text(getattr(er_case.employee, "job_title", None))}
-Service: {_safe_text(getattr(er_case.employee, "service", None))}
-Service Area: {_safe_text(er_case.service_area)}
-Department: {_safe_text(er_case.department)}
-
-ALLEGATION / GRIEVANCE
-Summary: {_safe_text(er_case.summary)}
-Allegation or Grievance: {_safe_text(er_case.allegation_or_grievance)}
-
-DISCIPLINARY / GRIEVANCE DETAILS
-Disciplinary Category: {_safe_text(er_case.disciplinary_category)}
-Grievance Category: {_safe_text(er_case.grievance_category)}
-Gross Misconduct Flag: {_safe_text(er_case.gross_misconduct_flag)}
-Misconduct Date: {_safe_text(er_case.misconduct_date)}
-Suspension Flag: {_safe_text(er_case.suspension_flag)}
-Suspension With Pay: {_safe_text(er_case.suspension_with_pay)}
-Previous Warnings Summary: {_safe_text(er_case.previous_warnings_summary)}
-Recommended Sanction: {_safe_text(er_case.recommended_sanction)}
-Final Sanction: {_safe_text(er_case.final_sanction)}
-Warning Level: {_safe_text(er_case.warning_level)}
-Warning Review Date: {_safe_text(er_case.warning_review_date)}
-Warning Expiry Date: {_safe_text(er_case.warning_expiry_date)}
-Person Complained About: {_safe_text(er_case.person_complained_about)}
-Bullying Flag: {_safe_text(er_case.bullying_flag)}
-Harassment Flag: {_safe_text(er_case.harassment_flag)}
-Discrimination Flag: {_safe_text(er_case.discrimination_flag)}
-Requested Resolution: {_safe_text(er_case.requested_resolution)}
-Mediation Considered: {_safe_text(er_case.mediation_considered)}
-Grievance Outcome: {_safe_text(er_case.grievance_outcome)}
-
-INVESTIGATION / APPEAL
-Investigation Scope: {_safe_text(er_case.investigation_scope)}
-Investigation Findings: {_safe_text(er_case.investigation_findings)}
-Recommended Next Step: {_safe_text(er_case.recommended_next_step)}
-Appeal Requested: {_safe_text(er_case.appeal_requested_flag)}
-Appeal Request Date: {_safe_text(er_case.appeal_request_date)}
-Appeal Reason: {_safe_text(er_case.appeal_reason)}
-Appeal Hearing Date: {_safe_text(er_case.appeal_hearing_date)}
-Appeal Outcome: {_safe_text(er_case.appeal_outcome)}
-Appeal Outcome Date: {_safe_text(er_case.appeal_outcome_date)}
-
-DATES / OWNERS
-Next Action Date: {_safe_text(er_case.next_action_date)}
-Investigation Deadline: {_safe_text(er_case.investigation_deadline)}
-Hearing Date: {_safe_text(er_case.hearing_date)}
-Outcome Due Date: {_safe_text(er_case.outcome_due_date)}
-Appeal Deadline: {_safe_text(er_case.appeal_deadline)}
-Date Closed: {_safe_text(er_case.date_closed)}
-HR Lead: {_safe_text(er_case.hr_lead)}
-Investigating Manager: {_safe_text(er_case.investigating_manager)}
-Hearing Chair: {_safe_text(er_case.hearing_chair)}
-Note Taker: {_safe_text(er_case.note_taker)}
-Appeal Manager: {_safe_text(er_case.appeal_manager)}
-
-RECENT MEETINGS
-{chr(10).join(recent_meetings) if recent_meetings else "—"}
-
-RECENT TIMELINE
-{chr(10).join(recent_timeline) if recent_timeline else "—"}
-
-ACTIVE POLICY TEXT
-{policy_text}
-""".strip()
 
-    return system_prompt, user_prompt
+def _case_sections(er_case):
+    """(heading, fields, note_tokens) for the case details, in prompt order."""
+    employee = er_case.employee
+    employee_name = f"{employee.first_name} {employee.last_name}".strip()
+    return [
+        ("CASE OVERVIEW", [
+            ("Case ID", er_case.id),
+            ("Case Type", er_case.case_type),
+            ("Title", er_case.title),
+            ("Status", er_case.status),
+            ("Stage", er_case.stage),
+            ("Priority", er_case.priority_level),
+            ("Policy Type", er_case.policy_type),
+            ("Date Raised", er_case.date_raised),
+            ("Raised By", er_case.raised_by),
+        ], None),
+        ("EMPLOYEE", [
+            ("Name", employee_name),
+            ("Job Title", getattr(employee, "job_title", None)),
+            ("Service", getattr(employee, "service", None)),
+            ("Service Area", er_case.service_area),
+            ("Department", er_case.department),
+        ], None),
+        ("ALLEGATION / GRIEVANCE", [
+            ("Summary", er_case.summary),
+            ("Allegation or Grievance", er_case.allegation_or_grievance),
+        ], ER_CASE_TEXT_TOKENS),
+        ("DISCIPLINARY / GRIEVANCE DETAILS", [
+            ("Disciplinary Category", er_case.disciplinary_category),
+            ("Grievance Category", er_case.grievance_category),
+            ("Flags", _case_flags(er_case)),
+            ("Misconduct Date", er_case.misconduct_date),
+            ("Previous Warnings Summary", er_case.previous_warnings_summary),
+            ("Recommended Sanction", er_case.recommended_sanction),
+            ("Final Sanction", er_case.final_sanction),
+            ("Warning Level", er_case.warning_level),
+            ("Warning Review Date", er_case.warning_review_date),
+            ("Warning Expiry Date", er_case.warning_expiry_date),
+            ("Person Complained About", er_case.person_complained_about),
+            ("Requested Resolution", er_case.requested_resolution),
+            ("Grievance Outcome", er_case.grievance_outcome),
+        ], ER_CASE_TEXT_TOKENS),
+        ("INVESTIGATION / APPEAL", [
+            ("Investigation Scope", er_case.investigation_scope),
+            ("Investigation Findings", er_case.investigation_findings),
+            ("Recommended Next Step", er_case.recommended_next_step),
+            ("Appeal Request Date", er_case.appeal_request_date),
+            ("Appeal Reason", er_case.appeal_reason),
+            ("Appeal Hearing Date", er_case.appeal_hearing_date),
+            ("Appeal Outcome", er_case.appeal_outcome),
+            ("Appeal Outcome Date", er_case.appeal_outcome_date),
+        ], ER_CASE_TEXT_TOKENS),
+        ("DATES / OWNERS", [
+            ("Next Action Date", er_case.next_action_date),
+            ("Investigation Deadline", er_case.investigation_deadline),
+            ("Hearing Date", er_case.hearing_date),
+            ("Outcome Due Date", er_case.outcome_due_date),
+            ("Appeal Deadline", er_case.appeal_deadline),
+            ("Date Closed", er_case.date_closed),
+            ("HR Lead", er_case.hr_lead),
+            ("Investigating Manager", er_case.investigating_manager),
+            ("Hearing Chair", er_case.hearing_chair),
+            ("Note Taker", er_case.note_taker),
+            ("Appeal Manager", er_case.appeal_manager),
+        ], None),
+    ]
 
 
-def generate_employee_relations_advice(er_case, active_policy_text=None):
+def _case_flags(er_case):
+    """The yes/no case flags that are set, as one line; None if none are."""
+    flags = []
+    if er_case.gross_misconduct_flag:
+        flags.append("gross misconduct")
+    if er_case.suspension_flag:
+        flags.append("suspended with pay" if er_case.suspension_with_pay else "suspended without pay")
+    if er_case.bullying_flag:
+        flags.append("bullying")
+    if er_case.harassment_flag:
+        flags.append("harassment")
+    if er_case.discrimination_flag:
+        flags.append("discrimination")
+    if er_case.mediation_considered:
+        flags.append("mediation considered")
+    if er_case.appeal_requested_flag:
+        flags.append("appeal requested")
+    return ", ".join(flags) or None
+
+
+def _meeting_fields(meeting):
+    return [
+        ("Meeting Type", meeting.meeting_type),
+        ("Meeting Date/Time", meeting.meeting_datetime),
+        ("Location", meeting.location),
+        ("Attendees", meeting.attendees),
+        ("Notes", meeting.notes),
+        ("Adjournment Notes", meeting.adjournment_notes),
+        ("Outcome Summary", meeting.outcome_summary),
+    ]
+
+
+def _timeline_fields(event):
+    return [
+        ("Timestamp", event.timestamp),
+        ("Event Type", event.event_type),
+        ("Notes", event.notes),
+        ("Updated By", event.updated_by),
+    ]
+
+
+def _uncompacted_tokens(fields):
+    """What ``fields`` cost when every one is sent in full, empty or not."""
+    return sum(estimate_tokens(f"{label}: {prompt_value(value) or '—'}") for label, value in fields)
+
+
+def _fit_entries(entries, max_tokens):
+    """Leading entries (most recent first) that fit within ``max_tokens``."""
+    kept = []
+    used = 0
+    for entry in entries:
+        cost = estimate_tokens(entry) + 1
+        if used + cost > max_tokens:
+            break
+        kept.append(entry)
+        used += cost
+    return kept, used
+
+
+def _fit_section(heading, entries, max_tokens):
+    """Like ``_fit_entries``, counting the section heading and its join too."""
+    overhead = estimate_tokens(SECTION_JOIN) + estimate_tokens(heading)
+    kept, used = _fit_entries(entries, max_tokens - overhead)
+    return kept, (used + overhead if kept else 0)
+
+
+def _policy_excerpt(policy_text, query, max_tokens):
+    """The policy in full if it fits in ``max_tokens``, else its most relevant passages."""
+    if not policy_text or max_tokens <= 0:
+        return ""
+    if estimate_tokens(policy_text) <= max_tokens:
+        return policy_text
+
+    note_tokens = estimate_tokens(ER_EXCERPT_NOTE.format(kept=999, total=999)) + 1
+    excerpt, kept, total = select_relevant_text(policy_text, query, max_tokens - note_tokens)
+    if not excerpt:
+        return ""
+    return ER_EXCERPT_NOTE.format(kept=kept, total=total) + "\n" + excerpt
+
+
+def build_employee_relations_prompt(er_case, active_policy_text=None, token_budget=None):
+    """System and user prompts for ER advice, kept within a token budget.
+
+    Empty fields are left out and long notes truncated. Case details are
+    always sent; ER_POLICY_SHARE of what remains is held for the policy
+    text, meetings and then timeline events (most recent first) take what
+    they need, and the policy gets the rest: in full when it fits,
+    otherwise as its passages most relevant to the allegation. Section
+    headings and joins are counted against the budget too.
+    """
+    budget = token_budget or ER_PROMPT_TOKEN_BUDGET
+    system_tokens = estimate_tokens(ER_SYSTEM_PROMPT)
+    uncompacted = system_tokens
+
+    blocks = []
+    for heading, fields, note_tokens in _case_sections(er_case):
+        uncompacted += _uncompacted_tokens(fields)
+        lines = compact_fields(fields, note_tokens=note_tokens)
+        if lines:
+            blocks.append("\n".join([heading, *lines]))
+    case_details = SECTION_JOIN.join(blocks)
+
+    meetings = list(er_case.meetings or [])[:ER_MAX_MEETINGS]
+    # Earlier AI advice is not case evidence, and feeding it back would make
+    # every generation change the next prompt (and its cache key).
+    case_events = [
+        event for event in (er_case.timeline_events or [])
+        if event.event_type != AI_ADVICE_EVENT_TYPE
+    ][:ER_MAX_TIMELINE_EVENTS]
+
+    meeting_entries = []
+    for meeting in meetings:
+        uncompacted += _uncompacted_tokens(_meeting_fields(meeting))
+        meeting_entries.append("\n".join(compact_fields(_meeting_fields(meeting), note_tokens=ER_NOTE_TOKENS)))
+    timeline_entries = []
+    for event in case_events:
+        uncompacted += _uncompacted_tokens(_timeline_fields(event))
+        timeline_entries.append("\n".join(compact_fields(_timeline_fields(event), note_tokens=ER_NOTE_TOKENS)))
+
+    policy_text = (active_policy_text or "").strip()
+    policy_tokens = estimate_tokens(policy_text)
+    uncompacted += policy_tokens or 1
+
+    remaining = max(budget - system_tokens - estimate_tokens(case_details), 0)
+
+    # The policy heading is sent whenever there is policy text, with the
+    # "not included" line if nothing else fits, so that much is always held.
+    policy_heading = 0
+    policy_floor = 0
+    if policy_text:
+        policy_heading = estimate_tokens(SECTION_JOIN) + estimate_tokens(ER_POLICY_HEADING)
+        policy_floor = policy_heading + estimate_tokens(ER_POLICY_OMITTED)
+    policy_reserve = max(min(policy_heading + policy_tokens, int(remaining * ER_POLICY_SHARE)), policy_floor)
+
+    meeting_entries, meetings_used = _fit_section(
+        ER_MEETINGS_HEADING, meeting_entries, remaining - policy_reserve
+    )
+    timeline_entries, timeline_used = _fit_section(
+        ER_TIMELINE_HEADING, timeline_entries, remaining - policy_reserve - meetings_used
+    )
+
+    query = " ".join(
+        str(value)
+        for value in (
+            er_case.allegation_or_grievance,
+            er_case.summary,
+            er_case.case_type,
+            er_case.policy_type,
+            er_case.disciplinary_category,
+            er_case.grievance_category,
+            er_case.stage,
+        )
+        if value
+    )
+    policy_budget = remaining - meetings_used - timeline_used - policy_heading
+    policy_excerpt = _policy_excerpt(policy_text, query, policy_budget)
+
+    def assemble():
+        sections = [case_details]
+        if meeting_entries:
+            sections.append(ER_MEETINGS_HEADING + "\n\n".join(meeting_entries))
+        if timeline_entries:
+            sections.append(ER_TIMELINE_HEADING + "\n\n".join(timeline_entries))
+        if policy_excerpt:
+            sections.append(ER_POLICY_HEADING + policy_excerpt)
+        elif policy_text:
+            sections.append(ER_POLICY_HEADING + ER_POLICY_OMITTED)
+        return SECTION_JOIN.join(sections)
+
+    user_prompt = assemble()
+    sent_tokens = system_tokens + estimate_tokens(user_prompt)
+
+    # Token counts are not exactly additive across joins, so trim the
+    # policy by any overshoot until the whole prompt fits.
+    while policy_excerpt and sent_tokens > budget:
+        policy_budget -= sent_tokens - budget
+        policy_excerpt = _policy_excerpt(policy_text, query, policy_budget)
+        user_prompt = assemble()
+        sent_tokens = system_tokens + estimate_tokens(user_prompt)
+
+    record_prompt_build("er_advice", sent_tokens, uncompacted, budget)
+    return ER_SYSTEM_PROMPT, user_prompt
+
+
+def employee_relations_completion_args(er_case, active_policy_text=None):
+    """Keyword arguments for the ER advice chat completion."""
     system_prompt, user_prompt = build_employee_relations_prompt(
         er_case=er_case,
         active_policy_text=active_policy_text,
     )
-
-    client = get_openai_client()
-
-    response = client.chat.completions.create(
-        model=DEFAULT_OPENAI_MODEL,
-        temperature=0.2,
-        response_format={"type": "json_object"},
-        messages=[
+    return {
+        "model": DEFAULT_OPENAI_MODEL,
+        "temperature": 0.2,
+        "response_format": {"type": "json_object"},
+        "messages": [
             {"role": "system", "content": system_prompt},
             {"role": "user", "content": user_prompt},
         ],
-    )
+    }
+
 
-    raw_content = response.choices[0].message.content.strip()
+def parse_employee_relations_advice(raw_content, model_name=DEFAULT_OPENAI_MODEL):
+    raw_content = raw_content.strip()
     parsed = json.loads(raw_content)
 
     return {
-        "model_name": DEFAULT_OPENAI_MODEL,
+        "model_name": model_name,
         "raw_response": raw_content,
         "overall_risk_view": parsed.get("overall_risk_view", "").strip(),
         "immediate_next_steps": parsed.get("immediate_next_steps", "").strip(),
@@ -0,0 +1,202 @@
+from __future__ import annotations
+
+from datetime import date, timedelta
+
+from sqlalchemy import and_, case, false, func, or_
+
+from models import (
+    Employee,
+    EmployeeRelationsCase,
+    PIPRecord,
+    ProbationRecord,
+    SicknessCase,
+    SupervisionAction,
+    SupervisionRecord,
+    db,
+)
+
+OPEN_PROBATION_STATUSES = ("Active", "Extended")
+OPEN_SICKNESS_STATUSES = ("Open", "Monitoring")
+OPEN_SUPERVISION_ACTION_STATUSES = ("Open", "Carried Forward")
+
+
+def employee_scope_filters(user):
+    """Return the Employee filters that scope a dashboard to a user.
+
+    Mirrors the organisation + team rules used across the module
+    dashboards: organisation first, then line managers are pinned to
+    their team (or see nothing when they have no team).
+    """
+    filters = []
+
+    organisation_id = getattr(user, "organisation_id", None)
+    if organisation_id:
+        filters.append(Employee.organisation_id == organisation_id)
+
+    if getattr(user, "admin_level", 0) == 0:
+        team_id = getattr(user, "team_id", None)
+        if team_id:
+            filters.append(Employee.team_id == team_id)
+        else:
+            filters.append(false())
+
+    return filters
+
+
+def _count_when(condition):
+    return func.coalesce(func.sum(case((condition, 1), else_=0)), 0)
+
+
+def _scalar_counts(model, scope_filters, counters, *, join_employee=True):
+    """Run one grouped SUM(CASE ...) statement and return a counter dict."""
+    labels = list(counters.keys())
+    columns = [_count_when(counters[label]).label(label) for label in labels]
+
+    query = db.session.query(*columns).select_from(model)
+    if join_employee:
+        query = query.join(Employee, model.employee_id == Employee.id)
+
+    if scope_filters:
+        query = query.filter(*scope_filters)
+
+    row = query.one()
+    return {label: int(getattr(row, label) or 0) for label in labels}
+
+
+def employee_counts(scope_filters):
+    return _scalar_counts(
+        Employee,
+        scope_filters,
+        {
+            "active_employees": Employee.is_leaver.is_(False),
+            "leavers": Employee.is_leaver.is_(True),
+            "employee_records_missing_email": and_(
+                Employee.is_leaver.is_(False),
+                or_(Employee.email.is_(None), Employee.email == ""),
+            ),
+        },
+        join_employee=False,
+    )
+
+
+def pip_counts(scope_filters):
+    return _scalar_counts(
+        PIPRecord,
+        scope_filters,
+        {"open_pips": PIPRecord.status != "Closed"},
+    )
+
+
+def probation_counts(scope_filters):
+    return _scalar_counts(
+        ProbationRecord,
+        scope_filters,
+        {"active_probations": ProbationRecord.status.in_(OPEN_PROBATION_STATUSES)},
+    )
+
+
+def sickness_counts(scope_filters):
+    return _scalar_counts(
+        SicknessCase,
+        scope_filters,
+        {"open_sickness_cases": SicknessCase.status.in_(OPEN_SICKNESS_STATUSES)},
+    )
+
+
+def employee_relations_counts(scope_filters):
+    return _scalar_counts(
+        EmployeeRelationsCase,
+        scope_filters,
+        {"open_er_cases": EmployeeRelationsCase.status != "Closed"},
+    )
+
+
+def supervision_counts(scope_filters, *, today: date):
+    return _scalar_counts(
+        SupervisionRecord,
+        scope_filters,
+        {
+            "scheduled_supervisions": and_(
+                SupervisionRecord.status == "Scheduled",
+                SupervisionRecord.meeting_date >= today,
+            ),
+            "overdue_supervisions": or_(
+                SupervisionRecord.status == "Overdue",
+                and_(
+                    SupervisionRecord.status == "Scheduled",
+                    SupervisionRecord.meeting_date < today,
+                ),
+            ),
+        },
+    )
+
+
+def supervision_action_counts(scope_filters, *, due_by: date):
+    is_open = SupervisionAction.status.in_(OPEN_SUPERVISION_ACTION_STATUSES)
+    return _scalar_counts(
+        SupervisionAction,
+        scope_filters,
+        {
+            "open_supervision_actions": is_open,
+            "supervision_actions_due_soon": and_(
+                is_open,
+                SupervisionAction.due_date.isnot(None),
+                SupervisionAction.due_date <= due_by,
+            ),
+        },
+    )
+
+
+def compute_workspace_counters(user, enabled_modules, *, today: date):
+    """Compute every home-dashboard counter for the user's scope.
+
+    Each module table is read once with a single grouped statement, so the
+    number of queries depends on the enabled modules, not on headcount.
+    Module counters for disabled modules stay at zero.
+    """
+    scope_filters = employee_scope_filters(user)
+    show_er = user.is_superuser() and enabled_modules.get("employee_relations", True)
+
+    counters = {
+        "open_pips": 0,
+        "active_probations": 0,
+        "open_sickness_cases": 0,
+        "open_er_cases": 0,
+        "scheduled_supervisions": 0,
+        "overdue_supervisions": 0,
+        "open_supervision_actions": 0,
+        "supervision_actions_due_soon": 0,
+    }
+    counters.update(employee_counts(scope_filters))
+
+    if enabled_modules.get("pip", True):
+        counters.update(pip_counts(scope_filters))
+
+    if enabled_modules.get("probation", True):
+        counters.update(probation_counts(scope_filters))
+
+    if enabled_modules.get("sickness", True):
+        counters.update(sickness_counts(scope_filters))
+
+    if show_er:
+        counters.update(employee_relations_counts(scope_filters))
+
+    if enabled_modules.get("supervision", True):
+        counters.update(supervision_counts(scope_filters, today=today))
+        counters.update(
+            supervision_action_counts(scope_filters, due_by=today + timedelta(days=14))
+        )
+
+    # The "due" tiles currently share the open counters; they are kept as
+    # separate keys so templates do not need to change when they diverge.
+    counters["pip_reviews_due"] = counters["open_pips"]
+    counters["probation_reviews_due"] = counters["active_probations"]
+    counters["sickness_follow_up_needed"] = counters["open_sickness_cases"]
+
+    counters["module_count"] = sum(
+        1
+        for module_key in ("pip", "probation", "sickness", "supervision")
+        if enabled_modules.get(module_key, True)
+    ) + (1 if show_er else 0)
+
+    return counters
@@ -0,0 +1,260 @@
+from __future__ import annotations
+
+import time
+from itertools import islice
+
+from sqlalchemy import func, insert, tuple_
+
+from models import Employee, db
+from pip_app.services.import_utils import (
+    EMPLOYEE_FIELDS,
+    REQUIRED_FIELDS,
+    blocking_date_columns,
+    build_date_parsers,
+    map_import_row,
+)
+
+IMPORT_BATCH_SIZE = 1000
+
+EMAIL_KEY = "email"
+NAME_KEY = "first_name,last_name"
+
+
+def _chunked(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def duplicate_key(payload, unique_key):
+    """Return the normalised duplicate-detection key for a mapped row.
+
+    Only ``email`` and ``first_name,last_name`` are checked against the
+    database; any other key, or a row missing part of the key, gives None.
+    """
+    if unique_key == EMAIL_KEY:
+        email = (payload.get("email") or "").strip().lower()
+        return email or None
+
+    if unique_key == NAME_KEY:
+        first_name = (payload.get("first_name") or "").strip().lower()
+        last_name = (payload.get("last_name") or "").strip().lower()
+        if first_name and last_name:
+            return (first_name, last_name)
+
+    return None
+
+
+def existing_duplicate_keys(keys, unique_key, organisation_id=None, batch_size=IMPORT_BATCH_SIZE):
+    """Return the subset of ``keys`` that already exist as employees.
+
+    Runs one ``IN`` query per ``batch_size`` keys, scoped to the importing
+    user's organisation when they have one.
+    """
+    if unique_key == EMAIL_KEY:
+        columns = (func.lower(Employee.email),)
+        key_expr = columns[0]
+    elif unique_key == NAME_KEY:
+        columns = (func.lower(Employee.first_name), func.lower(Employee.last_name))
+        key_expr = tuple_(*columns)
+    else:
+        return set()
+
+    existing = set()
+    for chunk in _chunked(keys, batch_size):
+        query = db.session.query(*columns).filter(key_expr.in_(chunk))
+        if organisation_id:
+            query = query.filter(Employee.organisation_id == organisation_id)
+
+        for row in query:
+            existing.add(row[0] if unique_key == EMAIL_KEY else tuple(row))
+
+    return existing
+
+
+def validate_import_rows(
+    headers,
+    rows,
+    mapping,
+    *,
+    unique_key=EMAIL_KEY,
+    organisation_id=None,
+    date_formats=None,
+    batch_size=IMPORT_BATCH_SIZE,
+):
+    """Build the pre-commit validation report in one pass over ``rows``.
+
+    Rows are mapped and checked a batch at a time, with one database
+    duplicate lookup per batch, so memory is bounded by the batch size plus
+    the set of keys seen for in-file duplicate detection. Ambiguous or mixed
+    date columns are reported in ``date_errors`` and leave no rows ready.
+    """
+    date_errors = blocking_date_columns(mapping, date_formats)
+    unmapped_headers = [h for h in headers or [] if not mapping.get(h)]
+    date_parsers = build_date_parsers(mapping, date_formats)
+    file_keys = [k.strip() for k in unique_key.split(",")] if unique_key else []
+
+    missing_required = []
+    duplicates_in_file = []
+    duplicates_in_db = []
+    db_check_error = None
+    seen = set()
+    total_rows = 0
+
+    for chunk in _chunked(enumerate(rows, start=1), batch_size):
+        db_candidates = []
+        for idx, src in chunk:
+            total_rows = idx
+            r = map_import_row(src, mapping, date_parsers, idx)
+
+            missing = [f for f in REQUIRED_FIELDS if not r.get(f)]
+            if missing:
+                missing_required.append({"row": idx, "missing": missing})
+
+            if file_keys:
+                key_tuple = tuple((r.get(k) or "").lower() for k in file_keys)
+                if all(key_tuple):
+                    if key_tuple in seen:
+                        duplicates_in_file.append({"row": idx, "key": key_tuple})
+                    else:
+                        seen.add(key_tuple)
+
+            key = duplicate_key(r, unique_key)
+            if key is not None:
+                db_candidates.append((idx, r, key))
+
+        if not db_candidates or db_check_error is not None:
+            continue
+
+        try:
+            existing = existing_duplicate_keys(
+                {key for _idx, _r, key in db_candidates},
+                unique_key,
+                organisation_id,
+                batch_size=batch_size,
+            )
+        except Exception as e:
+            db_check_error = e
+            continue
+
+        for idx, r, key in db_candidates:
+            if key not in existing:
+                continue
+            if unique_key == EMAIL_KEY:
+                duplicates_in_db.append({"row": idx, "email": r.get("email")})
+            else:
+                duplicates_in_db.append({
+                    "row": idx,
+                    "name": f"{r.get('first_name')} {r.get('last_name')}"
+                })
+
+    if db_check_error is not None:
+        duplicates_in_db = [{"error": f"DB duplicate check skipped: {db_check_error}"}]
+
+    rows_ready = total_rows - len(missing_required) - len(duplicates_in_file) - len(duplicates_in_db)
+    return {
+        "unmapped_headers": unmapped_headers,
+        "missing_required": missing_required,
+        "duplicates_in_file": duplicates_in_file,
+        "duplicates_in_db": duplicates_in_db,
+        "rows_ready": 0 if date_errors else rows_ready,
+        "total_rows": total_rows,
+        "date_columns": {header: parser.report() for header, parser in date_parsers.items()},
+        "date_errors": date_errors,
+    }
+
+
+def _insert_mapping(payload, organisation_id):
+    mapping = {
+        field: (value if value != "" else None)
+        for field, value in payload.items()
+        if field in EMPLOYEE_FIELDS
+    }
+    mapping["organisation_id"] = organisation_id
+    return mapping
+
+
+def bulk_import_employees(
+    rows,
+    mapping,
+    *,
+    unique_key=EMAIL_KEY,
+    organisation_id=None,
+    date_formats=None,
+    batch_size=IMPORT_BATCH_SIZE,
+):
+    """Insert mapped import rows in batches and return the commit report.
+
+    Each batch needs one duplicate lookup and one multi-row INSERT, inside a
+    savepoint so a failing batch is reported without losing the others.
+    Rows that duplicate an earlier row in the same file are skipped too.
+    The caller commits.
+    """
+    started = time.perf_counter()
+    date_parsers = build_date_parsers(mapping, date_formats)
+    created, skipped, errors = 0, 0, []
+    seen_keys = set()
+
+    numbered_rows = enumerate(rows, start=1)
+    for chunk in _chunked(numbered_rows, batch_size):
+        candidates = []
+        for idx, src in chunk:
+            payload = map_import_row(src, mapping, date_parsers, idx)
+            if any(not payload.get(f) for f in REQUIRED_FIELDS):
+                skipped += 1
+                continue
+            candidates.append((idx, payload, duplicate_key(payload, unique_key)))
+
+        try:
+            with db.session.begin_nested():
+                existing = existing_duplicate_keys(
+                    {key for _idx, _payload, key in candidates if key is not None},
+                    unique_key,
+                    organisation_id,
+                    batch_size=batch_size,
+                )
+        except Exception as e:
+            errors.extend({"row": idx, "error": f"Duplicate check failed: {e}"} for idx, _p, _k in candidates)
+            skipped += len(candidates)
+            continue
+
+        to_insert = []
+        for idx, payload, key in candidates:
+            if key is not None:
+                if key in existing or key in seen_keys:
+                    skipped += 1
+                    continue
+                seen_keys.add(key)
+            to_insert.append((idx, _insert_mapping(payload, organisation_id)))
+
+        if not to_insert:
+            continue
+
+        try:
+            # render_nulls keeps every row's key set identical, so the batch
+            # goes out as a single executemany instead of being split up
+            # wherever optional columns are blank.
+            with db.session.begin_nested():
+                db.session.execute(
+                    insert(Employee).execution_options(render_nulls=True),
+                    [values for _idx, values in to_insert],
+                )
+            created += len(to_insert)
+        except Exception as e:
+            first_row, last_row = to_insert[0][0], to_insert[-1][0]
+            errors.append({"row": f"{first_row}-{last_row}", "error": str(e)})
+            skipped += len(to_insert)
+
+    elapsed = time.perf_counter() - started
+    processed = created + skipped
+    return {
+        "created": created,
+        "skipped": skipped,
+        "errors": errors,
+        "elapsed_seconds": round(elapsed, 3),
+        "rows_per_second": round(processed / elapsed, 1) if elapsed > 0 else processed,
+        "date_columns": {header: parser.report() for header, parser in date_parsers.items()},
+    }
@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+from sqlalchemy import case, func, literal_column, or_
+
+from models import Employee
+
+TYPEAHEAD_DEFAULT_LIMIT = 10
+TYPEAHEAD_MAX_LIMIT = 25
+TYPEAHEAD_MAX_TERMS = 4
+
+
+def employee_name_expression():
+    """``lower(coalesce(first) || ' ' || coalesce(last))``.
+
+    Literals are inlined so the SQL matches the trigram index expression
+    created in migration a3d9e2c7f514 on PostgreSQL.
+    """
+    return func.lower(
+        func.coalesce(Employee.first_name, literal_column("''"))
+        .op("||")(literal_column("' '"))
+        .op("||")(func.coalesce(Employee.last_name, literal_column("''")))
+    )
+
+
+def _like_escape(term):
+    return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def search_employees(query, term, *, limit=TYPEAHEAD_DEFAULT_LIMIT, include_leavers=False):
+    """Return up to ``limit`` employees from ``query`` matching ``term``.
+
+    Every word in ``term`` must appear in the name, email or job title.
+    Names starting with the first word rank first. ``query`` must already be
+    scoped to what the current user may see.
+    """
+    if not include_leavers:
+        query = query.filter(Employee.is_leaver.is_(False))
+
+    name = employee_name_expression()
+    words = (term or "").lower().split()[:TYPEAHEAD_MAX_TERMS]
+
+    for word in words:
+        like = f"%{_like_escape(word)}%"
+        query = query.filter(
+            or_(
+                name.like(like, escape="\\"),
+                func.lower(Employee.email).like(like, escape="\\"),
+                func.lower(Employee.job_title).like(like, escape="\\"),
+            )
+        )
+
+    order_by = []
+    if words:
+        prefix = f"{_like_escape(words[0])}%"
+        order_by.append(
+            case(
+                (
+                    or_(
+                        name.like(prefix, escape="\\"),
+                        func.lower(Employee.last_name).like(prefix, escape="\\"),
+                    ),
+                    0,
+                ),
+                else_=1,
+            )
+        )
+    order_by += [Employee.last_name.asc(), Employee.first_name.asc(), Employee.id.asc()]
+
+    return query.order_by(*order_by).limit(limit).all()
+
+
+def selected_employee_options(query, employee_id):
+    """Selector options rendered server-side: just the current selection.
+
+    The rest are fetched on demand from ``employees.employee_typeahead``.
+    ``query`` must already be scoped to what the current user may see; the
+    selection is kept even if the employee has since left.
+    """
+    if not employee_id:
+        return []
+    return query.filter(Employee.id == employee_id).all()
+
+
+def employee_typeahead_payload(employee):
+    return {
+        "id": employee.id,
+        "name": f"{employee.first_name or ''} {employee.last_name or ''}".strip(),
+        "job_title": employee.job_title,
+        "email": employee.email,
+        "is_leaver": bool(employee.is_leaver),
+    }
@@ -0,0 +1,260 @@
+from __future__ import annotations
+
+import json
+import os
+import glob
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from flask import current_app
+
+from models import ExportJob, db
+from pip_app.services.document_utils import BASE_DIR
+from pip_app.services.export_utils import EXPORT_TABLES, stream_export_archive
+
+EXPORT_DIR = os.path.join(BASE_DIR, "uploads", "exports")
+
+ACTIVE_EXPORT_STATUSES = ("queued", "running")
+
+# Archives hold every organisation's employee data, so they are only kept
+# long enough to be downloaded.
+EXPORT_RETENTION_HOURS = 24
+
+# One export at a time is enough: the work is I/O bound against the same
+# database, and a single worker keeps it from competing with web requests.
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="export-job")
+
+# Rows written so far for the table currently being exported, per job.
+# Completed tables are persisted on the job row; this only holds the
+# in-flight table so polling can show movement inside large tables.
+_live_progress = {}
+_live_progress_lock = threading.Lock()
+_running_job_ids = set()
+
+
+def _set_live_progress(job_id, table_name, rows):
+    with _live_progress_lock:
+        _live_progress[job_id] = {"table": table_name, "rows": rows}
+
+
+def _clear_live_progress(job_id):
+    with _live_progress_lock:
+        _live_progress.pop(job_id, None)
+
+
+def get_active_export_job():
+    return (
+        ExportJob.query.filter(ExportJob.status.in_(ACTIVE_EXPORT_STATUSES))
+        .order_by(ExportJob.id.desc())
+        .first()
+    )
+
+
+def start_export_job(created_by):
+    """Queue a full data export and return its ExportJob.
+
+    If an export is already queued or running, that job is returned instead
+    of starting a second one.
+    """
+    active_job = get_active_export_job()
+    if active_job is not None and not mark_export_job_if_interrupted(active_job):
+        return active_job
+
+    cleanup_expired_exports()
+
+    job = ExportJob(
+        created_by=created_by,
+        status="queued",
+        tables_total=len(EXPORT_TABLES),
+    )
+    db.session.add(job)
+    db.session.flush()
+    job_id = job.id
+
+    # Claim the job before it becomes visible, or another request could
+    # find it queued but unowned and mark it as interrupted.
+    with _live_progress_lock:
+        _running_job_ids.add(job_id)
+    try:
+        db.session.commit()
+    except Exception:
+        with _live_progress_lock:
+            _running_job_ids.discard(job_id)
+        raise
+
+    _executor.submit(_run_export_job, current_app._get_current_object(), job_id)
+    return job
+
+
+def _run_export_job(app, job_id):
+    with app.app_context():
+        try:
+            _write_export_archive(job_id)
+        except Exception as exc:
+            db.session.rollback()
+            app.logger.exception("Export job %s failed", job_id)
+
+            job = db.session.get(ExportJob, job_id)
+            if job is not None:
+                job.status = "failed"
+                job.error = str(exc)[:2000]
+                job.completed_at = datetime.utcnow()
+                db.session.commit()
+        finally:
+            _clear_live_progress(job_id)
+            with _live_progress_lock:
+                _running_job_ids.discard(job_id)
+            db.session.remove()
+
+
+def _write_export_archive(job_id):
+    job = db.session.get(ExportJob, job_id)
+    # Already failed as interrupted, or picked up by another worker.
+    if job is None or job.status != "queued":
+        return
+
+    job.status = "running"
+    job.started_at = datetime.utcnow()
+    db.session.commit()
+
+    os.makedirs(EXPORT_DIR, exist_ok=True)
+    timestamp = job.started_at.strftime("%Y-%m-%d_%H-%M")
+    final_path = os.path.join(EXPORT_DIR, f"export_{job_id}_{timestamp}.zip")
+    partial_path = f"{final_path}.part"
+    completed_tables = {}
+
+    def on_progress(table_name, rows, finished):
+        if not finished:
+            _set_live_progress(job_id, table_name, rows)
+            return
+
+        # Called between tables, once the previous table's result set has
+        # been fully consumed, so committing here does not cut a stream short.
+        completed_tables[table_name] = rows
+        job.tables_done = len(completed_tables)
+        job.rows_exported = sum(completed_tables.values())
+        job.progress_json = json.dumps(completed_tables)
+        db.session.commit()
+        _clear_live_progress(job_id)
+
+    try:
+        with open(partial_path, "wb") as archive_file:
+            for chunk in stream_export_archive(progress=on_progress):
+                archive_file.write(chunk)
+        os.replace(partial_path, final_path)
+    except Exception:
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+        raise
+
+    job.status = "completed"
+    job.file_path = final_path
+    job.file_size = os.path.getsize(final_path)
+    job.completed_at = datetime.utcnow()
+    db.session.commit()
+
+
+def mark_export_job_if_interrupted(job):
+    """Fail a queued/running job that no worker in this process owns.
+
+    The app runs a single gunicorn worker, so a job that is active in the
+    database but unknown here was cut off by a restart. Returns True when
+    the job was marked as failed.
+    """
+    if job.status not in ACTIVE_EXPORT_STATUSES:
+        return False
+
+    with _live_progress_lock:
+        owned = job.id in _running_job_ids
+
+    if owned:
+        return False
+
+    job.status = "failed"
+    job.error = "Export was interrupted before it finished."
+    job.completed_at = datetime.utcnow()
+    db.session.commit()
+    return True
+
+
+def export_job_status(job):
+    """Return a JSON-ready snapshot of an export job's progress."""
+    completed_tables = job.progress()
+
+    with _live_progress_lock:
+        live = dict(_live_progress.get(job.id) or {})
+
+    tables = []
+    for table in EXPORT_TABLES:
+        if table.filename in completed_tables:
+            tables.append({"name": table.filename, "rows": completed_tables[table.filename], "state": "done"})
+        elif live.get("table") == table.filename:
+            tables.append({"name": table.filename, "rows": live.get("rows", 0), "state": "running"})
+        else:
+            tables.append({"name": table.filename, "rows": 0, "state": "pending"})
+
+    return {
+        "id": job.id,
+        "status": job.status,
+        "created_by": job.created_by,
+        "created_at": job.created_at.isoformat() if job.created_at else None,
+        "started_at": job.started_at.isoformat() if job.started_at else None,
+        "completed_at": job.completed_at.isoformat() if job.completed_at else None,
+        "tables_total": job.tables_total,
+        "tables_done": job.tables_done,
+        "rows_exported": job.rows_exported + int(live.get("rows", 0)),
+        "tables": tables,
+        "file_size": job.file_size,
+        "error": job.error,
+    }
+
+
+def _export_cutoff(max_age_hours):
+    return datetime.utcnow() - timedelta(hours=max_age_hours)
+
+
+def cleanup_expired_exports(max_age_hours=EXPORT_RETENTION_HOURS):
+    """Delete archives older than the retention window and mark their jobs expired.
+
+    Also removes files in EXPORT_DIR past the window that no job points at,
+    such as partial files left by a restart. Returns the number of files
+    removed.
+    """
+    cutoff = _export_cutoff(max_age_hours)
+    removed = 0
+
+    expired_jobs = ExportJob.query.filter(
+        ExportJob.status == "completed",
+        ExportJob.completed_at < cutoff,
+    ).all()
+    for job in expired_jobs:
+        try:
+            if job.file_path and os.path.exists(job.file_path):
+                os.remove(job.file_path)
+                removed += 1
+        except OSError:
+            continue
+        job.status = "expired"
+        job.file_path = None
+    db.session.commit()
+
+    for path in glob.glob(os.path.join(EXPORT_DIR, "export_*")):
+        try:
+            if datetime.utcfromtimestamp(os.path.getmtime(path)) < cutoff:
+                os.remove(path)
+                removed += 1
+        except OSError:
+            continue
+
+    return removed
+
+
+def export_job_file_available(job):
+    return bool(
+        job.status == "completed"
+        and job.file_path
+        and job.completed_at
+        and job.completed_at >= _export_cutoff(EXPORT_RETENTION_HOURS)
+        and os.path.exists(job.file_path)
+    )
@@ -0,0 +1,379 @@
+from __future__ import annotations
+
+import csv
+import io
+import zipfile
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+from models import (
+    AdvisorEscalation,
+    Employee,
+    EmployeeRelationsCase,
+    EmployeeRelationsMeeting,
+    EmployeeRelationsTimelineEvent,
+    PIPRecord,
+    ProbationPlan,
+    ProbationRecord,
+    ProbationReview,
+    SicknessCase,
+    SicknessMeeting,
+    SupervisionAction,
+    SupervisionRecord,
+    TimelineEvent,
+    User,
+    db,
+)
+
+EXPORT_YIELD_PER = 1000
+
+
+def _format_date(value):
+    return value.strftime("%Y-%m-%d") if value else ""
+
+
+def _format_datetime(value):
+    return value.strftime("%Y-%m-%d %H:%M:%S") if value else ""
+
+
+def _format_value(value):
+    return "" if value is None else value
+
+
+@dataclass(frozen=True)
+class ExportTable:
+    """One CSV in the export archive.
+
+    ``columns`` is a list of ``(header, column, formatter)``; only those
+    columns are selected, so rows stream as plain tuples without loading
+    ORM objects or relationships.
+    """
+
+    filename: str
+    columns: list
+    order_by: object
+    joins: tuple = ()
+
+    @property
+    def fieldnames(self):
+        return [header for header, _column, _formatter in self.columns]
+
+    def query(self):
+        query = db.session.query(*[column for _header, column, _formatter in self.columns])
+        for target, onclause in self.joins:
+            query = query.outerjoin(target, onclause)
+        return query.order_by(self.order_by)
+
+    def format_row(self, row):
+        return [
+            formatter(value)
+            for (_header, _column, formatter), value in zip(self.columns, row)
+        ]
+
+    def iter_rows(self, yield_per=EXPORT_YIELD_PER):
+        for row in self.query().yield_per(yield_per):
+            yield self.format_row(row)
+
+
+def _col(header, column, formatter=_format_value):
+    return (header, column, formatter)
+
+
+EXPORT_TABLES = [
+    ExportTable(
+        "employees.csv",
+        [
+            _col("id", Employee.id),
+            _col("first_name", Employee.first_name),
+            _col("last_name", Employee.last_name),
+            _col("job_title", Employee.job_title),
+            _col("line_manager", Employee.line_manager),
+            _col("service", Employee.service),
+            _col("start_date", Employee.start_date, _format_date),
+            _col("team_id", Employee.team_id),
+            _col("email", Employee.email),
+        ],
+        Employee.id,
+    ),
+    ExportTable(
+        "pip_records.csv",
+        [
+            _col("id", PIPRecord.id),
+            _col("employee_id", PIPRecord.employee_id),
+            _col("concerns", PIPRecord.concerns),
+            _col("concern_category", PIPRecord.concern_category),
+            _col("severity", PIPRecord.severity),
+            _col("frequency", PIPRecord.frequency),
+            _col("tags", PIPRecord.tags),
+            _col("start_date", PIPRecord.start_date, _format_date),
+            _col("review_date", PIPRecord.review_date, _format_date),
+            _col("status", PIPRecord.status),
+            _col("created_by", PIPRecord.created_by),
+        ],
+        PIPRecord.id,
+    ),
+    ExportTable(
+        "timeline_events.csv",
+        [
+            _col("id", TimelineEvent.id),
+            _col("pip_record_id", TimelineEvent.pip_record_id),
+            _col("employee_id", PIPRecord.employee_id),
+            _col("event_type", TimelineEvent.event_type),
+            _col("notes", TimelineEvent.notes),
+            _col("updated_by", TimelineEvent.updated_by),
+            _col("timestamp", TimelineEvent.timestamp, _format_datetime),
+        ],
+        TimelineEvent.id,
+        joins=((PIPRecord, TimelineEvent.pip_record_id == PIPRecord.id),),
+    ),
+    ExportTable(
+        "users.csv",
+        [
+            _col("id", User.id),
+            _col("username", User.username),
+            _col("email", User.email),
+            _col("admin_level", User.admin_level),
+            _col("team_id", User.team_id),
+            _col("organisation_id", User.organisation_id),
+        ],
+        User.id,
+    ),
+    ExportTable(
+        "probation_records.csv",
+        [
+            _col("id", ProbationRecord.id),
+            _col("employee_id", ProbationRecord.employee_id),
+            _col("status", ProbationRecord.status),
+            _col("start_date", ProbationRecord.start_date, _format_date),
+            _col("expected_end_date", ProbationRecord.expected_end_date, _format_date),
+            _col("notes", ProbationRecord.notes),
+        ],
+        ProbationRecord.id,
+    ),
+    ExportTable(
+        "probation_reviews.csv",
+        [
+            _col("id", ProbationReview.id),
+            _col("probation_id", ProbationReview.probation_id),
+            _col("review_date", ProbationReview.review_date, _format_date),
+            _col("reviewer", ProbationReview.reviewer),
+            _col("summary", ProbationReview.summary),
+            _col("concerns_flag", ProbationReview.concerns_flag),
+        ],
+        ProbationReview.id,
+    ),
+    ExportTable(
+        "probation_plans.csv",
+        [
+            _col("id", ProbationPlan.id),
+            _col("probation_id", ProbationPlan.probation_id),
+            _col("objectives", ProbationPlan.objectives),
+            _col("outcome", ProbationPlan.outcome),
+            _col("deadline", ProbationPlan.deadline, _format_date),
+        ],
+        ProbationPlan.id,
+    ),
+    ExportTable(
+        "sickness_cases.csv",
+        [
+            _col("id", SicknessCase.id),
+            _col("employee_id", SicknessCase.employee_id),
+            _col("start_date", SicknessCase.start_date, _format_date),
+            _col("end_date", SicknessCase.end_date, _format_date),
+            _col("reason", SicknessCase.reason),
+            _col("trigger_type", SicknessCase.trigger_type),
+            _col("status", SicknessCase.status),
+            _col("notes", SicknessCase.notes),
+            _col("created_at", SicknessCase.created_at, _format_datetime),
+            _col("updated_at", SicknessCase.updated_at, _format_datetime),
+        ],
+        SicknessCase.id,
+    ),
+    ExportTable(
+        "sickness_meetings.csv",
+        [
+            _col("id", SicknessMeeting.id),
+            _col("sickness_case_id", SicknessMeeting.sickness_case_id),
+            _col("meeting_date", SicknessMeeting.meeting_date, _format_date),
+            _col("meeting_type", SicknessMeeting.meeting_type),
+            _col("chair", SicknessMeeting.chair),
+            _col("notes", SicknessMeeting.notes),
+            _col("outcome", SicknessMeeting.outcome),
+        ],
+        SicknessMeeting.id,
+    ),
+    ExportTable(
+        "employee_relations_cases.csv",
+        [
+            _col("id", EmployeeRelationsCase.id),
+            _col("employee_id", EmployeeRelationsCase.employee_id),
+            _col("case_type", EmployeeRelationsCase.case_type),
+            _col("title", EmployeeRelationsCase.title),
+            _col("allegation_or_grievance", EmployeeRelationsCase.allegation_or_grievance),
+            _col("date_raised", EmployeeRelationsCase.date_raised, _format_date),
+            _col("status", EmployeeRelationsCase.status),
+            _col("stage", EmployeeRelationsCase.stage),
+            _col("priority_level", EmployeeRelationsCase.priority_level),
+            _col("next_action_date", EmployeeRelationsCase.next_action_date, _format_date),
+            _col("hearing_date", EmployeeRelationsCase.hearing_date, _format_date),
+            _col("outcome_status", EmployeeRelationsCase.outcome_status),
+            _col("final_sanction", EmployeeRelationsCase.final_sanction),
+            _col("date_closed", EmployeeRelationsCase.date_closed, _format_date),
+            _col("hr_lead", EmployeeRelationsCase.hr_lead),
+            _col("created_by", EmployeeRelationsCase.created_by),
+            _col("created_at", EmployeeRelationsCase.created_at, _format_datetime),
+        ],
+        EmployeeRelationsCase.id,
+    ),
+    ExportTable(
+        "employee_relations_meetings.csv",
+        [
+            _col("id", EmployeeRelationsMeeting.id),
+            _col("case_id", EmployeeRelationsMeeting.case_id),
+            _col("meeting_type", EmployeeRelationsMeeting.meeting_type),
+            _col("meeting_datetime", EmployeeRelationsMeeting.meeting_datetime, _format_datetime),
+            _col("location", EmployeeRelationsMeeting.location),
+            _col("attendees", EmployeeRelationsMeeting.attendees),
+            _col("notes", EmployeeRelationsMeeting.notes),
+            _col("outcome_summary", EmployeeRelationsMeeting.outcome_summary),
+        ],
+        EmployeeRelationsMeeting.id,
+    ),
+    ExportTable(
+        "employee_relations_timeline_events.csv",
+        [
+            _col("id", EmployeeRelationsTimelineEvent.id),
+            _col("case_id", EmployeeRelationsTimelineEvent.case_id),
+            _col("event_type", EmployeeRelationsTimelineEvent.event_type),
+            _col("notes", EmployeeRelationsTimelineEvent.notes),
+            _col("updated_by", EmployeeRelationsTimelineEvent.updated_by),
+            _col("timestamp", EmployeeRelationsTimelineEvent.timestamp, _format_datetime),
+        ],
+        EmployeeRelationsTimelineEvent.id,
+    ),
+    ExportTable(
+        "supervision_records.csv",
+        [
+            _col("id", SupervisionRecord.id),
+            _col("organisation_id", SupervisionRecord.organisation_id),
+            _col("employee_id", SupervisionRecord.employee_id),
+            _col("manager_user_id", SupervisionRecord.manager_user_id),
+            _col("meeting_title", SupervisionRecord.meeting_title),
+            _col("meeting_type", SupervisionRecord.meeting_type),
+            _col("meeting_date", SupervisionRecord.meeting_date, _format_date),
+            _col("status", SupervisionRecord.status),
+            _col("overall_summary", SupervisionRecord.overall_summary),
+            _col("next_meeting_date", SupervisionRecord.next_meeting_date, _format_date),
+            _col("completed_at", SupervisionRecord.completed_at, _format_datetime),
+        ],
+        SupervisionRecord.id,
+    ),
+    ExportTable(
+        "supervision_actions.csv",
+        [
+            _col("id", SupervisionAction.id),
+            _col("supervision_id", SupervisionAction.supervision_id),
+            _col("employee_id", SupervisionAction.employee_id),
+            _col("description", SupervisionAction.description),
+            _col("owner_type", SupervisionAction.owner_type),
+            _col("owner_name", SupervisionAction.owner_name),
+            _col("due_date", SupervisionAction.due_date, _format_date),
+            _col("status", SupervisionAction.status),
+            _col("completed_at", SupervisionAction.completed_at, _format_datetime),
+        ],
+        SupervisionAction.id,
+    ),
+    ExportTable(
+        "advisor_escalations.csv",
+        [
+            _col("id", AdvisorEscalation.id),
+            _col("organisation_id", AdvisorEscalation.organisation_id),
+            _col("module_key", AdvisorEscalation.module_key),
+            _col("source_record_type", AdvisorEscalation.source_record_type),
+            _col("source_record_id", AdvisorEscalation.source_record_id),
+            _col("submitted_by_user_id", AdvisorEscalation.submitted_by_user_id),
+            _col("assigned_to_user_id", AdvisorEscalation.assigned_to_user_id),
+            _col("status", AdvisorEscalation.status),
+            _col("summary", AdvisorEscalation.summary),
+            _col("submitted_at", AdvisorEscalation.submitted_at, _format_datetime),
+            _col("closed_at", AdvisorEscalation.closed_at, _format_datetime),
+        ],
+        AdvisorEscalation.id,
+    ),
+]
+
+
+class _ChunkBuffer(io.RawIOBase):
+    """Write-only, non-seekable sink that hands written bytes back in chunks.
+
+    Because it cannot seek, ZipFile writes each member with a trailing data
+    descriptor, which is what lets the archive be produced as a stream.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self):
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def stream_export_archive(
+    tables=None,
+    *,
+    flush_every: int = EXPORT_YIELD_PER,
+    progress: Optional[Callable[[str, int, bool], None]] = None,
+):
+    """Yield a zip archive of CSV exports as a sequence of byte chunks.
+
+    Rows are streamed from the database with ``yield_per`` and written
+    straight into the zip member, so memory use stays flat regardless of
+    table size. ``progress(filename, rows_written, finished)`` is called as
+    each table advances.
+    """
+    tables = EXPORT_TABLES if tables is None else tables
+    sink = _ChunkBuffer()
+
+    with zipfile.ZipFile(sink, "w", zipfile.ZIP_DEFLATED) as archive:
+        for table in tables:
+            rows_written = 0
+
+            with archive.open(table.filename, "w", force_zip64=True) as member:
+                text = io.TextIOWrapper(member, encoding="utf-8", newline="")
+                writer = csv.writer(text)
+                writer.writerow(table.fieldnames)
+
+                for row in table.iter_rows():
+                    writer.writerow(row)
+                    rows_written += 1
+
+                    if rows_written % flush_every == 0:
+                        text.flush()
+                        if progress:
+                            progress(table.filename, rows_written, False)
+                        chunk = sink.drain()
+                        if chunk:
+                            yield chunk
+
+                text.flush()
+                text.detach()
+
+            if progress:
+                progress(table.filename, rows_written, True)
+
+            chunk = sink.drain()
+            if chunk:
+                yield chunk
+
+    chunk = sink.drain()
+    if chunk:
+        yield chunk
@@ -0,0 +1,168 @@
+from __future__ import annotations
+
+import glob
+import json
+import os
+import sqlite3
+import tempfile
+import time
+from contextlib import contextmanager
+from itertools import islice
+
+from pip_app.services.import_utils import DateFormatSampler, open_import_file
+
+IMPORT_TEMP_PREFIX = "emp_import_"
+STAGING_SUFFIX = ".staging.sqlite3"
+
+# Uploads and their staging files older than this are removed the next time
+# anyone starts an import.
+IMPORT_STAGING_TTL_SECONDS = 6 * 60 * 60
+
+STAGING_INSERT_BATCH = 1000
+STAGING_MMAP_BYTES = 256 * 1024 * 1024
+
+
+def staging_path(temp_id):
+    return f"{temp_id}{STAGING_SUFFIX}"
+
+
+def is_valid_temp_id(temp_id):
+    """Only accept upload files this module created in the temp directory."""
+    if not temp_id:
+        return False
+    real_path = os.path.realpath(temp_id)
+    return (
+        os.path.dirname(real_path) == os.path.realpath(tempfile.gettempdir())
+        and os.path.basename(real_path).startswith(IMPORT_TEMP_PREFIX)
+        and not real_path.endswith(STAGING_SUFFIX)
+        and os.path.exists(real_path)
+    )
+
+
+def _cell(value):
+    return None if value is None else str(value)
+
+
+def build_import_staging(temp_id, headers, rows):
+    """Write parsed upload rows to a SQLite staging file next to ``temp_id``.
+
+    Cells are stored as text in row order, along with the headers and the
+    date format inferred for each date-like column. Later import steps read
+    this file instead of parsing the CSV/XLSX again.
+    """
+    headers = list(headers or [])
+    path = staging_path(temp_id)
+    partial_path = f"{path}.part"
+    samplers = [DateFormatSampler() for _ in headers]
+    row_count = 0
+
+    conn = sqlite3.connect(partial_path)
+    try:
+        conn.execute("PRAGMA journal_mode=OFF")
+        conn.execute("PRAGMA synchronous=OFF")
+        conn.execute("CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT)")
+        column_defs = ", ".join(f"c{i} TEXT" for i in range(len(headers)))
+        conn.execute(
+            f"CREATE TABLE rows (row_num INTEGER PRIMARY KEY{', ' + column_defs if column_defs else ''})"
+        )
+        placeholders = ", ".join("?" for _ in range(len(headers) + 1))
+        insert_sql = f"INSERT INTO rows VALUES ({placeholders})"
+
+        while True:
+            batch = []
+            for row in islice(rows, STAGING_INSERT_BATCH):
+                row_count += 1
+                values = [_cell(row.get(header)) for header in headers]
+                for sampler, value in zip(samplers, values):
+                    sampler.observe(value)
+                batch.append([row_count, *values])
+            if not batch:
+                break
+            conn.executemany(insert_sql, batch)
+
+        date_formats = {}
+        for header, sampler in zip(headers, samplers):
+            inferred = sampler.result()
+            if inferred is not None:
+                date_formats[header] = inferred
+        conn.executemany(
+            "INSERT INTO meta VALUES (?, ?)",
+            [
+                ("headers", json.dumps(headers)),
+                ("date_formats", json.dumps(date_formats)),
+                ("row_count", str(row_count)),
+            ],
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+    os.replace(partial_path, path)
+    return {"headers": headers, "date_formats": date_formats, "row_count": row_count}
+
+
+def _iter_staged_rows(conn, headers):
+    cursor = conn.execute("SELECT * FROM rows ORDER BY row_num")
+    try:
+        while True:
+            batch = cursor.fetchmany(STAGING_INSERT_BATCH)
+            if not batch:
+                return
+            for row in batch:
+                yield dict(zip(headers, row[1:]))
+    finally:
+        cursor.close()
+
+
+@contextmanager
+def open_staged_import(temp_id):
+    """Yield ``(headers, rows, date_formats)`` for an uploaded import.
+
+    Reads the staging file written at upload time, memory-mapped, and falls
+    back to re-parsing the original upload if staging is missing.
+    """
+    path = staging_path(temp_id)
+    if not os.path.exists(path):
+        with open_import_file(temp_id) as (headers, rows):
+            yield headers, rows, {}
+        return
+
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        conn.execute(f"PRAGMA mmap_size={STAGING_MMAP_BYTES}")
+        meta = dict(conn.execute("SELECT key, value FROM meta"))
+        headers = json.loads(meta.get("headers") or "[]")
+        date_formats = json.loads(meta.get("date_formats") or "{}")
+        rows = _iter_staged_rows(conn, headers)
+        try:
+            yield headers, rows, date_formats
+        finally:
+            rows.close()
+    finally:
+        conn.close()
+
+
+def discard_import(temp_id):
+    for path in (temp_id, staging_path(temp_id)):
+        try:
+            if path and os.path.exists(path):
+                os.remove(path)
+        except OSError:
+            pass
+
+
+def cleanup_expired_imports(max_age_seconds=IMPORT_STAGING_TTL_SECONDS):
+    """Remove abandoned uploads and staging files older than the TTL."""
+    cutoff = time.time() - max_age_seconds
+    pattern = os.path.join(tempfile.gettempdir(), f"{IMPORT_TEMP_PREFIX}*")
+    removed = 0
+
+    for path in glob.glob(pattern):
+        try:
+            if os.path.getmtime(path) < cutoff:
+                os.remove(path)
+                removed += 1
+        except OSError:
+            continue
+
+    return removed
@@ -2,7 +2,9 @@ from __future__ import annotations
 
 import csv
 import io
-from datetime import datetime
+import re
+from contextlib import contextmanager
+from datetime import date, datetime
 
 try:
     import openpyxl  # noqa: F401
@@ -20,35 +22,78 @@ EMPLOYEE_FIELDS = [
 REQUIRED_FIELDS = ["first_name", "last_name"]
 
 
-def read_csv_bytes(file_bytes: bytes):
-    text = file_bytes.decode("utf-8-sig", errors="replace")
-    reader = csv.DictReader(io.StringIO(text))
-    rows = [dict(r) for r in reader]
+def iter_csv_rows(file_obj):
+    """Return ``(headers, rows)`` for a binary CSV file object.
+
+    The file is decoded incrementally and ``rows`` is a generator of dicts,
+    so only the current row is held in memory.
+    """
+    text = io.TextIOWrapper(file_obj, encoding="utf-8-sig", errors="replace", newline="")
+    reader = csv.DictReader(text)
     headers = reader.fieldnames or []
-    return headers, rows
+    return headers, (dict(r) for r in reader)
 
 
-def read_xlsx_bytes(file_bytes: bytes):
+def iter_xlsx_rows(file_obj):
+    """Return ``(headers, rows)`` for the active sheet of an XLSX file.
+
+    Uses openpyxl's read-only mode, which streams cell values instead of
+    building the whole workbook. The workbook is closed once ``rows`` is
+    exhausted or closed.
+    """
     if not XLSX_ENABLED or openpyxl is None:
         raise RuntimeError("XLSX support is not available")
 
-    workbook = openpyxl.load_workbook(io.BytesIO(file_bytes))
-    sheet = workbook.active
-    headers = [c.value for c in next(sheet.iter_rows(min_row=1, max_row=1))]
-    rows = []
-    for row in sheet.iter_rows(min_row=2, values_only=True):
-        rows.append({headers[i]: (row[i] if i < len(headers) else None) for i in range(len(headers))})
-    return headers, rows
+    workbook = openpyxl.load_workbook(file_obj, read_only=True, data_only=True)
+    sheet_rows = workbook.active.iter_rows(values_only=True)
+    headers = list(next(sheet_rows, None) or [])
+
+    def rows():
+        try:
+            for row in sheet_rows:
+                yield {headers[i]: (row[i] if i < len(row) else None) for i in range(len(headers))}
+        finally:
+            workbook.close()
+
+    return headers, rows()
+
+
+@contextmanager
+def open_import_file(path):
+    """Open an uploaded import file and yield ``(headers, rows)``.
+
+    ``rows`` streams from disk; consume it inside the ``with`` block.
+    """
+    ext = path.rsplit(".", 1)[-1].lower()
+    with open(path, "rb") as file_obj:
+        headers, rows = iter_csv_rows(file_obj) if ext == "csv" else iter_xlsx_rows(file_obj)
+        try:
+            yield headers, rows
+        finally:
+            rows.close()
+
+
+def read_csv_bytes(file_bytes: bytes):
+    headers, rows = iter_csv_rows(io.BytesIO(file_bytes))
+    return headers, list(rows)
+
+
+def read_xlsx_bytes(file_bytes: bytes):
+    headers, rows = iter_xlsx_rows(io.BytesIO(file_bytes))
+    return headers, list(rows)
 
 
 def normalize_header(h):
     return (h or "").strip().lower().replace(" ", "_")
 
 
+DATE_FORMATS = ("%Y-%m-%d", "%d/%m/%Y", "%d-%m-%Y", "%m/%d/%Y")
+
+
 def try_parse_date(value):
     if not value:
         return None
-    for fmt in ("%Y-%m-%d", "%d/%m/%Y", "%d-%m-%Y", "%m/%d/%Y"):
+    for fmt in DATE_FORMATS:
         try:
             return datetime.strptime(str(value).strip(), fmt).date()
         except Exception:
@@ -56,6 +101,210 @@ def try_parse_date(value):
     return None
 
 
+# Column-level date inference. _FORMAT_PATTERNS maps each supported format
+# to its regex and the group indexes holding (year, month, day).
+DATE_SAMPLE_SIZE = 1000
+DATE_COLUMN_MIN_SHARE = 0.8
+MAX_REPORTED_DATE_FAILURES = 20
+
+# Columns with these statuses have no single safe format; the import is
+# blocked until the user picks one (see apply_date_format_choices).
+BLOCKING_DATE_STATUSES = {"ambiguous", "mixed"}
+
+_ISO_DATE_RE = re.compile(r"^(\d{4})-(\d{1,2})-(\d{1,2})$")
+_SLASH_DATE_RE = re.compile(r"^(\d{1,2})/(\d{1,2})/(\d{4})$")
+_DASH_DATE_RE = re.compile(r"^(\d{1,2})-(\d{1,2})-(\d{4})$")
+
+_FORMAT_PATTERNS = {
+    "%Y-%m-%d": (_ISO_DATE_RE, (0, 1, 2)),
+    "%d/%m/%Y": (_SLASH_DATE_RE, (2, 1, 0)),
+    "%m/%d/%Y": (_SLASH_DATE_RE, (2, 0, 1)),
+    "%d-%m-%Y": (_DASH_DATE_RE, (2, 1, 0)),
+}
+
+
+class DateFormatSampler:
+    """Classify a column's first DATE_SAMPLE_SIZE non-empty values by shape.
+
+    Only regex matches are used, so sampling never raises. ``result()``
+    picks the single format consistent with the sample, or explains why
+    there is none.
+    """
+
+    def __init__(self, sample_size=DATE_SAMPLE_SIZE):
+        self.sample_size = sample_size
+        self.sampled = 0
+        self.iso = 0
+        self.dash = 0
+        self.slash = 0
+        self.slash_day_first = 0
+        self.slash_month_first = 0
+
+    def observe(self, value):
+        if value is None or self.sampled >= self.sample_size:
+            return
+        text = str(value).strip()
+        if not text:
+            return
+
+        self.sampled += 1
+        if _ISO_DATE_RE.match(text):
+            self.iso += 1
+            return
+        if _DASH_DATE_RE.match(text):
+            self.dash += 1
+            return
+
+        match = _SLASH_DATE_RE.match(text)
+        if match:
+            self.slash += 1
+            first, second = int(match.group(1)), int(match.group(2))
+            if first > 12:
+                self.slash_day_first += 1
+            elif second > 12:
+                self.slash_month_first += 1
+
+    def result(self):
+        """Return ``{"format": fmt-or-None, "status": ...}``, or None.
+
+        None means the column does not look like a date column at all.
+        """
+        date_like = self.iso + self.dash + self.slash
+        if not date_like or date_like < self.sampled * DATE_COLUMN_MIN_SHARE:
+            return None
+
+        families = [count for count in (self.iso, self.dash, self.slash) if count]
+        if len(families) > 1:
+            return {"format": None, "status": "mixed"}
+
+        if self.iso:
+            return {"format": "%Y-%m-%d", "status": "inferred"}
+        if self.dash:
+            return {"format": "%d-%m-%Y", "status": "inferred"}
+
+        if self.slash_day_first and self.slash_month_first:
+            return {"format": None, "status": "ambiguous"}
+        if self.slash_month_first:
+            return {"format": "%m/%d/%Y", "status": "inferred"}
+        return {"format": "%d/%m/%Y", "status": "inferred"}
+
+
+def parse_date_with_format(value, fmt):
+    """Parse with one known format via its regex, without strptime."""
+    pattern, order = _FORMAT_PATTERNS[fmt]
+    match = pattern.match(str(value).strip())
+    if not match:
+        return None
+    parts = match.groups()
+    try:
+        return date(int(parts[order[0]]), int(parts[order[1]]), int(parts[order[2]]))
+    except ValueError:
+        return None
+
+
+def apply_date_format_choices(date_formats, choices):
+    """Overlay user-chosen formats (``{header: fmt}``) on inferred ones.
+
+    Unknown formats are ignored, so a bad choice leaves the column blocked.
+    """
+    merged = dict(date_formats or {})
+    for header, fmt in (choices or {}).items():
+        if fmt in _FORMAT_PATTERNS:
+            merged[header] = {"format": fmt, "status": "chosen"}
+    return merged
+
+
+def blocking_date_columns(mapping, date_formats):
+    """Return ``[{"column", "status", "error"}]`` for mapped date columns
+    whose values mix formats or read both day- and month-first."""
+    errors = []
+    for header, field in (mapping or {}).items():
+        if field != "start_date":
+            continue
+        status = ((date_formats or {}).get(header) or {}).get("status")
+        if status == "ambiguous":
+            error = "Values read both day-first and month-first; choose the column's date format."
+        elif status == "mixed":
+            error = "Values use more than one date format; choose the column's date format."
+        else:
+            continue
+        errors.append({"column": header, "status": status, "error": error})
+    return errors
+
+
+class DateColumnParser:
+    """Parse one mapped date column and count the cells that fail.
+
+    With an inferred or chosen format every cell is parsed with that format
+    only. Ambiguous and mixed columns parse nothing (the import is blocked
+    for them); only unrecognised columns fall back to ``try_parse_date``.
+    """
+
+    def __init__(self, fmt=None, status="unrecognised"):
+        self.fmt = fmt if fmt in _FORMAT_PATTERNS else None
+        self.status = status
+        self.blocked = self.fmt is None and status in BLOCKING_DATE_STATUSES
+        self.parsed = 0
+        self.failed = 0
+        self.failed_rows = []
+
+    def parse(self, value, row_num=None):
+        if value is None or not str(value).strip() or self.blocked:
+            return None
+
+        parsed = parse_date_with_format(value, self.fmt) if self.fmt else try_parse_date(value)
+        if parsed is None:
+            self.failed += 1
+            if row_num is not None and len(self.failed_rows) < MAX_REPORTED_DATE_FAILURES:
+                self.failed_rows.append(row_num)
+        else:
+            self.parsed += 1
+        return parsed
+
+    def report(self):
+        return {
+            "format": self.fmt,
+            "status": self.status,
+            "parsed": self.parsed,
+            "failed": self.failed,
+            "failed_rows": list(self.failed_rows),
+        }
+
+
+def build_date_parsers(mapping, date_formats=None):
+    """Create a DateColumnParser for every source header mapped to a date field."""
+    date_formats = date_formats or {}
+    parsers = {}
+    for header, field in (mapping or {}).items():
+        if field != "start_date":
+            continue
+        inferred = date_formats.get(header) or {}
+        parsers[header] = DateColumnParser(
+            inferred.get("format"),
+            inferred.get("status", "unrecognised"),
+        )
+    return parsers
+
+
+def map_import_row(row, mapping, date_parsers=None, row_num=None):
+    """Project one source row onto Employee fields using the header mapping.
+
+    ``date_parsers`` (from ``build_date_parsers``) parses date cells with the
+    column's inferred format and records failures against ``row_num``.
+    """
+    out = {}
+    for header, value in row.items():
+        field = mapping.get(header)
+        if not field:
+            continue
+        if field == "start_date":
+            parser = (date_parsers or {}).get(header)
+            out[field] = parser.parse(value, row_num) if parser else try_parse_date(value)
+        else:
+            out[field] = (str(value).strip() if value is not None else None)
+    return out
+
+
 def parse_iso_date(s):
     try:
         return datetime.strptime((s or "").strip(), "%Y-%m-%d").date()
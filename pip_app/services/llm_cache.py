@@ -0,0 +1,171 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import threading
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import func
+
+from models import LLMResponseCacheEntry, db
+
+DEFAULT_LLM_CACHE_TTL_SECONDS = 7 * 24 * 3600
+DEFAULT_LLM_CACHE_MAX_ENTRIES = 2000
+
+# The OpenAI default when a call does not set one.
+DEFAULT_TEMPERATURE = 1.0
+
+_stats = {"hits": 0, "misses": 0, "bypassed": 0, "stored": 0}
+_stats_lock = threading.Lock()
+
+
+def _count(name):
+    with _stats_lock:
+        _stats[name] += 1
+
+
+def _cache_enabled():
+    return current_app.config.get("LLM_CACHE_ENABLED", True)
+
+
+def prompt_hash(completion):
+    """sha256 of everything in a chat completion that shapes the answer.
+
+    Model and temperature are part of the cache key in their own columns;
+    the messages plus ``response_format`` and ``max_tokens`` are hashed.
+    """
+    material = {
+        "messages": completion.get("messages") or [],
+        "response_format": completion.get("response_format"),
+        "max_tokens": completion.get("max_tokens"),
+    }
+    canonical = json.dumps(material, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def _cache_key(completion):
+    temperature = completion.get("temperature")
+    return (
+        completion["model"],
+        float(DEFAULT_TEMPERATURE if temperature is None else temperature),
+        prompt_hash(completion),
+    )
+
+
+def _lookup(key):
+    model, temperature, digest = key
+    return LLMResponseCacheEntry.query.filter_by(
+        model=model,
+        temperature=temperature,
+        prompt_hash=digest,
+    ).first()
+
+
+def _expired(entry, now):
+    ttl = current_app.config.get("LLM_CACHE_TTL_SECONDS", DEFAULT_LLM_CACHE_TTL_SECONDS)
+    return entry.created_at < now - timedelta(seconds=ttl)
+
+
+def get_cached_response(completion):
+    """Return the cached answer for ``completion``, or None on a miss.
+
+    A hit bumps the entry's ``last_used_at`` and ``hit_count``; the caller's
+    next commit persists that. Expired entries are deleted and count as
+    misses.
+    """
+    if not _cache_enabled():
+        return None
+
+    now = datetime.utcnow()
+    entry = _lookup(_cache_key(completion))
+    if entry is not None and _expired(entry, now):
+        db.session.delete(entry)
+        db.session.commit()
+        entry = None
+
+    if entry is None:
+        _count("misses")
+        return None
+
+    entry.hit_count += 1
+    entry.last_used_at = now
+    _count("hits")
+    return entry.response_text
+
+
+def record_cache_bypass():
+    _count("bypassed")
+
+
+def store_cached_response(completion, response_text):
+    """Save (or refresh) the answer for ``completion`` and evict old rows.
+
+    Commits on its own, so call it after the caller's work is committed.
+    """
+    if not _cache_enabled() or not response_text:
+        return
+
+    now = datetime.utcnow()
+    key = _cache_key(completion)
+    entry = _lookup(key)
+    if entry is None:
+        model, temperature, digest = key
+        entry = LLMResponseCacheEntry(
+            model=model,
+            temperature=temperature,
+            prompt_hash=digest,
+            hit_count=0,
+        )
+        db.session.add(entry)
+
+    # A forced regeneration replaces the old answer and restarts its TTL.
+    entry.response_text = response_text
+    entry.created_at = now
+    entry.last_used_at = now
+    _evict(now)
+    db.session.commit()
+    _count("stored")
+
+
+def _evict(now):
+    ttl = current_app.config.get("LLM_CACHE_TTL_SECONDS", DEFAULT_LLM_CACHE_TTL_SECONDS)
+    max_entries = current_app.config.get("LLM_CACHE_MAX_ENTRIES", DEFAULT_LLM_CACHE_MAX_ENTRIES)
+
+    LLMResponseCacheEntry.query.filter(
+        LLMResponseCacheEntry.created_at < now - timedelta(seconds=ttl)
+    ).delete(synchronize_session=False)
+
+    db.session.flush()
+    overflow = LLMResponseCacheEntry.query.count() - max_entries
+    if overflow > 0:
+        # Least recently used first.
+        stale_ids = [
+            row.id
+            for row in LLMResponseCacheEntry.query.with_entities(LLMResponseCacheEntry.id)
+            .order_by(LLMResponseCacheEntry.last_used_at.asc(), LLMResponseCacheEntry.id.asc())
+            .limit(overflow)
+        ]
+        LLMResponseCacheEntry.query.filter(
+            LLMResponseCacheEntry.id.in_(stale_ids)
+        ).delete(synchronize_session=False)
+
+
+def llm_cache_stats():
+    """Hit rate for this process plus totals from the cache table."""
+    with _stats_lock:
+        stats = dict(_stats)
+
+    lookups = stats["hits"] + stats["misses"]
+    entries, lifetime_hits = db.session.query(
+        func.count(LLMResponseCacheEntry.id),
+        func.coalesce(func.sum(LLMResponseCacheEntry.hit_count), 0),
+    ).one()
+
+    stats.update({
+        "lookups": lookups,
+        "hit_rate": round(stats["hits"] / lookups, 3) if lookups else None,
+        "entries": entries,
+        "lifetime_hits": int(lifetime_hits),
+    })
+    return stats
@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+from sqlalchemy.orm import joinedload, selectinload
+
+from models import (
+    AdvisorEscalation,
+    EmployeeRelationsAIAdvice,
+    EmployeeRelationsCase,
+    PIPRecord,
+    SicknessCase,
+    SupervisionRecord,
+)
+
+# (model, profile name) -> loader options applied when a page loads that
+# model. Many-to-one relationships are joined into the main query;
+# collections use selectinload so several of them never multiply rows.
+LOADER_PROFILES = {}
+
+
+def register_loader_profile(model, name, *options):
+    LOADER_PROFILES[(model, name)] = tuple(options)
+
+
+def loader_options(model, name="detail"):
+    try:
+        return LOADER_PROFILES[(model, name)]
+    except KeyError:
+        raise KeyError(f"No loader profile {name!r} registered for {model.__name__}") from None
+
+
+def with_loader_profile(query, model, name="detail"):
+    """Apply the ``name`` loader profile for ``model`` to ``query``."""
+    return query.options(*loader_options(model, name))
+
+
+register_loader_profile(
+    PIPRecord,
+    "detail",
+    joinedload(PIPRecord.employee),
+    selectinload(PIPRecord.action_items),
+)
+
+register_loader_profile(
+    EmployeeRelationsCase,
+    "detail",
+    joinedload(EmployeeRelationsCase.employee),
+    selectinload(EmployeeRelationsCase.timeline_events),
+    selectinload(EmployeeRelationsCase.meetings),
+    selectinload(EmployeeRelationsCase.attachments),
+    selectinload(EmployeeRelationsCase.documents),
+    selectinload(EmployeeRelationsCase.policy_texts),
+    selectinload(EmployeeRelationsCase.ai_advice_records).joinedload(EmployeeRelationsAIAdvice.policy_text),
+)
+
+register_loader_profile(
+    SicknessCase,
+    "detail",
+    joinedload(SicknessCase.employee),
+    selectinload(SicknessCase.meetings),
+)
+
+register_loader_profile(
+    SupervisionRecord,
+    "detail",
+    joinedload(SupervisionRecord.employee),
+    joinedload(SupervisionRecord.manager),
+    selectinload(SupervisionRecord.actions),
+    selectinload(SupervisionRecord.timeline_events),
+)
+
+register_loader_profile(
+    AdvisorEscalation,
+    "detail",
+    joinedload(AdvisorEscalation.submitted_by),
+    selectinload(AdvisorEscalation.documents),
+)
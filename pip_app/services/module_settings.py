@@ -1,4 +1,6 @@
 import re
+import threading
+import time
 
 from models import Organisation, OrganisationModuleSetting, db
 
@@ -21,6 +23,15 @@ DEFAULT_MODULE_LABELS = [
     ("supervision", "Supervision / 1:1s"),
 ]
 
+# Module controls are read on every rendered template, so they are cached
+# in-process per organisation. Saves through admin_module_settings invalidate
+# the entry; the TTL bounds staleness across gunicorn workers.
+MODULE_CONTROLS_CACHE_TTL_SECONDS = 300
+
+_module_controls_cache = {}
+_default_organisation_id = None
+_module_controls_lock = threading.Lock()
+
 DEFAULT_MODULE_SETTINGS = {
     "pip": {
         "is_enabled": True,
@@ -145,6 +156,7 @@ def bootstrap_organisation_defaults(organisation):
 
     if changed or created_any:
         db.session.commit()
+        invalidate_module_controls_cache(organisation.id)
 
     return organisation
 
@@ -206,21 +218,12 @@ def ensure_default_module_settings():
 
 
 def get_enabled_modules(organisation=None, user=None):
-    org = ensure_module_settings_for_org(organisation=organisation, user=user)
-
-    settings = {
-        row.module_key: bool(row.is_enabled)
-        for row in OrganisationModuleSetting.query.filter_by(
-            organisation_id=org.id
-        ).all()
+    controls = get_module_controls(organisation=organisation, user=user)
+    return {
+        module_key: module_controls["is_enabled"]
+        for module_key, module_controls in controls.items()
     }
 
-    for module_key in DEFAULT_MODULE_KEYS:
-        defaults = DEFAULT_MODULE_SETTINGS.get(module_key, {})
-        settings.setdefault(module_key, bool(defaults.get("is_enabled", True)))
-
-    return settings
-
 
 def get_module_settings_for_org(organisation=None, user=None):
     org = ensure_module_settings_for_org(organisation=organisation, user=user)
@@ -233,33 +236,117 @@ def get_module_settings_for_org(organisation=None, user=None):
     return org, settings
 
 
-def get_module_controls(organisation=None, user=None):
-    org = ensure_module_settings_for_org(organisation=organisation, user=user)
+def _default_controls(module_key):
+    defaults = DEFAULT_MODULE_SETTINGS.get(
+        module_key,
+        {
+            "is_enabled": True,
+            "ai_enabled": True,
+            "escalation_enabled": True,
+        },
+    )
+    return {
+        "is_enabled": bool(defaults["is_enabled"]),
+        "ai_enabled": bool(defaults["ai_enabled"]),
+        "escalation_enabled": bool(defaults["escalation_enabled"]),
+    }
+
+
+def _load_module_controls(organisation_id):
     controls = {}
 
-    for row in OrganisationModuleSetting.query.filter_by(organisation_id=org.id).all():
+    for row in OrganisationModuleSetting.query.filter_by(organisation_id=organisation_id).all():
         controls[row.module_key] = {
             "is_enabled": bool(row.is_enabled),
             "ai_enabled": bool(getattr(row, "ai_enabled", True)),
             "escalation_enabled": bool(getattr(row, "escalation_enabled", True)),
         }
 
+    # Rows are created by bootstrap_all_organisations(); until then, missing
+    # modules fall back to the defaults without writing anything.
     for module_key in DEFAULT_MODULE_KEYS:
-        defaults = DEFAULT_MODULE_SETTINGS.get(
-            module_key,
-            {
-                "is_enabled": True,
-                "ai_enabled": True,
-                "escalation_enabled": True,
-            },
-        )
-        controls.setdefault(
-            module_key,
-            {
-                "is_enabled": bool(defaults["is_enabled"]),
-                "ai_enabled": bool(defaults["ai_enabled"]),
-                "escalation_enabled": bool(defaults["escalation_enabled"]),
-            },
+        controls.setdefault(module_key, _default_controls(module_key))
+
+    return controls
+
+
+def _resolve_organisation_id(organisation=None, user=None):
+    global _default_organisation_id
+
+    if organisation is not None:
+        return organisation.id
+
+    organisation_id = getattr(user, "organisation_id", None) if user is not None else None
+    if organisation_id:
+        return organisation_id
+
+    if _default_organisation_id is None:
+        org = Organisation.query.order_by(Organisation.id.asc()).first()
+        if org is None:
+            org = get_default_organisation()
+        _default_organisation_id = org.id
+
+    return _default_organisation_id
+
+
+def get_cached_module_controls(organisation_id):
+    now = time.monotonic()
+    entry = _module_controls_cache.get(organisation_id)
+
+    if entry is not None and entry[0] > now:
+        return entry[1]
+
+    controls = _load_module_controls(organisation_id)
+
+    with _module_controls_lock:
+        _module_controls_cache[organisation_id] = (
+            now + MODULE_CONTROLS_CACHE_TTL_SECONDS,
+            controls,
         )
 
-    return controls
\ No newline at end of file
+    return controls
+
+
+def invalidate_module_controls_cache(organisation_id=None):
+    """Drop cached controls for one organisation, or all when no id given."""
+    global _default_organisation_id
+
+    with _module_controls_lock:
+        if organisation_id is None:
+            _module_controls_cache.clear()
+            _default_organisation_id = None
+        else:
+            _module_controls_cache.pop(organisation_id, None)
+
+
+def get_module_controls(organisation=None, user=None):
+    organisation_id = _resolve_organisation_id(organisation=organisation, user=user)
+    controls = get_cached_module_controls(organisation_id)
+    return {module_key: dict(values) for module_key, values in controls.items()}
+
+
+def is_module_ai_enabled(module_key, organisation=None, user=None):
+    controls = get_module_controls(organisation=organisation, user=user)
+    return controls.get(module_key, _default_controls(module_key))["ai_enabled"]
+
+
+def is_module_escalation_enabled(module_key, organisation=None, user=None):
+    controls = get_module_controls(organisation=organisation, user=user)
+    return controls.get(module_key, _default_controls(module_key))["escalation_enabled"]
+
+
+def bootstrap_all_organisations():
+    """Create any missing organisation defaults and module setting rows.
+
+    Run once at deploy time (``flask bootstrap-organisations``) rather than
+    from request handling.
+    """
+    organisations = Organisation.query.order_by(Organisation.id.asc()).all()
+    if not organisations:
+        organisations = [get_default_organisation()]
+
+    for organisation in organisations:
+        bootstrap_organisation_defaults(organisation)
+
+    invalidate_module_controls_cache()
+    return organisations
@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+import base64
+import json
+import threading
+import time
+from datetime import date
+
+from sqlalchemy import and_, or_
+
+from models import PIPRecord
+
+PIP_LIST_PAGE_SIZE = 50
+PIP_LIST_MAX_PAGE_SIZE = 200
+
+# Filter dropdown values change rarely, so they are cached per scope (the
+# organisation plus, for line managers, their team). PIP saves invalidate the
+# cache; the TTL bounds staleness across gunicorn workers.
+PIP_FILTER_OPTIONS_TTL_SECONDS = 300
+
+_filter_options_cache = {}
+_filter_options_lock = threading.Lock()
+
+
+def pip_list_order():
+    """Sort order for the PIP list; ``id`` breaks ties so keysets are unique."""
+    return (
+        PIPRecord.review_date.asc().nullslast(),
+        PIPRecord.start_date.desc().nullslast(),
+        PIPRecord.id.asc(),
+    )
+
+
+def encode_pip_cursor(pip) -> str:
+    payload = [pip.review_date.isoformat(), pip.start_date.isoformat(), pip.id]
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_pip_cursor(cursor):
+    """Return ``(review_date, start_date, id)`` or None for a bad cursor."""
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        review_raw, start_raw, pip_id = json.loads(raw)
+        return date.fromisoformat(review_raw), date.fromisoformat(start_raw), int(pip_id)
+    except (ValueError, TypeError):
+        return None
+
+
+def apply_pip_keyset(query, cursor):
+    """Restrict ``query`` to rows after ``cursor`` in ``pip_list_order``.
+
+    Review and start dates are NOT NULL on ``pip_record``, so a plain
+    row-value comparison (review asc, start desc, id asc) is enough.
+    """
+    review_date, start_date, pip_id = cursor
+    return query.filter(
+        or_(
+            PIPRecord.review_date > review_date,
+            and_(
+                PIPRecord.review_date == review_date,
+                or_(
+                    PIPRecord.start_date < start_date,
+                    and_(PIPRecord.start_date == start_date, PIPRecord.id > pip_id),
+                ),
+            ),
+        )
+    )
+
+
+def pip_filter_options(scoped_query, scope_key):
+    """Return cached ``{"status", "category", "severity"}`` option lists.
+
+    One DISTINCT query over the three columns replaces a query per dropdown.
+    """
+    now = time.monotonic()
+    entry = _filter_options_cache.get(scope_key)
+    if entry is not None and entry[0] > now:
+        return entry[1]
+
+    statuses, categories, severities = set(), set(), set()
+    rows = (
+        scoped_query.order_by(None)
+        .with_entities(PIPRecord.status, PIPRecord.concern_category, PIPRecord.severity)
+        .distinct()
+    )
+    for status, category, severity in rows:
+        if status:
+            statuses.add(status)
+        if category:
+            categories.add(category)
+        if severity:
+            severities.add(severity)
+
+    options = {
+        "status": sorted(statuses),
+        "category": sorted(categories),
+        "severity": sorted(severities),
+    }
+
+    with _filter_options_lock:
+        _filter_options_cache[scope_key] = (now + PIP_FILTER_OPTIONS_TTL_SECONDS, options)
+
+    return options
+
+
+def invalidate_pip_filter_options():
+    with _filter_options_lock:
+        _filter_options_cache.clear()
@@ -0,0 +1,299 @@
+from __future__ import annotations
+
+import logging
+import math
+import re
+import threading
+from collections import Counter
+from datetime import date, datetime
+
+logger = logging.getLogger(__name__)
+
+# Optional: an exact tokenizer when installed; the estimate below otherwise.
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+_TOKEN_PIECES = re.compile(r"[A-Za-z]+|\d+|[^\sA-Za-z\d]")
+_SENTENCE_BREAK = re.compile(r"(?<=[.!?])\s+|\n+")
+_WORDS = re.compile(r"[a-z][a-z'-]{2,}")
+
+# Words too common to say anything about which policy passage is relevant.
+_STOPWORDS = frozenset(
+    "the and for are but not you all any can had her was one our out has him his how "
+    "its may new now see who did get let put say she too use that with have this will "
+    "your from they been were said each which their there what about would other into "
+    "than them these some could when where should also only such after before being "
+    "must does employee employees case policy".split()
+)
+
+TRUNCATION_MARK = " […]"
+
+_encoding = None
+_encoding_checked = False
+_encoding_lock = threading.Lock()
+
+_stats = {}
+_stats_lock = threading.Lock()
+
+
+def _get_encoding():
+    global _encoding, _encoding_checked
+    if _encoding_checked:
+        return _encoding
+    with _encoding_lock:
+        if not _encoding_checked:
+            if tiktoken is not None:
+                try:
+                    _encoding = tiktoken.get_encoding("o200k_base")
+                except Exception:
+                    logger.warning("tiktoken encoding unavailable; using the token estimate")
+            _encoding_checked = True
+    return _encoding
+
+
+def estimate_tokens(text):
+    """Approximate how many tokens ``text`` costs in a prompt.
+
+    Uses tiktoken when it is installed. Otherwise words count one token
+    plus one per further eight letters, digits one per three and each
+    punctuation mark one, which tracks GPT tokenizers on English prose to
+    within about ten per cent.
+    """
+    if not text:
+        return 0
+
+    encoding = _get_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text))
+
+    tokens = 0
+    for piece in _TOKEN_PIECES.findall(text):
+        if piece[0].isalpha():
+            tokens += 1 + len(piece) // 8
+        elif piece[0].isdigit():
+            tokens += math.ceil(len(piece) / 3)
+        else:
+            tokens += 1
+    return tokens
+
+
+def prompt_value(value):
+    """Render a field value for a prompt, or None when there is nothing to say."""
+    if value is None:
+        return None
+    if isinstance(value, bool):
+        return "Yes" if value else "No"
+    if isinstance(value, datetime):
+        return value.strftime("%Y-%m-%d %H:%M")
+    if isinstance(value, date):
+        return value.isoformat()
+    text = str(value).strip()
+    return text or None
+
+
+def compact_fields(fields, note_tokens=None):
+    """``Label: value`` lines for the fields that have a value.
+
+    ``fields`` is a sequence of (label, value) pairs. Empty values are
+    left out rather than sent as placeholders; with ``note_tokens`` long
+    values are truncated to that many tokens.
+    """
+    lines = []
+    for label, value in fields:
+        text = prompt_value(value)
+        if text is None:
+            continue
+        if note_tokens:
+            text = truncate_text(text, note_tokens)
+        lines.append(f"{label}: {text}")
+    return lines
+
+
+def truncate_text(text, max_tokens):
+    """Shorten ``text`` to about ``max_tokens`` at a sentence boundary.
+
+    The opening sentences are kept, since notes usually lead with what
+    matters, and a marker shows that the rest was cut.
+    """
+    if estimate_tokens(text) <= max_tokens:
+        return text
+
+    budget = max_tokens - estimate_tokens(TRUNCATION_MARK)
+    kept = []
+    used = 0
+    for sentence in _SENTENCE_BREAK.split(text):
+        sentence = sentence.strip()
+        if not sentence:
+            continue
+        cost = estimate_tokens(sentence) + 1
+        if used + cost > budget:
+            break
+        kept.append(sentence)
+        used += cost
+
+    if not kept:
+        # One very long sentence: cut it at a word boundary instead.
+        words = text.split()
+        for word in words:
+            cost = estimate_tokens(word)
+            if used + cost > budget:
+                break
+            kept.append(word)
+            used += cost
+
+    if not kept:
+        # Not even one word fits (e.g. a pasted URL or hash).
+        kept.append(text[: max(budget, 1) * 4])
+
+    return " ".join(kept) + TRUNCATION_MARK
+
+
+def chunk_text(text, max_tokens):
+    """Split ``text`` into paragraph-aligned chunks of at most ``max_tokens``."""
+    chunks = []
+    current = []
+    used = 0
+
+    for paragraph in re.split(r"\n\s*\n", text or ""):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        pieces = [paragraph]
+        if estimate_tokens(paragraph) > max_tokens:
+            pieces = [p.strip() for p in _SENTENCE_BREAK.split(paragraph) if p.strip()]
+
+        for piece in pieces:
+            cost = estimate_tokens(piece)
+            if current and used + cost > max_tokens:
+                chunks.append("\n".join(current))
+                current, used = [], 0
+            current.append(truncate_text(piece, max_tokens))
+            used += min(cost, max_tokens)
+
+    if current:
+        chunks.append("\n".join(current))
+    return chunks
+
+
+def _terms(text):
+    return [word for word in _WORDS.findall((text or "").lower()) if word not in _STOPWORDS]
+
+
+def rank_chunks(chunks, query):
+    """Chunk indexes ordered by relevance to ``query``, best first.
+
+    Scores are a small BM25: query terms weighted by how rare they are
+    across the chunks, with diminishing returns for repeats. Ties keep
+    document order, so with no usable query the opening chunks win.
+    """
+    query_terms = set(_terms(query))
+    chunk_terms = [Counter(_terms(chunk)) for chunk in chunks]
+    if not query_terms or not chunks:
+        return list(range(len(chunks)))
+
+    total = len(chunks)
+    average_length = sum(sum(terms.values()) for terms in chunk_terms) / total or 1.0
+    idf = {}
+    for term in query_terms:
+        df = sum(1 for terms in chunk_terms if term in terms)
+        idf[term] = math.log(1 + (total - df + 0.5) / (df + 0.5))
+
+    def score(index):
+        terms = chunk_terms[index]
+        length = sum(terms.values())
+        result = 0.0
+        for term in query_terms:
+            tf = terms.get(term, 0)
+            if tf:
+                result += idf[term] * tf * 2.2 / (tf + 1.2 * (0.25 + 0.75 * length / average_length))
+        return result
+
+    return sorted(range(total), key=lambda index: (-score(index), index))
+
+
+def select_relevant_text(text, query, max_tokens, chunk_tokens=250):
+    """The passages of ``text`` most relevant to ``query`` within a budget.
+
+    Returns ``(excerpt, chunks_kept, chunks_total)``. Chosen chunks are
+    put back in document order, with a marker wherever passages were
+    skipped.
+    """
+    if max_tokens <= 0:
+        return "", 0, 0
+
+    # Small budgets get smaller chunks so at least one passage fits.
+    chunks = chunk_text(text, max(min(chunk_tokens, max_tokens - 2), 1))
+    if not chunks:
+        return "", 0, 0
+
+    chosen = []
+    used = 0
+    for index in rank_chunks(chunks, query):
+        cost = estimate_tokens(chunks[index]) + 2
+        if used + cost > max_tokens:
+            continue
+        chosen.append(index)
+        used += cost
+
+    parts = []
+    previous = -1
+    for index in sorted(chosen):
+        if index != previous + 1:
+            parts.append("[…]")
+        parts.append(chunks[index])
+        previous = index
+    if chosen and previous != len(chunks) - 1:
+        parts.append("[…]")
+
+    return "\n".join(parts), len(chosen), len(chunks)
+
+
+def record_prompt_build(name, sent_tokens, uncompacted_tokens, budget):
+    """Count one assembled prompt so the savings show on /admin/perf."""
+    with _stats_lock:
+        entry = _stats.get(name)
+        if entry is None:
+            entry = _stats[name] = {
+                "builds": 0,
+                "sent_tokens": 0,
+                "uncompacted_tokens": 0,
+                "max_sent_tokens": 0,
+                "over_budget": 0,
+            }
+        entry["builds"] += 1
+        entry["sent_tokens"] += sent_tokens
+        entry["uncompacted_tokens"] += uncompacted_tokens
+        entry["max_sent_tokens"] = max(entry["max_sent_tokens"], sent_tokens)
+        if sent_tokens > budget:
+            entry["over_budget"] += 1
+
+    logger.info(
+        "prompt name=%s tokens=%s uncompacted_tokens=%s budget=%s",
+        name,
+        sent_tokens,
+        uncompacted_tokens,
+        budget,
+    )
+
+
+def prompt_budget_stats():
+    """Average estimated prompt size per prompt name for this process."""
+    with _stats_lock:
+        snapshot = {name: dict(entry) for name, entry in _stats.items()}
+
+    rows = []
+    for name, entry in sorted(snapshot.items()):
+        builds = entry["builds"]
+        saved = entry["uncompacted_tokens"] - entry["sent_tokens"]
+        rows.append({
+            "name": name,
+            "builds": builds,
+            "avg_sent_tokens": round(entry["sent_tokens"] / builds),
+            "avg_uncompacted_tokens": round(entry["uncompacted_tokens"] / builds),
+            "max_sent_tokens": entry["max_sent_tokens"],
+            "saved_pct": round(100 * saved / entry["uncompacted_tokens"], 1) if entry["uncompacted_tokens"] else None,
+            "over_budget": entry["over_budget"],
+        })
+    return rows
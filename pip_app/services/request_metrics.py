@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+from flask import current_app, g, has_app_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+QUERY_COUNT_HEADER = "X-Query-Count"
+
+# N+1 detection: "off", "log" or "raise". Defaults to "log" in debug mode.
+N_PLUS_ONE_MODES = ("off", "log", "raise")
+DEFAULT_N_PLUS_ONE_THRESHOLD = 3
+
+# Per-endpoint ceilings for the number of SQL statements a request may run.
+# Apps can override/extend these via app.config["QUERY_BUDGETS"].
+DEFAULT_QUERY_BUDGETS = {
+    "main.home": 30,
+    "pip.pip_detail": 10,
+    "employee_relations.view_case": 12,
+    "sickness.view_sickness_case": 5,
+    "supervision.detail": 6,
+}
+
+
+class NPlusOneQueryError(RuntimeError):
+    """Raised when a request lazy-loads the same relationship too many times."""
+
+
+def _count_statement(conn, cursor, statement, parameters, context, executemany):
+    if not has_app_context():
+        return
+    g.sql_query_count = g.get("sql_query_count", 0) + 1
+
+
+def _track_lazy_load(orm_execute_state):
+    # Only lazy loads count: a view that deliberately runs the same query
+    # with different filters (e.g. one count per status) is not an N+1.
+    if not has_app_context() or not orm_execute_state.is_select:
+        return
+    if orm_execute_state.lazy_loaded_from is None:
+        return
+    lazy_loads = g.get("sql_lazy_loads")
+    if lazy_loads is None:
+        return
+    relationship = str(orm_execute_state.loader_strategy_path[-1])
+    count = lazy_loads[relationship] = lazy_loads.get(relationship, 0) + 1
+    config = current_app.config
+    if config["N_PLUS_ONE_DETECTION"] == "raise" and count == config["N_PLUS_ONE_THRESHOLD"]:
+        raise NPlusOneQueryError(f"{relationship} lazy-loaded {count} times in one request")
+
+
+def get_request_query_count() -> int:
+    if not has_app_context():
+        return 0
+    return int(g.get("sql_query_count", 0))
+
+
+def get_repeated_lazy_loads():
+    """Return ``{relationship: count}`` for lazy loads at or over the threshold."""
+    lazy_loads = g.get("sql_lazy_loads") if has_app_context() else None
+    if not lazy_loads:
+        return {}
+    threshold = current_app.config["N_PLUS_ONE_THRESHOLD"]
+    return {relationship: count for relationship, count in lazy_loads.items() if count >= threshold}
+
+
+def get_query_budget(endpoint):
+    budgets = current_app.config.get("QUERY_BUDGETS") or DEFAULT_QUERY_BUDGETS
+    return budgets.get(endpoint)
+
+
+def init_request_metrics(app):
+    """Count SQL statements per request and expose the total.
+
+    The count is available as ``get_request_query_count()`` during the
+    request and as an ``X-Query-Count`` response header afterwards. When an
+    endpoint has a budget configured, exceeding it is logged.
+
+    With ``N_PLUS_ONE_DETECTION`` set to "log" or "raise", a request that
+    lazy-loads the same relationship ``N_PLUS_ONE_THRESHOLD`` times
+    (typically inside a template loop) is logged, or fails with
+    ``NPlusOneQueryError`` at the offending load.
+    """
+    app.config.setdefault("QUERY_BUDGETS", dict(DEFAULT_QUERY_BUDGETS))
+    app.config.setdefault("N_PLUS_ONE_DETECTION", "log" if app.debug else "off")
+    app.config.setdefault("N_PLUS_ONE_THRESHOLD", DEFAULT_N_PLUS_ONE_THRESHOLD)
+    if app.config["N_PLUS_ONE_DETECTION"] not in N_PLUS_ONE_MODES:
+        raise ValueError(f"N_PLUS_ONE_DETECTION must be one of {', '.join(N_PLUS_ONE_MODES)}")
+
+    if not event.contains(Engine, "before_cursor_execute", _count_statement):
+        event.listen(Engine, "before_cursor_execute", _count_statement)
+    if not event.contains(Session, "do_orm_execute", _track_lazy_load):
+        event.listen(Session, "do_orm_execute", _track_lazy_load)
+
+    @app.before_request
+    def reset_query_count():
+        g.sql_query_count = 0
+        if app.config["N_PLUS_ONE_DETECTION"] != "off":
+            g.sql_lazy_loads = {}
+
+    @app.after_request
+    def expose_query_count(response):
+        query_count = get_request_query_count()
+        response.headers[QUERY_COUNT_HEADER] = str(query_count)
+
+        budget = get_query_budget(request.endpoint)
+        if budget is not None and query_count > budget:
+            app.logger.warning(
+                "Query budget exceeded for %s: %s queries (budget %s)",
+                request.endpoint,
+                query_count,
+                budget,
+            )
+
+        for relationship, count in get_repeated_lazy_loads().items():
+            app.logger.warning(
+                "Possible N+1 on %s: %s lazy-loaded %s times",
+                request.endpoint,
+                relationship,
+                count,
+            )
+
+        return response
@@ -0,0 +1,253 @@
+from __future__ import annotations
+
+import heapq
+import logging
+import math
+import re
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+from flask import before_render_template, current_app, g, has_app_context, has_request_context, request, template_rendered
+from flask_login import current_user
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from pip_app.services.request_metrics import get_request_query_count
+
+logger = logging.getLogger(__name__)
+
+PERF_SAMPLE_BUFFER_SIZE = 5000
+PERF_SLOW_QUERY_BUFFER_SIZE = 100
+PERF_SLOWEST_PER_REQUEST = 5
+DEFAULT_SLOW_QUERY_MS = 250
+
+# Endpoints not worth sampling: static files and the perf page itself.
+PERF_IGNORED_ENDPOINTS = {"static", "admin.performance_overview"}
+
+_samples = deque(maxlen=PERF_SAMPLE_BUFFER_SIZE)
+_slow_queries = deque(maxlen=PERF_SLOW_QUERY_BUFFER_SIZE)
+_buffer_lock = threading.Lock()
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER_LIST = re.compile(r"\((?:\s*(?:\?|%\(\w+\)s|:\w+|__\[POSTCOMPILE_\w+\])\s*,?)+\)")
+
+
+def normalise_sql(statement, max_length=500):
+    """Collapse whitespace, literals and IN-lists so equal queries group."""
+    sql = " ".join((statement or "").split())
+    sql = _STRING_LITERAL.sub("?", sql)
+    sql = _NUMBER_LITERAL.sub("?", sql)
+    sql = _PLACEHOLDER_LIST.sub("(...)", sql)
+    return sql[:max_length]
+
+
+def _request_profile():
+    return g.get("perf_profile") if has_app_context() else None
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context.perf_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, "perf_started", None)
+    if started is None:
+        return
+    elapsed_ms = (time.perf_counter() - started) * 1000
+
+    profile = _request_profile()
+    if profile is not None:
+        profile["db_ms"] += elapsed_ms
+        # Min-heap of the slowest statements; normalised once at the end.
+        entry = (elapsed_ms, profile["statement_seq"], statement)
+        profile["statement_seq"] += 1
+        if len(profile["slowest"]) < PERF_SLOWEST_PER_REQUEST:
+            heapq.heappush(profile["slowest"], entry)
+        else:
+            heapq.heappushpop(profile["slowest"], entry)
+
+    threshold = DEFAULT_SLOW_QUERY_MS
+    if has_app_context():
+        threshold = current_app.config.get("SLOW_QUERY_MS", DEFAULT_SLOW_QUERY_MS)
+    if elapsed_ms >= threshold:
+        endpoint = request.endpoint if has_request_context() else None
+        normalised = normalise_sql(statement)
+        logger.warning("Slow query %.1f ms on %s: %s", elapsed_ms, endpoint or "-", normalised)
+        with _buffer_lock:
+            _slow_queries.append({
+                "at": datetime.utcnow(),
+                "endpoint": endpoint,
+                "duration_ms": round(elapsed_ms, 1),
+                "statement": normalised,
+            })
+
+
+def _before_render(sender, template, context, **extra):
+    profile = _request_profile()
+    if profile is not None:
+        profile["render_started"].append(time.perf_counter())
+
+
+def _after_render(sender, template, context, **extra):
+    profile = _request_profile()
+    if profile is not None and profile["render_started"]:
+        started = profile["render_started"].pop()
+        # Only count the outermost render so nested render_template calls
+        # are not double counted.
+        if not profile["render_started"]:
+            profile["template_ms"] += (time.perf_counter() - started) * 1000
+
+
+def _wants_server_timing(app):
+    if app.config["SERVER_TIMING"]:
+        return True
+    return bool(getattr(current_user, "is_authenticated", False) and current_user.is_superuser())
+
+
+def _server_timing_header(sample):
+    return ", ".join([
+        f'db;dur={sample["db_ms"]:.1f};desc="{sample["queries"]} queries"',
+        f'tpl;dur={sample["template_ms"]:.1f}',
+        f'total;dur={sample["total_ms"]:.1f}',
+    ])
+
+
+def init_request_profiling(app):
+    """Time SQL and template rendering per request.
+
+    Each request gets a ``Server-Timing`` header (for everyone when
+    ``SERVER_TIMING`` is on, the debug default, otherwise superusers only),
+    one ``perf`` log line, and a sample in an in-memory ring buffer read by
+    ``/admin/perf``.
+    Statements slower than ``SLOW_QUERY_MS`` are logged with normalised SQL.
+    """
+    app.config.setdefault("SERVER_TIMING", app.debug)
+    app.config.setdefault("SLOW_QUERY_MS", DEFAULT_SLOW_QUERY_MS)
+
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+
+    before_render_template.connect(_before_render, app)
+    template_rendered.connect(_after_render, app)
+
+    @app.before_request
+    def start_request_profile():
+        g.perf_profile = {
+            "started": time.perf_counter(),
+            "db_ms": 0.0,
+            "template_ms": 0.0,
+            "render_started": [],
+            "slowest": [],
+            "statement_seq": 0,
+        }
+
+    @app.after_request
+    def finish_request_profile(response):
+        profile = g.pop("perf_profile", None)
+        if profile is None:
+            return response
+
+        sample = {
+            "at": time.time(),
+            "endpoint": request.endpoint or "-",
+            "method": request.method,
+            "status": response.status_code,
+            "total_ms": (time.perf_counter() - profile["started"]) * 1000,
+            "db_ms": profile["db_ms"],
+            "template_ms": profile["template_ms"],
+            "queries": get_request_query_count(),
+        }
+
+        if _wants_server_timing(app):
+            response.headers["Server-Timing"] = _server_timing_header(sample)
+
+        slowest = [
+            {"duration_ms": round(ms, 1), "statement": normalise_sql(statement)}
+            for ms, _seq, statement in sorted(profile["slowest"], reverse=True)
+        ]
+        logger.info(
+            "perf endpoint=%s method=%s status=%s total_ms=%.1f db_ms=%.1f queries=%s template_ms=%.1f slowest_ms=%s",
+            sample["endpoint"],
+            sample["method"],
+            sample["status"],
+            sample["total_ms"],
+            sample["db_ms"],
+            sample["queries"],
+            sample["template_ms"],
+            slowest[0]["duration_ms"] if slowest else 0,
+        )
+
+        if sample["endpoint"] not in PERF_IGNORED_ENDPOINTS:
+            sample["slowest"] = slowest
+            with _buffer_lock:
+                _samples.append(sample)
+
+        return response
+
+
+def _percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    # Nearest-rank percentile.
+    rank = math.ceil(pct / 100 * len(sorted_values))
+    return sorted_values[max(rank, 1) - 1]
+
+
+def endpoint_performance_summary():
+    """Aggregate buffered samples into per-endpoint latency percentiles.
+
+    Returns rows sorted by p95 total time, slowest first. Each row also
+    carries the slowest normalised statements seen for that endpoint.
+    """
+    with _buffer_lock:
+        samples = list(_samples)
+
+    grouped = {}
+    for sample in samples:
+        grouped.setdefault(sample["endpoint"], []).append(sample)
+
+    rows = []
+    for endpoint, items in grouped.items():
+        totals = sorted(s["total_ms"] for s in items)
+        db_times = sorted(s["db_ms"] for s in items)
+        templates = sorted(s["template_ms"] for s in items)
+        statements = {}
+        for s in items:
+            for entry in s["slowest"]:
+                current = statements.get(entry["statement"])
+                if current is None or entry["duration_ms"] > current:
+                    statements[entry["statement"]] = entry["duration_ms"]
+        rows.append({
+            "endpoint": endpoint,
+            "count": len(items),
+            "errors": sum(1 for s in items if s["status"] >= 500),
+            "p50_ms": round(_percentile(totals, 50), 1),
+            "p95_ms": round(_percentile(totals, 95), 1),
+            "max_ms": round(totals[-1], 1),
+            "db_p50_ms": round(_percentile(db_times, 50), 1),
+            "db_p95_ms": round(_percentile(db_times, 95), 1),
+            "template_p95_ms": round(_percentile(templates, 95), 1),
+            "avg_queries": round(sum(s["queries"] for s in items) / len(items), 1),
+            "slowest_statements": [
+                {"statement": sql, "duration_ms": ms}
+                for sql, ms in sorted(statements.items(), key=lambda kv: kv[1], reverse=True)[:3]
+            ],
+        })
+
+    rows.sort(key=lambda row: row["p95_ms"], reverse=True)
+    return rows
+
+
+def recent_slow_queries():
+    with _buffer_lock:
+        return list(reversed(_slow_queries))
+
+
+def performance_buffer_size():
+    with _buffer_lock:
+        return len(_samples)
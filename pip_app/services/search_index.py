@@ -0,0 +1,348 @@
+from __future__ import annotations
+
+import logging
+import re
+from datetime import datetime
+
+from markupsafe import Markup, escape
+from sqlalchemy import Float, Integer, String, delete, event, func, insert, inspect, literal_column, or_, text
+from sqlalchemy.orm import Session, joinedload
+
+from models import (
+    Employee,
+    EmployeeRelationsCase,
+    PIPRecord,
+    SearchDocument,
+    SicknessCase,
+    SupervisionRecord,
+    db,
+)
+from pip_app.security import scoped_employee_query
+
+logger = logging.getLogger(__name__)
+
+SEARCH_RECORD_TYPES = {
+    "pip": "Performance Improvement Plan",
+    "employee_relations": "Employee Relations",
+    "sickness": "Sickness",
+    "supervision": "Supervision",
+}
+
+SEARCH_RESULT_LIMIT = 25
+SEARCH_MAX_TERMS = 12
+SEARCH_BODY_MAX_CHARS = 50_000
+SEARCH_REBUILD_BATCH = 500
+
+# Highlight markers put around matched words by ts_headline / FTS5
+# snippet(). They are swapped for <mark> after the snippet is HTML-escaped.
+MARK_START = "⟦"
+MARK_END = "⟧"
+
+_PENDING_KEY = "search_index_pending"
+_fts_tables = {}
+_EMPLOYEE_TITLE_FIELDS = ("first_name", "last_name", "job_title")
+
+
+def _join_text(*parts):
+    text_value = "\n".join(str(p).strip() for p in parts if p and str(p).strip())
+    return text_value[:SEARCH_BODY_MAX_CHARS]
+
+
+def _employee_label(employee):
+    if employee is None:
+        return ""
+    name = f"{employee.first_name or ''} {employee.last_name or ''}".strip()
+    return f"{name} ({employee.job_title})" if employee.job_title else name
+
+
+def _pip_document(pip):
+    title = f"{_employee_label(pip.employee)} — {pip.concern_category or 'Performance Improvement Plan'}"
+    body = _join_text(pip.concerns, pip.meeting_notes, pip.tags, pip.outcome_notes)
+    return title, body
+
+
+def _er_document(er_case):
+    title = f"{er_case.title} — {_employee_label(er_case.employee)}"
+    body = _join_text(
+        er_case.case_type,
+        er_case.allegation_or_grievance,
+        er_case.summary,
+        er_case.investigation_findings,
+        er_case.outcome_status,
+    )
+    return title, body
+
+
+def _sickness_document(case):
+    title = f"{_employee_label(case.employee)} — {case.reason or 'Sickness absence'}"
+    body = _join_text(case.reason, case.notes)
+    return title, body
+
+
+def _supervision_document(record):
+    heading = record.meeting_title or record.meeting_type or "Supervision"
+    title = f"{heading} — {_employee_label(record.employee)}"
+    body = _join_text(
+        record.overall_summary,
+        record.concerns_summary,
+        record.wellbeing_summary,
+        record.performance_summary,
+        record.conduct_summary,
+        record.agreed_support,
+    )
+    return title, body
+
+
+# Manager confidential notes and ER confidential notes are deliberately not
+# indexed, so they can never surface in a snippet.
+INDEXED_MODELS = {
+    "pip": (PIPRecord, _pip_document),
+    "employee_relations": (EmployeeRelationsCase, _er_document),
+    "sickness": (SicknessCase, _sickness_document),
+    "supervision": (SupervisionRecord, _supervision_document),
+}
+_RECORD_TYPE_BY_MODEL = {model: record_type for record_type, (model, _build) in INDEXED_MODELS.items()}
+
+
+def _document_values(record_type, record):
+    _model, build = INDEXED_MODELS[record_type]
+    title, body = build(record)
+    return {
+        "record_type": record_type,
+        "record_id": record.id,
+        "employee_id": record.employee_id,
+        "title": title[:255],
+        "body": body,
+        "updated_at": datetime.utcnow(),
+    }
+
+
+def _write_documents(session, record_type, records):
+    records = [r for r in records if r.employee_id is not None]
+    if not records:
+        return
+    session.execute(
+        delete(SearchDocument).where(
+            SearchDocument.record_type == record_type,
+            SearchDocument.record_id.in_([r.id for r in records]),
+        )
+    )
+    session.execute(insert(SearchDocument), [_document_values(record_type, r) for r in records])
+
+
+def reindex_records(session, upserts, deletes, employee_ids=()):
+    """Bring search documents in line with the given record changes.
+
+    ``upserts``/``deletes`` map record type to record ids; ``employee_ids``
+    re-index every record of employees whose name or title changed.
+    """
+    for record_type, ids in deletes.items():
+        session.execute(
+            delete(SearchDocument).where(
+                SearchDocument.record_type == record_type,
+                SearchDocument.record_id.in_(list(ids)),
+            )
+        )
+
+    for record_type, (model, _build) in INDEXED_MODELS.items():
+        ids = set(upserts.get(record_type, ())) - set(deletes.get(record_type, ()))
+        conditions = []
+        if ids:
+            conditions.append(model.id.in_(list(ids)))
+        if employee_ids:
+            conditions.append(model.employee_id.in_(list(employee_ids)))
+        if conditions:
+            records = model.query.options(joinedload(model.employee)).filter(or_(*conditions)).all()
+            _write_documents(session, record_type, records)
+
+
+def _collect_changes(session, flush_context):
+    pending = session.info.setdefault(_PENDING_KEY, {"upserts": {}, "deletes": {}, "employees": set()})
+
+    for obj in list(session.new) + list(session.dirty):
+        record_type = _RECORD_TYPE_BY_MODEL.get(type(obj))
+        if record_type is not None:
+            pending["upserts"].setdefault(record_type, set()).add(obj.id)
+        elif isinstance(obj, Employee) and obj.id is not None:
+            state = inspect(obj)
+            if any(state.attrs[field].history.has_changes() for field in _EMPLOYEE_TITLE_FIELDS):
+                pending["employees"].add(obj.id)
+
+    for obj in session.deleted:
+        record_type = _RECORD_TYPE_BY_MODEL.get(type(obj))
+        if record_type is not None:
+            pending["deletes"].setdefault(record_type, set()).add(obj.id)
+
+
+def _apply_pending(session):
+    # Flush first so changes made just before commit are collected too.
+    session.flush()
+    pending = session.info.pop(_PENDING_KEY, None)
+    if not pending or not any(pending.values()):
+        return
+
+    try:
+        with session.begin_nested():
+            reindex_records(session, pending["upserts"], pending["deletes"], pending["employees"])
+    except Exception:
+        # The index is derived data; never fail the user's save over it.
+        # "flask rebuild-search-index" repairs anything missed here.
+        logger.exception("Search index update failed")
+
+
+def _discard_pending(session, previous_transaction=None):
+    # Savepoint rollbacks leave the outer transaction's changes pending.
+    if not session.in_transaction():
+        session.info.pop(_PENDING_KEY, None)
+
+
+def init_search_index(app):
+    """Keep ``search_documents`` in sync with indexed records on commit."""
+    if not event.contains(Session, "after_flush", _collect_changes):
+        event.listen(Session, "after_flush", _collect_changes)
+        event.listen(Session, "before_commit", _apply_pending)
+        event.listen(Session, "after_soft_rollback", _discard_pending)
+
+
+def rebuild_search_index() -> int:
+    """Rebuild every search document from the source tables and commit."""
+    db.session.execute(delete(SearchDocument))
+    total = 0
+    for record_type, (model, _build) in INDEXED_MODELS.items():
+        batch = []
+        records = model.query.options(joinedload(model.employee)).order_by(model.id)
+        for record in records.yield_per(SEARCH_REBUILD_BATCH):
+            if record.employee_id is None:
+                continue
+            batch.append(_document_values(record_type, record))
+            if len(batch) >= SEARCH_REBUILD_BATCH:
+                db.session.execute(insert(SearchDocument), batch)
+                total += len(batch)
+                batch = []
+        if batch:
+            db.session.execute(insert(SearchDocument), batch)
+            total += len(batch)
+    db.session.info.pop(_PENDING_KEY, None)
+    db.session.commit()
+    return total
+
+
+def search_terms(query_text):
+    return re.findall(r"\w+", (query_text or "").lower())[:SEARCH_MAX_TERMS]
+
+
+def _highlight(snippet):
+    escaped = escape(snippet or "")
+    return escaped.replace(MARK_START, Markup("<mark>")).replace(MARK_END, Markup("</mark>"))
+
+
+def _plain_snippet(body, terms, width=160):
+    body = body or ""
+    lowered = body.lower()
+    positions = [lowered.find(term) for term in terms if term in lowered]
+    start = max(min(positions) - width // 4, 0) if positions else 0
+    snippet = body[start:start + width]
+    for term in terms:
+        snippet = re.sub(f"({re.escape(term)})", f"{MARK_START}\\1{MARK_END}", snippet, flags=re.IGNORECASE)
+    return ("…" if start else "") + snippet + ("…" if start + width < len(body) else "")
+
+
+def _postgres_search(query, query_text):
+    tsquery = func.websearch_to_tsquery("english", query_text)
+    vector = literal_column("search_documents.search_vector")
+    rank = func.ts_rank_cd(vector, tsquery)
+    snippet = func.ts_headline(
+        "english",
+        func.concat_ws("\n", SearchDocument.title, SearchDocument.body),
+        tsquery,
+        f"StartSel={MARK_START}, StopSel={MARK_END}, MaxWords=30, MinWords=12, MaxFragments=2",
+    )
+    return (
+        query.filter(vector.op("@@")(tsquery))
+        .add_columns(rank.label("rank"), snippet.label("snippet"))
+        .order_by(rank.desc(), SearchDocument.updated_at.desc())
+    )
+
+
+def _sqlite_search(query, terms):
+    match = " ".join(f'"{term}"*' for term in terms)
+    fts = (
+        text(
+            "SELECT rowid AS doc_id, "
+            "bm25(search_documents_fts, 5.0, 1.0) AS rank, "
+            "snippet(search_documents_fts, -1, :mark_start, :mark_end, '…', 16) AS snippet "
+            "FROM search_documents_fts WHERE search_documents_fts MATCH :match"
+        )
+        .bindparams(mark_start=MARK_START, mark_end=MARK_END, match=match)
+        .columns(doc_id=Integer, rank=Float, snippet=String)
+        .subquery("fts")
+    )
+    # bm25() is lower-is-better; negate so rank reads the same as Postgres.
+    return (
+        query.join(fts, fts.c.doc_id == SearchDocument.id)
+        .add_columns((-fts.c.rank).label("rank"), fts.c.snippet)
+        .order_by(fts.c.rank.asc(), SearchDocument.updated_at.desc())
+    )
+
+
+def _sqlite_fts_available(bind):
+    """True when the FTS5 table exists; older dev databases may lack it."""
+    key = str(bind.url)
+    if key not in _fts_tables:
+        _fts_tables[key] = inspect(bind).has_table("search_documents_fts")
+    return _fts_tables[key]
+
+
+def _fallback_search(query, terms):
+    for term in terms:
+        like = f"%{term}%"
+        query = query.filter(or_(SearchDocument.title.ilike(like), SearchDocument.body.ilike(like)))
+    return query.add_columns(
+        literal_column("0.0").label("rank"),
+        literal_column("NULL").label("snippet"),
+    ).order_by(SearchDocument.updated_at.desc())
+
+
+def search_records(query_text, *, record_types, limit=SEARCH_RESULT_LIMIT):
+    """Return ranked, scoped search hits for the current user.
+
+    ``record_types`` limits results to modules the caller may see. Results
+    are scoped to the user's organisation and, for line managers, their
+    team. Each hit has ``snippet_html`` with matches wrapped in ``<mark>``.
+    """
+    terms = search_terms(query_text)
+    if not terms or not record_types:
+        return []
+
+    query = db.session.query(SearchDocument, Employee).join(
+        Employee, Employee.id == SearchDocument.employee_id
+    )
+    query = scoped_employee_query(query, Employee).filter(
+        SearchDocument.record_type.in_(list(record_types))
+    )
+
+    bind = db.session.get_bind()
+    dialect = bind.dialect.name
+    if dialect == "postgresql":
+        query = _postgres_search(query, query_text.strip())
+    elif dialect == "sqlite" and _sqlite_fts_available(bind):
+        query = _sqlite_search(query, terms)
+    else:
+        query = _fallback_search(query, terms)
+
+    results = []
+    for document, employee, rank, snippet in query.limit(limit):
+        if not snippet:
+            snippet = _plain_snippet(document.body or document.title, terms)
+        results.append({
+            "record_type": document.record_type,
+            "record_label": SEARCH_RECORD_TYPES.get(document.record_type, document.record_type),
+            "record_id": document.record_id,
+            "title": document.title,
+            "snippet_html": _highlight(snippet),
+            "employee_id": employee.id,
+            "employee_name": f"{employee.first_name or ''} {employee.last_name or ''}".strip(),
+            "rank": round(float(rank or 0), 4),
+            "updated_at": document.updated_at,
+        })
+    return results
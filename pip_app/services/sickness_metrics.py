@@ -2,6 +2,8 @@ from __future__ import annotations
 
 from datetime import date, timedelta
 
+from sqlalchemy import Date, Integer, case, cast, func, literal
+
 
 def clamp_date_range(
     start: date | None,
@@ -32,149 +34,224 @@ def clamp_date_range(
     return clamped_start, clamped_end
 
 
-def compute_sickness_trigger_metrics(
+def _clamped_days_expression(window_start: date, window_end: date):
+    """SQL expression for a case's inclusive day count inside the window.
+
+    Mirrors ``clamp_date_range``: open cases run to the window end, and the
+    start/end are clamped with GREATEST/LEAST (scalar MAX/MIN on SQLite).
+    """
+    from models import SicknessCase, db
+
+    ws = literal(window_start, type_=Date)
+    we = literal(window_end, type_=Date)
+    real_end = func.coalesce(SicknessCase.end_date, we)
+
+    if db.engine.dialect.name == "sqlite":
+        clamped_start = func.max(SicknessCase.start_date, ws)
+        clamped_end = func.min(real_end, we)
+        return cast(func.julianday(clamped_end) - func.julianday(clamped_start), Integer) + 1
+
+    clamped_start = func.greatest(SicknessCase.start_date, ws)
+    clamped_end = func.least(real_end, we)
+    return cast(clamped_end - clamped_start, Integer) + 1
+
+
+def sickness_rollup_query(
     q_cases,
     *,
     today: date,
     window_days: int = 365,
-    bradford_medium: int = 200,
-    bradford_high: int = 400,
-    episodes_threshold: int = 3,
-    total_days_threshold: int = 14,
     long_term_days: int = 28,
 ):
-    """Compute rolling-window sickness trigger metrics per employee.
-
-    This is extracted from the current app.py logic and kept behaviourally
-    aligned with the existing dashboard/employee detail calculations.
+    """Group ``q_cases`` into one row of absence totals per employee.
 
-    Episode definition (current Phase 3 approach):
-        each SicknessCase == 1 episode
-
-    Bradford:
-        episodes^2 * total_days_within_window
+    Rows are ``(employee_id, episodes, total_days, longest_spell_days,
+    has_long_term)`` computed entirely in SQL, so the cost does not grow with
+    ORM object loading as case history grows.
     """
-    from models import SicknessCase  # local import to avoid circulars during transition
+    from models import SicknessCase
 
     window_start = today - timedelta(days=window_days)
     window_end = today
+    days = _clamped_days_expression(window_start, window_end)
 
-    cases = (
-        q_cases.filter(
+    return (
+        q_cases.order_by(None)
+        .filter(
             SicknessCase.start_date.isnot(None),
             SicknessCase.start_date <= window_end,
+            func.coalesce(SicknessCase.end_date, window_end) >= window_start,
+            days > 0,
+        )
+        .with_entities(
+            SicknessCase.employee_id.label("employee_id"),
+            func.count(SicknessCase.id).label("episodes"),
+            func.sum(days).label("total_days"),
+            func.max(days).label("longest_spell_days"),
+            func.max(case((days >= long_term_days, 1), else_=0)).label("has_long_term"),
         )
-        .all()
+        .group_by(SicknessCase.employee_id)
+        .order_by(SicknessCase.employee_id)
     )
 
-    metrics_by_employee = {}
 
-    for sc in cases:
-        if not getattr(sc, "employee", None) or not getattr(sc, "start_date", None):
-            continue
+def evaluate_sickness_trigger(
+    *,
+    episodes: int,
+    total_days: int,
+    has_long_term: bool,
+    bradford_medium: int = 200,
+    bradford_high: int = 400,
+    episodes_threshold: int = 3,
+    total_days_threshold: int = 14,
+    long_term_days: int = 28,
+):
+    """Apply trigger thresholds to one employee's totals.
 
-        clamped_start, clamped_end = clamp_date_range(
-            sc.start_date,
-            sc.end_date,
-            window_start,
-            window_end,
-        )
-        if not clamped_start:
-            continue
+    Returns ``None`` when nothing is flagged, otherwise a dict with
+    ``bradford``, ``flags_label``, ``severity`` and ``actions``.
+    """
+    bradford = (episodes * episodes * total_days) if total_days > 0 else 0
+
+    flags = []
+    actions = []
+
+    if episodes >= episodes_threshold:
+        flags.append(f"Episodes ≥ {episodes_threshold} in 12 months")
+        actions.append("Review absence pattern and agree next steps (informal stage).")
+
+    if total_days >= total_days_threshold:
+        flags.append(f"≥ {total_days_threshold} days total in 12 months")
+        actions.append("Check fit note / evidence and update absence records.")
+
+    if has_long_term:
+        flags.append(f"Long-term case (≥ {long_term_days} days)")
+        actions.append("Consider OH referral and a welfare meeting plan.")
+
+    severity = "none"
+    if bradford >= bradford_high:
+        flags.append(f"Bradford ≥ {bradford_high}")
+        severity = "high"
+        actions.append("Consider formal sickness stage (policy dependent) and document rationale.")
+    elif bradford >= bradford_medium:
+        flags.append(f"Bradford ≥ {bradford_medium}")
+        severity = "medium"
+        actions.append("Book an absence review and set review checkpoints.")
+    elif flags:
+        severity = "low"
+        actions.append("Keep monitoring; ensure RTW notes are complete.")
+
+    if not flags:
+        return None
+
+    seen = set()
+    actions_unique = []
+    for action in actions:
+        if action not in seen:
+            seen.add(action)
+            actions_unique.append(action)
+
+    return {
+        "bradford": bradford,
+        "flags_label": ", ".join(flags),
+        "severity": severity,
+        "actions": actions_unique,
+    }
+
+
+SEVERITY_RANK = {"high": 3, "medium": 2, "low": 1, "none": 0}
+
+
+def sort_sickness_triggers(potential_triggers):
+    potential_triggers.sort(
+        key=lambda item: (
+            SEVERITY_RANK.get(item["severity"], 0),
+            item["bradford"],
+            item["episodes"],
+        ),
+        reverse=True,
+    )
+    return potential_triggers
 
-        days = (clamped_end - clamped_start).days + 1
-        if days <= 0:
-            continue
 
-        data = metrics_by_employee.setdefault(
-            sc.employee.id,
-            {
-                "employee": sc.employee,
-                "episodes": 0,
-                "total_days": 0,
-                "has_long_term": False,
-                "longest_spell_days": 0,
-            },
-        )
+def _load_employees(employee_ids, chunk_size: int = 1000):
+    from models import Employee
 
-        data["episodes"] += 1
-        data["total_days"] += days
-        data["longest_spell_days"] = max(data["longest_spell_days"], days)
+    employee_ids = list(employee_ids)
+    employees = {}
+    for i in range(0, len(employee_ids), chunk_size):
+        chunk = employee_ids[i:i + chunk_size]
+        for employee in Employee.query.filter(Employee.id.in_(chunk)):
+            employees[employee.id] = employee
+    return employees
 
-        if days >= long_term_days:
-            data["has_long_term"] = True
 
-    potential_triggers = []
+def compute_sickness_trigger_metrics(
+    q_cases,
+    *,
+    today: date,
+    window_days: int = 365,
+    bradford_medium: int = 200,
+    bradford_high: int = 400,
+    episodes_threshold: int = 3,
+    total_days_threshold: int = 14,
+    long_term_days: int = 28,
+):
+    """Compute rolling-window sickness trigger metrics per employee.
 
-    for data in metrics_by_employee.values():
-        employee = data["employee"]
-        episodes = data["episodes"]
-        total_days = data["total_days"]
-        has_long_term = data["has_long_term"]
-        longest_spell_days = data["longest_spell_days"]
-
-        bradford = (episodes * episodes * total_days) if total_days > 0 else 0
-
-        flags = []
-        actions = []
-
-        if episodes >= episodes_threshold:
-            flags.append(f"Episodes ≥ {episodes_threshold} in 12 months")
-            actions.append("Review absence pattern and agree next steps (informal stage).")
-
-        if total_days >= total_days_threshold:
-            flags.append(f"≥ {total_days_threshold} days total in 12 months")
-            actions.append("Check fit note / evidence and update absence records.")
-
-        if has_long_term:
-            flags.append(f"Long-term case (≥ {long_term_days} days)")
-            actions.append("Consider OH referral and a welfare meeting plan.")
-
-        severity = "none"
-        if bradford >= bradford_high:
-            flags.append(f"Bradford ≥ {bradford_high}")
-            severity = "high"
-            actions.append("Consider formal sickness stage (policy dependent) and document rationale.")
-        elif bradford >= bradford_medium:
-            flags.append(f"Bradford ≥ {bradford_medium}")
-            severity = "medium"
-            actions.append("Book an absence review and set review checkpoints.")
-        elif flags:
-            severity = "low"
-            actions.append("Keep monitoring; ensure RTW notes are complete.")
-
-        if not flags:
-            continue
+    Episode definition (current Phase 3 approach):
+        each SicknessCase == 1 episode
 
-        seen = set()
-        actions_unique = []
-        for action in actions:
-            if action not in seen:
-                seen.add(action)
-                actions_unique.append(action)
+    Bradford:
+        episodes^2 * total_days_within_window
 
-        potential_triggers.append(
+    Per-employee totals come from ``sickness_rollup_query``; only the
+    thresholds are applied here, and Employee rows are loaded in one batch
+    for flagged employees only.
+    """
+    flagged = []
+
+    for row in sickness_rollup_query(
+        q_cases,
+        today=today,
+        window_days=window_days,
+        long_term_days=long_term_days,
+    ):
+        episodes = int(row.episodes or 0)
+        total_days = int(row.total_days or 0)
+        has_long_term = bool(row.has_long_term)
+
+        trigger = evaluate_sickness_trigger(
+            episodes=episodes,
+            total_days=total_days,
+            has_long_term=has_long_term,
+            bradford_medium=bradford_medium,
+            bradford_high=bradford_high,
+            episodes_threshold=episodes_threshold,
+            total_days_threshold=total_days_threshold,
+            long_term_days=long_term_days,
+        )
+        if trigger is None:
+            continue
+
+        flagged.append(
             {
-                "employee": employee,
+                "employee_id": row.employee_id,
                 "episodes": episodes,
                 "total_days": total_days,
-                "bradford": bradford,
                 "has_long_term": has_long_term,
-                "longest_spell_days": longest_spell_days,
-                "flags_label": ", ".join(flags),
-                "severity": severity,
-                "actions": actions_unique,
+                "longest_spell_days": int(row.longest_spell_days or 0),
+                **trigger,
             }
         )
 
-    severity_rank = {"high": 3, "medium": 2, "low": 1, "none": 0}
-    potential_triggers.sort(
-        key=lambda item: (
-            severity_rank.get(item["severity"], 0),
-            item["bradford"],
-            item["episodes"],
-        ),
-        reverse=True,
-    )
+    employees = _load_employees(item["employee_id"] for item in flagged)
+
+    potential_triggers = []
+    for item in flagged:
+        employee = employees.get(item.pop("employee_id"))
+        if employee is None:
+            continue
+        potential_triggers.append({"employee": employee, **item})
 
-    return potential_triggers
\ No newline at end of file
+    return sort_sickness_triggers(potential_triggers)
@@ -0,0 +1,245 @@
+from __future__ import annotations
+
+import threading
+import time
+from datetime import date, timedelta
+
+from sqlalchemy import func
+
+try:
+    import numpy as np
+    NUMPY_ENABLED = True
+except Exception:
+    np = None
+    NUMPY_ENABLED = False
+
+from models import Employee, SicknessCase, db
+
+SIMULATION_WINDOW_DAYS = 365
+MAX_SIMULATION_CONFIGS = 50
+
+DEFAULT_THRESHOLDS = {
+    "bradford_medium": 200,
+    "bradford_high": 400,
+    "episodes_threshold": 3,
+    "total_days_threshold": 14,
+    "long_term_days": 28,
+}
+
+SIMULATION_BANDS = ("high", "medium", "low", "none")
+
+# Loaded case arrays are reused while HR tries successive threshold sets.
+# New absences show up once the entry expires.
+SIMULATION_CACHE_TTL_SECONDS = 60
+
+_case_cache = {}
+_case_cache_lock = threading.Lock()
+
+
+def normalise_threshold_config(raw) -> dict:
+    """Return a complete threshold dict, filling gaps from the defaults.
+
+    Raises ValueError for unknown keys or values that are not non-negative
+    integers.
+    """
+    raw = raw or {}
+    if not isinstance(raw, dict):
+        raise ValueError("Each configuration must be an object.")
+
+    unknown = set(raw) - set(DEFAULT_THRESHOLDS)
+    if unknown:
+        raise ValueError(f"Unknown threshold(s): {', '.join(sorted(unknown))}")
+
+    config = {}
+    for key, default in DEFAULT_THRESHOLDS.items():
+        value = raw.get(key, default)
+        try:
+            value = int(value)
+        except (TypeError, ValueError):
+            raise ValueError(f"{key} must be a whole number.") from None
+        if value < 0:
+            raise ValueError(f"{key} must not be negative.")
+        config[key] = value
+    return config
+
+
+def _load_case_rows(organisation_id, today: date, window_days: int):
+    window_start = today - timedelta(days=window_days)
+    query = (
+        db.session.query(SicknessCase.employee_id, SicknessCase.start_date, SicknessCase.end_date)
+        .join(Employee, Employee.id == SicknessCase.employee_id)
+        .filter(
+            SicknessCase.start_date.isnot(None),
+            SicknessCase.start_date <= today,
+            func.coalesce(SicknessCase.end_date, today) >= window_start,
+        )
+        .order_by(SicknessCase.employee_id)
+    )
+    if organisation_id:
+        query = query.filter(Employee.organisation_id == organisation_id)
+
+    return query.all()
+
+
+def _aggregate_numpy(rows, window_start: date, window_end: date):
+    ws, we = window_start.toordinal(), window_end.toordinal()
+    employee_ids = np.fromiter((r[0] for r in rows), dtype=np.int64, count=len(rows))
+    starts = np.fromiter((r[1].toordinal() for r in rows), dtype=np.int64, count=len(rows))
+    ends = np.fromiter(
+        ((r[2] or window_end).toordinal() for r in rows),
+        dtype=np.int64,
+        count=len(rows),
+    )
+
+    days = np.minimum(ends, we) - np.maximum(starts, ws) + 1
+    keep = days > 0
+    employee_ids, days = employee_ids[keep], days[keep]
+    if not len(days):
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty, empty
+
+    # Rows arrive ordered by employee, so each employee is one contiguous run.
+    boundaries = np.flatnonzero(np.r_[True, employee_ids[1:] != employee_ids[:-1]])
+    episodes = np.diff(np.r_[boundaries, len(days)])
+    total_days = np.add.reduceat(days, boundaries)
+    longest = np.maximum.reduceat(days, boundaries)
+    return episodes, total_days, longest
+
+
+def _aggregate_python(rows, window_start: date, window_end: date):
+    totals = {}
+    for employee_id, start, end in rows:
+        days = (min(end or window_end, window_end) - max(start, window_start)).days + 1
+        if days <= 0:
+            continue
+        entry = totals.setdefault(employee_id, [0, 0, 0])
+        entry[0] += 1
+        entry[1] += days
+        entry[2] = max(entry[2], days)
+
+    values = list(totals.values())
+    return (
+        [v[0] for v in values],
+        [v[1] for v in values],
+        [v[2] for v in values],
+    )
+
+
+def load_sickness_aggregates(organisation_id=None, *, today: date, window_days: int = SIMULATION_WINDOW_DAYS):
+    """Return cached per-employee ``(episodes, total_days, longest_spell)``.
+
+    Each element is a NumPy array when NumPy is installed, otherwise a list,
+    with one entry per employee who has absence inside the window.
+    """
+    key = (organisation_id, today, window_days)
+    now = time.monotonic()
+    entry = _case_cache.get(key)
+    if entry is not None and entry[0] > now:
+        return entry[1]
+
+    rows = _load_case_rows(organisation_id, today, window_days)
+    window_start = today - timedelta(days=window_days)
+    aggregate = _aggregate_numpy if NUMPY_ENABLED else _aggregate_python
+    aggregates = aggregate(rows, window_start, today) if rows else ([], [], [])
+
+    with _case_cache_lock:
+        # Keys include the date, so expired entries would otherwise pile up
+        # per organisation per day for the life of the process.
+        for stale_key in [k for k, (expires, _value) in _case_cache.items() if expires <= now]:
+            del _case_cache[stale_key]
+        _case_cache[key] = (now + SIMULATION_CACHE_TTL_SECONDS, aggregates)
+
+    return aggregates
+
+
+def _band_counts_numpy(aggregates, configs):
+    episodes, total_days, longest = (np.asarray(a, dtype=np.int64) for a in aggregates)
+    bradford = episodes * episodes * total_days
+
+    def column(key):
+        return np.array([c[key] for c in configs], dtype=np.int64)[:, None]
+
+    # One row per configuration, one column per employee.
+    high = bradford >= column("bradford_high")
+    medium = ~high & (bradford >= column("bradford_medium"))
+    flagged = (
+        (episodes >= column("episodes_threshold"))
+        | (total_days >= column("total_days_threshold"))
+        | (longest >= column("long_term_days"))
+    )
+    low = ~high & ~medium & flagged
+
+    counts = {
+        "high": high.sum(axis=1),
+        "medium": medium.sum(axis=1),
+        "low": low.sum(axis=1),
+    }
+    employees = len(bradford)
+    return [
+        {
+            "high": int(counts["high"][i]),
+            "medium": int(counts["medium"][i]),
+            "low": int(counts["low"][i]),
+            "none": employees - int(counts["high"][i] + counts["medium"][i] + counts["low"][i]),
+        }
+        for i in range(len(configs))
+    ]
+
+
+def _band_counts_python(aggregates, configs):
+    results = []
+    for config in configs:
+        bands = dict.fromkeys(SIMULATION_BANDS, 0)
+        for episodes, total_days, longest in zip(*aggregates):
+            bradford = episodes * episodes * total_days
+            if bradford >= config["bradford_high"]:
+                bands["high"] += 1
+            elif bradford >= config["bradford_medium"]:
+                bands["medium"] += 1
+            elif (
+                episodes >= config["episodes_threshold"]
+                or total_days >= config["total_days_threshold"]
+                or longest >= config["long_term_days"]
+            ):
+                bands["low"] += 1
+            else:
+                bands["none"] += 1
+        results.append(bands)
+    return results
+
+
+def simulate_trigger_thresholds(
+    configs,
+    *,
+    organisation_id=None,
+    today: date,
+    window_days: int = SIMULATION_WINDOW_DAYS,
+):
+    """Count employees per trigger band for each threshold configuration.
+
+    Bands follow ``evaluate_sickness_trigger``: ``high``/``medium`` by
+    Bradford score, ``low`` for any other flag, ``none`` for employees with
+    absence in the window who would not be flagged. Case data is loaded once
+    and every configuration is evaluated against the same aggregates.
+    """
+    started = time.perf_counter()
+    aggregates = load_sickness_aggregates(organisation_id, today=today, window_days=window_days)
+
+    count_bands = _band_counts_numpy if NUMPY_ENABLED else _band_counts_python
+    band_counts = count_bands(aggregates, configs) if configs else []
+
+    return {
+        "window_start": (today - timedelta(days=window_days)).isoformat(),
+        "window_end": today.isoformat(),
+        "employees_with_absence": len(aggregates[0]),
+        "engine": "numpy" if NUMPY_ENABLED else "python",
+        "results": [
+            {
+                "config": config,
+                "bands": bands,
+                "flagged": bands["high"] + bands["medium"] + bands["low"],
+            }
+            for config, bands in zip(configs, band_counts)
+        ],
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 2),
+    }
@@ -0,0 +1,231 @@
+from __future__ import annotations
+
+import logging
+import threading
+from datetime import date, datetime
+
+from sqlalchemy import func, insert, or_
+
+from models import Employee, SicknessCase, SicknessSummary, db
+from pip_app.services.sickness_metrics import (
+    evaluate_sickness_trigger,
+    sickness_rollup_query,
+    sort_sickness_triggers,
+)
+
+SUMMARY_WINDOW_DAYS = 365
+SUMMARY_LONG_TERM_DAYS = 28
+BRADFORD_MEDIUM = 200
+BRADFORD_HIGH = 400
+BRADFORD_BANDS = ("high", "medium", "low")
+
+SUMMARY_INSERT_BATCH = 1000
+
+logger = logging.getLogger(__name__)
+
+_roll_lock = threading.Lock()
+_checked_through = None
+
+
+def bradford_band(bradford: int, *, medium: int = BRADFORD_MEDIUM, high: int = BRADFORD_HIGH) -> str:
+    if bradford >= high:
+        return "high"
+    if bradford >= medium:
+        return "medium"
+    return "low"
+
+
+def _summary_values(row, window_end: date):
+    episodes = int(row.episodes or 0)
+    total_days = int(row.total_days or 0)
+    bradford = (episodes * episodes * total_days) if total_days > 0 else 0
+    return {
+        "employee_id": row.employee_id,
+        "window_end": window_end,
+        "episodes": episodes,
+        "total_days": total_days,
+        "bradford": bradford,
+        "bradford_band": bradford_band(bradford),
+        "longest_spell_days": int(row.longest_spell_days or 0),
+        "has_long_term": bool(row.has_long_term),
+        "updated_at": datetime.utcnow(),
+    }
+
+
+def _rollup(q_cases, today: date):
+    return sickness_rollup_query(
+        q_cases,
+        today=today,
+        window_days=SUMMARY_WINDOW_DAYS,
+        long_term_days=SUMMARY_LONG_TERM_DAYS,
+    )
+
+
+def refresh_employee_sickness_summary(employee_id: int, *, today: date):
+    """Recompute one employee's summary row. The caller commits.
+
+    Call whenever one of the employee's sickness cases is created, edited
+    or closed. Employees with no absence in the window have no row.
+    """
+    row = _rollup(SicknessCase.query.filter(SicknessCase.employee_id == employee_id), today).first()
+
+    SicknessSummary.query.filter(SicknessSummary.employee_id == employee_id).delete(
+        synchronize_session=False
+    )
+    if row is not None:
+        db.session.execute(insert(SicknessSummary), [_summary_values(row, today)])
+
+
+def refresh_stale_employee_sickness_summary(employee_id: int, *, today: date) -> bool:
+    """Bring one employee's summary up to ``today`` if it is older, and commit.
+
+    Lets a detail page show a current figure when the nightly roll-forward
+    has not run, without rebuilding anyone else's. Returns True if refreshed.
+    """
+    window_end = (
+        db.session.query(SicknessSummary.window_end)
+        .filter(SicknessSummary.employee_id == employee_id)
+        .scalar()
+    )
+    if window_end is None or window_end >= today:
+        return False
+
+    refresh_employee_sickness_summary(employee_id, today=today)
+    db.session.commit()
+    return True
+
+
+def roll_sickness_summaries_forward(*, today: date) -> int:
+    """Rebuild every summary for the window ending ``today`` and commit.
+
+    Run nightly via the ``roll-sickness-summaries`` command so the rolling
+    window drops absences that have aged out. This scans every case in every
+    organisation, so never call it from a request. Returns the number of
+    employees with a summary row.
+    """
+    global _checked_through
+
+    with _roll_lock:
+        values = [_summary_values(row, today) for row in _rollup(SicknessCase.query, today)]
+
+        SicknessSummary.query.delete(synchronize_session=False)
+        for i in range(0, len(values), SUMMARY_INSERT_BATCH):
+            db.session.execute(insert(SicknessSummary), values[i:i + SUMMARY_INSERT_BATCH])
+        db.session.commit()
+
+        _checked_through = today
+
+    return len(values)
+
+
+def warn_if_sickness_summaries_stale(*, today: date) -> bool:
+    """Log a warning if the nightly roll-forward has not reached ``today``.
+
+    Readers keep using the stored summaries either way. Checked at most
+    once per day per process; returns True if the summaries are stale.
+    """
+    global _checked_through
+
+    if _checked_through == today:
+        return False
+
+    oldest = db.session.query(func.min(SicknessSummary.window_end)).scalar()
+    _checked_through = today
+    if oldest is None or oldest >= today:
+        return False
+
+    logger.warning(
+        "Sickness summaries last rolled forward to %s (today is %s); "
+        "run `flask roll-sickness-summaries`",
+        oldest,
+        today,
+    )
+    return True
+
+
+def _trigger_from_summary(summary, employee, thresholds):
+    trigger = evaluate_sickness_trigger(
+        episodes=summary.episodes,
+        total_days=summary.total_days,
+        has_long_term=summary.has_long_term,
+        long_term_days=SUMMARY_LONG_TERM_DAYS,
+        **thresholds,
+    )
+    if trigger is None:
+        return None
+
+    return {
+        "employee": employee,
+        "episodes": summary.episodes,
+        "total_days": summary.total_days,
+        "has_long_term": summary.has_long_term,
+        "longest_spell_days": summary.longest_spell_days,
+        **trigger,
+    }
+
+
+def sickness_triggers_from_summaries(
+    q_summaries,
+    *,
+    band: str | None = None,
+    bradford_medium: int = BRADFORD_MEDIUM,
+    bradford_high: int = BRADFORD_HIGH,
+    episodes_threshold: int = 3,
+    total_days_threshold: int = 14,
+):
+    """Build the potential-trigger list from precomputed summaries.
+
+    ``q_summaries`` is a SicknessSummary query already joined to Employee and
+    scoped by the caller. Only rows that can trip a threshold are read, and
+    ``band`` narrows to one stored Bradford band (banded at the default
+    200/400 thresholds). Output matches
+    ``compute_sickness_trigger_metrics`` for the summary window.
+    """
+    thresholds = {
+        "bradford_medium": bradford_medium,
+        "bradford_high": bradford_high,
+        "episodes_threshold": episodes_threshold,
+        "total_days_threshold": total_days_threshold,
+    }
+
+    query = q_summaries.filter(
+        or_(
+            SicknessSummary.episodes >= episodes_threshold,
+            SicknessSummary.total_days >= total_days_threshold,
+            SicknessSummary.has_long_term.is_(True),
+            SicknessSummary.bradford >= bradford_medium,
+        )
+    )
+    if band in BRADFORD_BANDS:
+        query = query.filter(SicknessSummary.bradford_band == band)
+
+    rows = query.with_entities(SicknessSummary, Employee).order_by(
+        SicknessSummary.bradford.desc(),
+        SicknessSummary.episodes.desc(),
+    )
+
+    potential_triggers = []
+    for summary, employee in rows:
+        trigger = _trigger_from_summary(summary, employee, thresholds)
+        if trigger is not None:
+            potential_triggers.append(trigger)
+
+    return sort_sickness_triggers(potential_triggers)
+
+
+def employee_sickness_trigger(employee, **thresholds):
+    """Return the trigger dict for one employee from their summary, or None."""
+    summary = db.session.get(SicknessSummary, employee.id)
+    if summary is None:
+        return None
+
+    return _trigger_from_summary(
+        summary,
+        employee,
+        {
+            "bradford_medium": thresholds.get("bradford_medium", BRADFORD_MEDIUM),
+            "bradford_high": thresholds.get("bradford_high", BRADFORD_HIGH),
+            "episodes_threshold": thresholds.get("episodes_threshold", 3),
+            "total_days_threshold": thresholds.get("total_days_threshold", 14),
+        },
+    )
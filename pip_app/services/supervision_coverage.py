@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+from datetime import date
+
+from sqlalchemy import func, or_
+
+from models import Employee, SupervisionRecord, db
+
+
+def latest_supervision_subquery():
+    """One row per employee with their most recent supervision meeting date.
+
+    Backed by the (employee_id, meeting_date) composite index, so the
+    grouped MAX() is resolved from the index alone.
+    """
+    return (
+        db.session.query(
+            SupervisionRecord.employee_id.label("employee_id"),
+            func.max(SupervisionRecord.meeting_date).label("latest_meeting_date"),
+        )
+        .group_by(SupervisionRecord.employee_id)
+        .subquery("latest_supervision")
+    )
+
+
+def missing_supervision_query(employee_query, *, cutoff: date):
+    """Filter an Employee query to those not supervised since ``cutoff``.
+
+    ``employee_query`` should already carry the caller's scope (organisation,
+    team, active-only). Rows come back as ``(Employee, latest_meeting_date)``
+    where the date is None for employees who have never been supervised.
+    """
+    latest = latest_supervision_subquery()
+
+    return (
+        employee_query.outerjoin(latest, latest.c.employee_id == Employee.id)
+        .filter(
+            or_(
+                latest.c.latest_meeting_date.is_(None),
+                latest.c.latest_meeting_date < cutoff,
+            )
+        )
+        .add_columns(latest.c.latest_meeting_date)
+    )
+
+
+def count_employees_missing_supervision(employee_query, *, cutoff: date) -> int:
+    query = missing_supervision_query(employee_query, cutoff=cutoff)
+    return int(
+        query.order_by(None).with_entities(func.count(Employee.id)).scalar() or 0
+    )
+
+
+def list_employees_missing_supervision(
+    employee_query,
+    *,
+    cutoff: date,
+    limit: int | None = None,
+    offset: int = 0,
+):
+    """Return ``[{"employee": ..., "latest_meeting_date": ...}, ...]``.
+
+    Ordering follows ``employee_query``; pass ``limit``/``offset`` to page
+    through large organisations.
+    """
+    query = missing_supervision_query(employee_query, cutoff=cutoff)
+
+    if offset:
+        query = query.offset(offset)
+    if limit is not None:
+        query = query.limit(limit)
+
+    return [
+        {"employee": employee, "latest_meeting_date": latest_meeting_date}
+        for employee, latest_meeting_date in query.all()
+    ]
@@ -0,0 +1,105 @@
+// Polling and streaming for queued AI jobs.
+//
+// Endpoints that call the model enqueue an AI job and return straight away.
+// Markup for a job started by a form post:
+//   <div data-ai-job-status-url="/ai/jobs/12"
+//        data-ai-job-stream-url="/ai/jobs/12/stream" data-ai-job-live="draft"
+//        data-ai-job-reload>Generating…</div>
+// With a stream URL, tokens are appended to the data-ai-job-live element as
+// the model writes them; without one (or if the stream is refused or drops)
+// the status URL is polled. When the job finishes, data-ai-job-reload
+// reloads the page to show the saved result; data-ai-job-target="id" writes
+// the job's ``result.advice`` into that element instead. On failure the
+// element shows the job's error message.
+//
+// Scripts that enqueue jobs via fetch can use window.pollAIJob(url) or
+// window.streamAIJob(streamUrl, statusUrl, onToken); both resolve with the
+// finished job or reject with its error.
+(function () {
+  const INTERVAL_MS = 1500;
+  const MAX_INTERVAL_MS = 5000;
+
+  function wait(ms) {
+    return new Promise((resolve) => setTimeout(resolve, ms));
+  }
+
+  function settle(job) {
+    if (job.status === 'failed') throw new Error(job.error || 'AI generation failed.');
+    return job;
+  }
+
+  async function pollAIJob(url, options) {
+    let interval = (options && options.interval) || INTERVAL_MS;
+    for (;;) {
+      const res = await fetch(url, {headers: {Accept: 'application/json'}, credentials: 'same-origin'});
+      if (!res.ok) throw new Error('Could not check the AI request status.');
+      const job = await res.json();
+      if (job.status === 'completed' || job.status === 'failed') return settle(job);
+      await wait(interval);
+      interval = Math.min(interval * 1.25, MAX_INTERVAL_MS);
+    }
+  }
+
+  function streamAIJob(streamUrl, statusUrl, onToken) {
+    if (!window.EventSource || !streamUrl) return pollAIJob(statusUrl);
+
+    return new Promise((resolve, reject) => {
+      const source = new EventSource(streamUrl);
+      let finished = false;
+
+      source.addEventListener('token', (event) => {
+        if (onToken) onToken(JSON.parse(event.data));
+      });
+      source.addEventListener('done', (event) => {
+        finished = true;
+        source.close();
+        const job = JSON.parse(event.data);
+        if (job.status === 'completed' || job.status === 'failed') {
+          try { resolve(settle(job)); } catch (err) { reject(err); }
+        } else {
+          pollAIJob(statusUrl).then(resolve, reject);
+        }
+      });
+      // Refused (all stream slots busy) or dropped: fall back to polling.
+      source.onerror = () => {
+        if (finished) return;
+        finished = true;
+        source.close();
+        pollAIJob(statusUrl).then(resolve, reject);
+      };
+    });
+  }
+
+  function bind(el) {
+    const live = document.getElementById(el.dataset.aiJobLive);
+    const onToken = live ? (text) => {
+      live.textContent += text;
+      live.classList.remove('hidden');
+    } : null;
+
+    streamAIJob(el.dataset.aiJobStreamUrl, el.dataset.aiJobStatusUrl, onToken)
+      .then((job) => {
+        if (el.hasAttribute('data-ai-job-reload')) {
+          window.location.reload();
+          return;
+        }
+        const target = document.getElementById(el.dataset.aiJobTarget);
+        if (target) {
+          target.textContent = (job.result && job.result.advice) || '';
+          target.classList.remove('hidden');
+        }
+        el.classList.add('hidden');
+      })
+      .catch((err) => {
+        el.textContent = err.message;
+        el.classList.add('text-red-700');
+      });
+  }
+
+  window.pollAIJob = pollAIJob;
+  window.streamAIJob = streamAIJob;
+
+  document.addEventListener('DOMContentLoaded', () => {
+    document.querySelectorAll('[data-ai-job-status-url]').forEach(bind);
+  });
+})();
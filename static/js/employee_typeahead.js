@@ -0,0 +1,70 @@
+// Employee typeahead for selectors.
+//
+// Markup:
+//   <input type="search" data-employee-typeahead-for="employee_id"
+//          data-url="/employee/typeahead">
+//   <select id="employee_id" data-show-job-title>...</select>
+//
+// The server renders only the currently selected employee into the
+// <select>. This script fills it with the top matches for whatever is typed
+// into the search box, keeping the placeholder and selected options.
+(function () {
+  function optionLabel(employee, select) {
+    let text = employee.name;
+    if (select.hasAttribute('data-show-job-title') && employee.job_title) {
+      text += ' — ' + employee.job_title;
+    }
+    if (employee.is_leaver) text += ' — LEAVER';
+    return text;
+  }
+
+  function bind(input) {
+    const select = document.getElementById(input.dataset.employeeTypeaheadFor);
+    const url = input.dataset.url;
+    if (!select || !url) return;
+
+    let timer = null;
+    let controller = null;
+
+    async function load(term) {
+      if (controller) controller.abort();
+      controller = new AbortController();
+
+      const params = new URLSearchParams({ q: term });
+      const response = await fetch(url + (url.includes('?') ? '&' : '?') + params.toString(), {
+        headers: { Accept: 'application/json' },
+        credentials: 'same-origin',
+        signal: controller.signal,
+      });
+      if (!response.ok) return;
+      const data = await response.json();
+
+      const kept = Array.from(select.options).filter((o) => o.value === '' || o.selected);
+      const keptValues = new Set(kept.map((o) => o.value));
+      select.innerHTML = '';
+      kept.forEach((o) => select.appendChild(o));
+
+      (data.results || []).forEach((employee) => {
+        if (keptValues.has(String(employee.id))) return;
+        select.appendChild(new Option(optionLabel(employee, select), employee.id));
+      });
+    }
+
+    input.addEventListener('input', () => {
+      clearTimeout(timer);
+      timer = setTimeout(() => load(input.value.trim()).catch(() => {}), 200);
+    });
+
+    load('').catch(() => {});
+  }
+
+  function init() {
+    document.querySelectorAll('input[data-employee-typeahead-for]').forEach(bind);
+  }
+
+  if (document.readyState === 'loading') {
+    document.addEventListener('DOMContentLoaded', init);
+  } else {
+    init();
+  }
+})();
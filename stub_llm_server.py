@@ -0,0 +1,171 @@
+# stub_llm_server.py
+"""A canned OpenAI-compatible chat completions server for development.
+
+Serves ``POST /v1/chat/completions`` with a fixed answer after an optional
+delay, so AI jobs can be exercised without an API key or network access:
+
+    python stub_llm_server.py --port 8089 --delay 3
+    OPENAI_BASE_URL=http://127.0.0.1:8089/v1 OPENAI_API_KEY=stub flask run
+
+Requests asking for JSON (``response_format`` or a prompt mentioning JSON)
+get one object carrying both the PIP suggestion arrays and the ER advice
+sections; everything else gets a short bulleted list. ``stream: true``
+requests are answered as server-sent chunks, one word every
+``--token-delay`` seconds after the initial delay. ``--fail-rate`` answers
+that fraction of requests with HTTP 500 to exercise job failures.
+"""
+
+import argparse
+import json
+import random
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+TEXT_ANSWER = (
+    "- Agree weekly check-ins and record progress against each action.\n"
+    "- Confirm what support or training the employee needs and book it.\n"
+    "- Set out clearly what good performance looks like by the review date."
+)
+
+JSON_ANSWER = {
+    "actions": [
+        "Agree weekly one-to-ones with written notes",
+        "Set three measurable targets for the review period",
+        "Book refresher training on core duties",
+    ],
+    "next_up": [
+        "Review progress at the midpoint meeting",
+        "Refer to occupational health if concerns are health related",
+    ],
+    "overall_risk_view": "Moderate risk; the process so far is broadly fair.",
+    "immediate_next_steps": "Confirm the investigation terms of reference.",
+    "investigation_questions": "What happened, when, and who was present?",
+    "hearing_questions": "Is there anything you would like us to take into account?",
+    "outcome_sanction_guidance": "Consider a first written warning if the allegation is upheld.",
+    "fairness_process_checks": "Right to be accompanied offered; evidence shared in advance.",
+    "suggested_wording": "We are writing to invite you to a meeting to discuss...",
+    "missing_information": "Witness statements have not been gathered yet.",
+}
+
+
+def _wants_json(body):
+    if (body.get("response_format") or {}).get("type") == "json_object":
+        return True
+    return any("JSON" in str(m.get("content", "")) for m in body.get("messages") or [])
+
+
+def _completion_id():
+    return f"chatcmpl-stub-{int(time.time() * 1000)}"
+
+
+def make_handler(delay, fail_rate, token_delay):
+    class StubHandler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            body = json.loads(self.rfile.read(length) or b"{}")
+
+            if not self.path.rstrip("/").endswith("/chat/completions"):
+                self._send(404, {"error": {"message": "Not found"}})
+                return
+
+            time.sleep(delay)
+
+            if random.random() < fail_rate:
+                self._send(500, {"error": {"message": "Stub failure", "type": "server_error"}})
+                return
+
+            content = json.dumps(JSON_ANSWER) if _wants_json(body) else TEXT_ANSWER
+            if body.get("stream"):
+                self._stream(body, content)
+                return
+
+            self._send(200, {
+                "id": _completion_id(),
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": body.get("model", "stub"),
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": content},
+                    "finish_reason": "stop",
+                }],
+                "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+            })
+
+        def _stream(self, body, content):
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Cache-Control", "no-cache")
+            self.end_headers()
+
+            completion_id = _completion_id()
+            words = content.split(" ")
+            for index, word in enumerate(words):
+                text = word if index == len(words) - 1 else word + " "
+                self._event({
+                    "id": completion_id,
+                    "object": "chat.completion.chunk",
+                    "created": int(time.time()),
+                    "model": body.get("model", "stub"),
+                    "choices": [{"index": 0, "delta": {"content": text}, "finish_reason": None}],
+                })
+                time.sleep(token_delay)
+
+            self._event({
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": body.get("model", "stub"),
+                "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}],
+            })
+            if (body.get("stream_options") or {}).get("include_usage"):
+                self._event({
+                    "id": completion_id,
+                    "object": "chat.completion.chunk",
+                    "created": int(time.time()),
+                    "model": body.get("model", "stub"),
+                    "choices": [],
+                    "usage": {"prompt_tokens": 0, "completion_tokens": len(words), "total_tokens": len(words)},
+                })
+            self.wfile.write(b"data: [DONE]\n\n")
+            self.wfile.flush()
+
+        def _event(self, payload):
+            self.wfile.write(f"data: {json.dumps(payload)}\n\n".encode("utf-8"))
+            self.wfile.flush()
+
+        def _send(self, status, payload):
+            data = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            print(f"[stub-llm] {self.address_string()} {format % args}")
+
+    return StubHandler
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--delay", type=float, default=2.0, help="seconds to wait before answering")
+    parser.add_argument("--token-delay", type=float, default=0.05, help="seconds between streamed words")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="fraction of requests answered with HTTP 500")
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(args.delay, args.fail_rate, args.token_delay))
+    print(f"Stub LLM listening on http://{args.host}:{args.port}/v1 (delay {args.delay}s)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
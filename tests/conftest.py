@@ -0,0 +1,180 @@
+import os
+import shutil
+import sys
+import tempfile
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+import pytest
+
+# app.py configures itself at import time, so point it at a throwaway
+# SQLite database before anything imports it.
+_DB_DIR = tempfile.mkdtemp(prefix="pip-tests-")
+os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(_DB_DIR, "test.db")
+os.environ.setdefault("SECRET_KEY", "test-secret")
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app import app as flask_app  # noqa: E402
+from models import (  # noqa: E402
+    Employee,
+    EmployeeRelationsCase,
+    EmployeeRelationsMeeting,
+    EmployeeRelationsTimelineEvent,
+    Organisation,
+    PIPActionItem,
+    PIPRecord,
+    SicknessCase,
+    SicknessMeeting,
+    SupervisionAction,
+    SupervisionRecord,
+    TimelineEvent,
+    User,
+    db,
+)
+from pip_app.services.module_settings import bootstrap_all_organisations  # noqa: E402
+
+# Enough children per parent that a lazy load inside a loop trips
+# N_PLUS_ONE_THRESHOLD.
+CHILDREN_PER_RECORD = 4
+
+
+@pytest.fixture(scope="session")
+def app():
+    flask_app.config.update(
+        TESTING=True,
+        WTF_CSRF_ENABLED=False,
+        SESSION_COOKIE_SECURE=False,
+        REMEMBER_COOKIE_SECURE=False,
+        N_PLUS_ONE_DETECTION="raise",
+    )
+    # No app context stays pushed during tests, so each request gets its own
+    # session and query counts are not flattered by a shared identity map.
+    with flask_app.app_context():
+        db.create_all()
+    yield flask_app
+    with flask_app.app_context():
+        db.drop_all()
+        db.engine.dispose()
+    shutil.rmtree(_DB_DIR, ignore_errors=True)
+
+
+@pytest.fixture(scope="session")
+def seeded(app):
+    """One record of each detail page's kind, each with several children."""
+    with app.app_context():
+        return _seed()
+
+
+def _seed():
+    organisation = Organisation(name="Test Organisation", slug="test-organisation")
+    db.session.add(organisation)
+    db.session.flush()
+    bootstrap_all_organisations()
+
+    user = User(
+        username="admin",
+        email="admin@example.com",
+        password_hash="-",
+        admin_level=2,
+        organisation_id=organisation.id,
+    )
+    db.session.add(user)
+
+    today = date.today()
+    employees = []
+    for i in range(CHILDREN_PER_RECORD):
+        employee = Employee(
+            organisation_id=organisation.id,
+            first_name=f"Employee{i}",
+            last_name="Test",
+            email=f"employee{i}@example.com",
+            job_title="Support Worker",
+            service="Care",
+            team_id=1,
+            start_date=today - timedelta(days=400),
+        )
+        db.session.add(employee)
+        employees.append(employee)
+    db.session.flush()
+    employee = employees[0]
+
+    pip = PIPRecord(
+        employee_id=employee.id,
+        concerns="Missed deadlines",
+        start_date=today - timedelta(days=30),
+        review_date=today + timedelta(days=30),
+        status="Open",
+        created_by=user.username,
+    )
+    db.session.add(pip)
+    db.session.flush()
+
+    er_case = EmployeeRelationsCase(
+        employee_id=employee.id,
+        case_type="Disciplinary",
+        title="Timekeeping",
+        allegation_or_grievance="Repeated lateness",
+        date_raised=today - timedelta(days=20),
+        created_by=user.username,
+    )
+    sickness_case = SicknessCase(
+        employee_id=employee.id,
+        start_date=today - timedelta(days=10),
+        end_date=today - timedelta(days=5),
+        reason="Flu",
+        status="Closed",
+    )
+    supervision = SupervisionRecord(
+        organisation_id=organisation.id,
+        employee_id=employee.id,
+        manager_user_id=None,
+        meeting_date=today - timedelta(days=7),
+        status="Completed",
+        created_by=user.username,
+    )
+    db.session.add_all([er_case, sickness_case, supervision])
+    db.session.flush()
+
+    for i in range(CHILDREN_PER_RECORD):
+        when = datetime.utcnow() - timedelta(days=i)
+        db.session.add_all([
+            PIPActionItem(pip_record_id=pip.id, description=f"Action {i}", status="Open"),
+            TimelineEvent(pip_record_id=pip.id, event_type="Update", notes=f"Note {i}", updated_by=user.username),
+            EmployeeRelationsMeeting(case_id=er_case.id, meeting_type="Investigation", meeting_datetime=when),
+            EmployeeRelationsTimelineEvent(case_id=er_case.id, event_type="Update", notes=f"Note {i}"),
+            SicknessMeeting(sickness_case_id=sickness_case.id, meeting_date=today - timedelta(days=i), meeting_type="Review"),
+            SupervisionAction(
+                supervision_id=supervision.id,
+                organisation_id=organisation.id,
+                employee_id=employee.id,
+                description=f"Action {i}",
+            ),
+            PIPRecord(
+                employee_id=employees[i].id,
+                concerns=f"Concern {i}",
+                start_date=today - timedelta(days=i),
+                review_date=today + timedelta(days=14),
+                status="Open",
+                created_by=user.username,
+            ),
+        ])
+    db.session.commit()
+
+    return {
+        "user_id": user.id,
+        "employee_id": employee.id,
+        "pip_id": pip.id,
+        "er_case_id": er_case.id,
+        "sickness_case_id": sickness_case.id,
+        "supervision_id": supervision.id,
+    }
+
+
+@pytest.fixture
+def client(app, seeded):
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session["_user_id"] = str(seeded["user_id"])
+        session["_fresh"] = True
+    return client
@@ -0,0 +1,65 @@
+import json
+import time
+
+from models import AIJob, EmployeeRelationsAIAdvice, db
+from pip_app.services.ai_client import FakeAIClient, ai_client_override
+
+ADVICE = json.dumps({
+    "overall_risk_view": "Low",
+    "immediate_next_steps": "Hold an investigation meeting.",
+    "investigation_questions": "What caused the lateness?",
+    "hearing_questions": "",
+    "outcome_sanction_guidance": "",
+    "fairness_process_checks": "Share the evidence in advance.",
+    "suggested_wording": "",
+    "missing_information": "Clocking records.",
+})
+
+
+def _wait_for_job(client, job_id, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = client.get(f"/ai/jobs/{job_id}").get_json()
+        if job["status"] not in ("queued", "running"):
+            return job
+        time.sleep(0.05)
+    raise AssertionError(f"AI job {job_id} did not finish within {timeout}s")
+
+
+def _advice_count(app, case_id):
+    with app.app_context():
+        return EmployeeRelationsAIAdvice.query.filter_by(case_id=case_id).count()
+
+
+def _stored_request(app, job_id):
+    with app.app_context():
+        return db.session.get(AIJob, job_id).request_payload()
+
+
+def test_er_advice_runs_as_a_job_and_reuses_the_cache(app, client, seeded):
+    case_id = seeded["er_case_id"]
+    url = f"/employee-relations/cases/{case_id}/ai-advice/generate"
+    fake = FakeAIClient(reply=ADVICE)
+
+    with ai_client_override(fake):
+        response = client.post(url, headers={"Accept": "application/json"})
+        assert response.status_code == 202
+        job = _wait_for_job(client, response.get_json()["job"]["id"])
+        assert job["status"] == "completed"
+        assert not job["cached"]
+        assert len(fake.calls) == 1
+        saved = _advice_count(app, case_id)
+        assert saved == 1
+        # The prompt quotes the case, so it is not kept once the job is done.
+        assert set(_stored_request(app, job["id"])) == {"model", "context"}
+
+        # Same case, same prompt: answered from the cache without calling
+        # the model or saving the same advice twice.
+        response = client.post(url, headers={"Accept": "application/json"})
+        job = response.get_json()["job"]
+        assert job["status"] == "completed"
+        assert job["cached"]
+        assert job["result"]["reused"]
+        assert len(fake.calls) == 1
+        assert _advice_count(app, case_id) == saved
+        assert "messages" not in _stored_request(app, job["id"])
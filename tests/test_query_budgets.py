@@ -0,0 +1,52 @@
+import pytest
+
+from models import PIPRecord
+from pip_app.services.request_metrics import (
+    DEFAULT_QUERY_BUDGETS,
+    QUERY_COUNT_HEADER,
+    NPlusOneQueryError,
+)
+
+# endpoint -> (url template, seeded id key)
+BUDGETED_PAGES = {
+    "main.home": ("/", None),
+    "pip.pip_detail": ("/pip/{}", "pip_id"),
+    "employee_relations.view_case": ("/employee-relations/cases/{}", "er_case_id"),
+    "sickness.view_sickness_case": ("/sickness/{}", "sickness_case_id"),
+    "supervision.detail": ("/supervision/{}", "supervision_id"),
+}
+
+
+def test_every_budget_has_a_page():
+    assert set(BUDGETED_PAGES) == set(DEFAULT_QUERY_BUDGETS)
+
+
+@pytest.mark.parametrize("endpoint", sorted(BUDGETED_PAGES))
+def test_page_stays_within_query_budget(client, seeded, endpoint):
+    url, id_key = BUDGETED_PAGES[endpoint]
+    url = url.format(seeded[id_key]) if id_key else url
+
+    # N_PLUS_ONE_DETECTION is "raise", so a repeated lazy load fails here.
+    response = client.get(url)
+
+    assert response.status_code == 200
+    assert int(response.headers[QUERY_COUNT_HEADER]) <= DEFAULT_QUERY_BUDGETS[endpoint]
+
+
+def test_repeated_filtered_queries_are_not_flagged(client):
+    # The dashboard runs one count per status on purpose; only repeated
+    # lazy loads should trip N+1 detection.
+    response = client.get("/supervision/dashboard")
+
+    assert response.status_code == 200
+
+
+def test_repeated_lazy_load_raises(app, seeded):
+    # Guards the check above: without it a budget test could pass only
+    # because detection was never switched on.
+    with app.test_request_context("/"):
+        app.preprocess_request()
+        pips = PIPRecord.query.all()
+        with pytest.raises(NPlusOneQueryError):
+            for pip in pips:
+                list(pip.action_items)
@@ -0,0 +1,104 @@
+from datetime import date, timedelta
+
+import pytest
+
+from models import Employee, EmployeeRelationsCase, Organisation, PIPRecord, User, db
+
+SEARCH_TERM = "whistleblowing"
+
+
+@pytest.fixture(scope="module")
+def search_records(app, seeded):
+    """Matching records in and out of the test user's scope."""
+    with app.app_context():
+        home_org = db.session.get(User, seeded["user_id"]).organisation_id
+        other_org = Organisation(name="Other Organisation", slug="other-organisation")
+        db.session.add(other_org)
+        db.session.flush()
+
+        manager = User(
+            username="line-manager",
+            email="manager@example.com",
+            password_hash="-",
+            admin_level=0,
+            organisation_id=home_org,
+            team_id=1,
+        )
+        other_team = Employee(
+            organisation_id=home_org,
+            first_name="Other",
+            last_name="Team",
+            team_id=2,
+        )
+        other_org_employee = Employee(
+            organisation_id=other_org.id,
+            first_name="Other",
+            last_name="Organisation",
+            team_id=1,
+        )
+        db.session.add_all([manager, other_team, other_org_employee])
+        db.session.flush()
+
+        today = date.today()
+        pips = {
+            key: PIPRecord(
+                employee_id=employee_id,
+                concerns=f"Raised {SEARCH_TERM} concerns",
+                start_date=today - timedelta(days=5),
+                review_date=today + timedelta(days=25),
+                status="Open",
+            )
+            for key, employee_id in (
+                ("own_team", seeded["employee_id"]),
+                ("other_team", other_team.id),
+                ("other_org", other_org_employee.id),
+            )
+        }
+        er_cases = {
+            key: EmployeeRelationsCase(
+                employee_id=employee_id,
+                case_type="Grievance",
+                title="Grievance",
+                allegation_or_grievance=f"Retaliation after {SEARCH_TERM}",
+                date_raised=today - timedelta(days=3),
+            )
+            for key, employee_id in (
+                ("own_team", seeded["employee_id"]),
+                ("other_org", other_org_employee.id),
+            )
+        }
+        db.session.add_all([*pips.values(), *er_cases.values()])
+        db.session.commit()
+
+        return {
+            "manager_id": manager.id,
+            "pip": {key: pip.id for key, pip in pips.items()},
+            "employee_relations": {key: case.id for key, case in er_cases.items()},
+        }
+
+
+def _search(app, user_id):
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session["_user_id"] = str(user_id)
+        session["_fresh"] = True
+    response = client.get(f"/search?q={SEARCH_TERM}", headers={"Accept": "application/json"})
+    assert response.status_code == 200
+    return {(r["record_type"], r["record_id"]) for r in response.get_json()["results"]}
+
+
+def test_search_is_limited_to_the_users_organisation(app, seeded, search_records):
+    found = _search(app, seeded["user_id"])
+
+    assert found == {
+        ("pip", search_records["pip"]["own_team"]),
+        ("pip", search_records["pip"]["other_team"]),
+        ("employee_relations", search_records["employee_relations"]["own_team"]),
+    }
+
+
+def test_line_manager_search_is_limited_to_their_team(app, search_records):
+    found = _search(app, search_records["manager_id"])
+
+    # Employee Relations is superuser-only, so only the team's PIP matches.
+    assert found == {("pip", search_records["pip"]["own_team"])}